@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+End-to-end MQTT bridge benchmark
+
+Drives a streaming-mode HomeAssistantMQTT with a simulated fleet of Teltonika
+EYE sensors against the in-process local broker. Synthetic adverts enter
+through the scanner's detection callback, so parsing, coalescing, discovery,
+state building and publishing are all measured. Reports advert and broker
+message rates, advert-to-broker latency percentiles, CPU time and peak RSS
+as JSON, for comparing releases and sizing gateways.
+
+CPU and RSS are for the whole process and include the in-process broker.
+"""
+
+import asyncio
+import json
+import os
+import platform
+import resource
+import struct
+import sys
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiomqtt  # noqa: E402
+import state_codec  # noqa: E402
+from bench_mqtt_publish import percentiles  # noqa: E402
+from homeassistant_mqtt import HomeAssistantMQTT  # noqa: E402
+from local_broker import LocalBroker  # noqa: E402
+from teltonika_eye_scanner import TeltonikaEYEParser  # noqa: E402
+
+# Temperature, humidity, movement counter, angle and battery voltage present
+ADVERT_FLAGS = 0xB7
+# Movement counter is 15 bits; it carries the per-device advert sequence number
+MAX_SEQUENCE = 0x7FFF
+TICK = 0.005
+
+
+def peak_rss_mb() -> float:
+    """Return the peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def make_fleet(devices: int) -> List[SimpleNamespace]:
+    """Return stand-ins for BLEDevice, one per simulated sensor."""
+    return [
+        SimpleNamespace(
+            address=":".join(f"{byte:02X}" for byte in (0x7C, 0xD9) + tuple(index.to_bytes(4, "big"))),
+            name=f"EYE {index:05d}"
+        )
+        for index in range(devices)
+    ]
+
+
+def make_advert(index: int, sequence: int) -> SimpleNamespace:
+    """Return a stand-in for AdvertisementData with a varying reading."""
+    data = (
+        bytes((0x01, ADVERT_FLAGS))
+        + struct.pack(">hBH", 2000 + (index + sequence) % 500, 40 + sequence % 20, sequence)
+        + bytes.fromhex("0BFFC767")
+    )
+    return SimpleNamespace(
+        manufacturer_data={TeltonikaEYEParser.TELTONIKA_COMPANY_ID: data},
+        rssi=-60 - index % 30
+    )
+
+
+async def run_case(
+    devices: int,
+    advert_interval: float,
+    duration: float,
+    qos: int,
+    compact_state: bool,
+    coalesce_window: float,
+    state_encoding: str = "json"
+) -> Dict:
+    """Stream a simulated fleet through the bridge and measure it at the broker."""
+    # (device id, sequence) -> advert time
+    advert_times: Dict[Tuple[str, int], float] = {}
+    latencies: List[float] = []
+
+    # The document carrying each reading: compact JSON, or the full state document
+    state_suffix = "/state" if compact_state or state_encoding == "json" else f"/state/{state_encoding}"
+
+    def on_publish(topic: str, payload: bytes, received_at: float):
+        if not topic.endswith(state_suffix):
+            return
+        if compact_state:
+            sequence = json.loads(payload).get("movement_count")
+        else:
+            sequence = state_codec.decode_state(state_encoding, payload).get("mc")
+        started = advert_times.pop((topic.split("/")[1], sequence), None)
+        if started is not None:
+            latencies.append(received_at - started)
+
+    broker = LocalBroker(on_publish=on_publish)
+    port = await broker.start()
+
+    bridge = HomeAssistantMQTT(
+        mqtt_port=port,
+        compact_state=compact_state,
+        qos_state=qos,
+        max_queue=max(10000, devices * 20),
+        streaming=True,
+        coalesce_window=coalesce_window,
+        state_encoding=state_encoding
+    )
+    mqtt_task = asyncio.create_task(bridge._mqtt_loop())
+    while bridge.mqtt_client is None:
+        await asyncio.sleep(0.01)
+
+    fleet = make_fleet(devices)
+    device_ids = [bridge._get_device_id(device.address) for device in fleet]
+    rate = devices / advert_interval
+    adverts = 0
+    max_queue_depth = 0
+
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    # Devices are staggered evenly, each advertising once per advert_interval
+    while True:
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            break
+        due = int(elapsed * rate)
+        while adverts < due:
+            index = adverts % devices
+            sequence = (adverts // devices) % MAX_SEQUENCE
+            advert_times[(device_ids[index], sequence)] = time.perf_counter()
+            await bridge.scanner.scan_callback(fleet[index], make_advert(index, sequence))
+            adverts += 1
+        max_queue_depth = max(max_queue_depth, bridge.queue_depth)
+        await asyncio.sleep(TICK)
+    generate_seconds = time.perf_counter() - start
+
+    # Publish what is still being coalesced and wait for the broker to catch up
+    for device_address in list(bridge._pending_readings):
+        bridge._flush_reading(device_address)
+    await bridge._flush(timeout=30)
+    total_seconds = time.perf_counter() - start
+    cpu_seconds = time.process_time() - cpu_start
+
+    bridge.running = False
+    mqtt_task.cancel()
+    try:
+        await mqtt_task
+    except asyncio.CancelledError:
+        pass
+    await broker.stop()
+
+    return {
+        "devices": devices,
+        "advert_interval": advert_interval,
+        "qos": qos,
+        "compact_state": compact_state,
+        "state_encoding": state_encoding,
+        "coalesce_ms": coalesce_window * 1000,
+        "adverts": adverts,
+        "adverts_per_second": adverts / generate_seconds,
+        "target_adverts_per_second": rate,
+        "readings_published": len(latencies),
+        "readings_not_published": adverts - len(latencies),
+        "broker_messages": broker.messages_received,
+        "broker_messages_per_second": broker.messages_received / total_seconds,
+        "broker_bytes": broker.bytes_received,
+        "latency": percentiles(latencies),
+        "max_queue_depth": max_queue_depth,
+        "dropped": bridge.stats["dropped"],
+        "errors": bridge.stats["errors"],
+        "cpu_seconds": cpu_seconds,
+        "cpu_percent": 100 * cpu_seconds / total_seconds,
+        "seconds": total_seconds,
+    }
+
+
+async def main():
+    """Run the benchmark for each fleet size and write the report."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the MQTT bridge end to end with a simulated fleet")
+    parser.add_argument("--devices", type=int, nargs="+", default=[500, 2000, 5000],
+                        help="Fleet sizes to test (default: 500 2000 5000)")
+    parser.add_argument("--advert-interval", type=float, default=1.0,
+                        help="Seconds between adverts of one device (default: 1.0)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per case (default: 20)")
+    parser.add_argument("--qos", type=int, choices=[0, 1, 2], default=0, help="State QoS (default: 0)")
+    parser.add_argument("--compact-state", action="store_true", help="Use the compact state topic")
+    parser.add_argument("--coalesce-ms", type=float, default=250,
+                        help="Streaming coalescing window in milliseconds (default: 250)")
+    parser.add_argument("--state-encoding", choices=state_codec.STATE_ENCODINGS, default="json",
+                        help="Encoding of the full state document (default: json)")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    results = []
+    for devices in args.devices:
+        results.append(await run_case(
+            devices, args.advert_interval, args.duration, args.qos,
+            args.compact_state, args.coalesce_ms / 1000, args.state_encoding
+        ))
+
+    report = {
+        "benchmark": "bridge_end_to_end",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "platform": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "system": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "aiomqtt": getattr(aiomqtt, "__version__", "unknown"),
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "results": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
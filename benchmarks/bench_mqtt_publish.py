@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+MQTT publish path benchmark
+
+Drives HomeAssistantMQTT's asyncio publish pipeline against the in-process
+local broker and reports throughput and queue-to-broker latency percentiles
+for each QoS / in-flight window combination. Output is JSON on stdout.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from homeassistant_mqtt import HomeAssistantMQTT, TOPIC_CLASS_STATE  # noqa: E402
+from local_broker import LocalBroker  # noqa: E402
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Return p50/p95/p99/max of samples in milliseconds."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        "p50_ms": ordered[int(last * 0.50)] * 1000,
+        "p95_ms": ordered[int(last * 0.95)] * 1000,
+        "p99_ms": ordered[int(last * 0.99)] * 1000,
+        "max_ms": ordered[last] * 1000,
+    }
+
+
+async def run_case(messages: int, qos: int, max_inflight: int) -> Dict:
+    """Publish messages through the bridge and measure them at the broker."""
+    sent_at: Dict[bytes, float] = {}
+    latencies: List[float] = []
+    done = asyncio.Event()
+
+    def on_publish(topic: str, payload: bytes, received_at: float):
+        started = sent_at.pop(payload, None)
+        if started is not None:
+            latencies.append(received_at - started)
+            if len(latencies) == messages:
+                done.set()
+
+    broker = LocalBroker(on_publish=on_publish)
+    port = await broker.start()
+
+    bridge = HomeAssistantMQTT(
+        mqtt_port=port,
+        qos_state=qos,
+        max_inflight=max_inflight,
+        max_queue=messages
+    )
+    mqtt_task = asyncio.create_task(bridge._mqtt_loop())
+    while bridge.mqtt_client is None:
+        await asyncio.sleep(0.01)
+
+    start = time.perf_counter()
+    for seq in range(messages):
+        payload = str(seq).encode()
+        sent_at[payload] = time.perf_counter()
+        bridge._publish(f"teltonika_eye/bench{seq % 500}/state", payload, TOPIC_CLASS_STATE)
+        # Yield now and then so the publisher overlaps with production
+        if seq % 100 == 99:
+            await asyncio.sleep(0)
+
+    await asyncio.wait_for(done.wait(), timeout=120)
+    elapsed = time.perf_counter() - start
+
+    bridge.running = False
+    mqtt_task.cancel()
+    try:
+        await mqtt_task
+    except asyncio.CancelledError:
+        pass
+    await broker.stop()
+
+    return {
+        "qos": qos,
+        "max_inflight": max_inflight,
+        "messages": messages,
+        "seconds": elapsed,
+        "messages_per_second": messages / elapsed,
+        "latency": percentiles(latencies),
+    }
+
+
+async def main():
+    """Run all benchmark cases."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the MQTT bridge publish path")
+    parser.add_argument("--messages", type=int, default=20000, help="Messages per case (default: 20000)")
+    parser.add_argument("--qos", type=int, nargs="+", default=[0, 1], help="QoS levels to test")
+    parser.add_argument("--inflight", type=int, nargs="+", default=[1, 20, 100], help="In-flight windows to test")
+    args = parser.parse_args()
+
+    results = []
+    for qos in args.qos:
+        for max_inflight in args.inflight:
+            results.append(await run_case(args.messages, qos, max_inflight))
+
+    print(json.dumps({"benchmark": "mqtt_publish", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Bridge publish loop microbenchmark
+
+Measures the CPU cost of turning one parsed reading into MQTT messages, from
+the discovery check through the per-device publisher, for each state mode.
+Messages go to an in-memory sink instead of the MQTT queue, so only the
+publish loop itself is timed. Output is JSON on stdout.
+"""
+
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from homeassistant_mqtt import HomeAssistantMQTT  # noqa: E402
+from teltonika_eye_scanner import TeltonikaEYEParser  # noqa: E402
+
+# Temperature, humidity, movement, angle, battery voltage and magnet
+SAMPLE_ADVERT = bytes.fromhex("01BF08B4120CCB0BFFC767")
+
+MODES = {
+    "per_value": {},
+    "compact": {"compact_state": True},
+    "msgpack": {"state_encoding": "msgpack"},
+    "raw": {"state_encoding": "raw"},
+}
+
+
+def make_readings(devices: int) -> List[Dict]:
+    """Return one parsed reading per simulated device."""
+    parser = TeltonikaEYEParser()
+    readings = []
+    for index in range(devices):
+        address = ":".join(f"{byte:02X}" for byte in (0x7C, 0xD9) + tuple(index.to_bytes(4, "big")))
+        readings.append({
+            "device": {"address": address, "name": f"EYE {index:05d}", "rssi": -60 - index % 30},
+            "data": parser.parse_manufacturer_data({TeltonikaEYEParser.TELTONIKA_COMPANY_ID: SAMPLE_ADVERT}),
+        })
+    return readings
+
+
+def run_mode(mode: str, readings: List[Dict], rounds: int) -> Dict:
+    """Time publishing every reading rounds times in one state mode."""
+    bridge = HomeAssistantMQTT(**MODES[mode])
+    for reading in readings:
+        bridge.scanner.raw_payloads[reading["device"]["address"]] = SAMPLE_ADVERT
+
+    sink = []
+    bridge._publish = lambda topic, payload, *args, **kwargs: sink.append((topic, payload))
+
+    # First pass builds the publishers and discovery payloads
+    for reading in readings:
+        bridge._publish_discovery_config(reading).publish(reading, bridge._publish)
+    messages_per_reading = (len(sink) - sum(
+        len(publisher.discovery_messages) for publisher in bridge._publishers.values()
+    )) / len(readings)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        sink.clear()
+        for reading in readings:
+            bridge._publish_discovery_config(reading).publish(reading, bridge._publish)
+    elapsed = time.perf_counter() - start
+
+    count = rounds * len(readings)
+    return {
+        "mode": mode,
+        "readings": count,
+        "messages_per_reading": messages_per_reading,
+        "us_per_reading": elapsed / count * 1e6,
+        "readings_per_second": count / elapsed,
+    }
+
+
+def main():
+    """Run the microbenchmark for each state mode."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the bridge's per-reading publish loop")
+    parser.add_argument("--devices", type=int, default=1000, help="Simulated devices (default: 1000)")
+    parser.add_argument("--rounds", type=int, default=20, help="Readings per device (default: 20)")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES),
+                        help="State modes to test (default: all)")
+    args = parser.parse_args()
+
+    readings = make_readings(args.devices)
+    results = []
+    for mode in args.modes:
+        try:
+            results.append(run_mode(mode, readings, args.rounds))
+        except RuntimeError as e:
+            results.append({"mode": mode, "skipped": str(e)})
+
+    print(json.dumps({"benchmark": "publish_loop", "devices": args.devices, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,10 +12,18 @@ import logging
 import signal
 import sys
 import time
-from datetime import datetime, timedelta
-from pathlib import Path
+from datetime import datetime
 from typing import Dict, List, Optional, Set
 
+from metrics_exporter import MetricsExporter
+from monitor_store import ReadingStore
+from output_writer import OutputWriter
+from rollup import RollupEngine
+from sensor_stats import SensorStats
+from sensor_timeouts import SensorTimeoutTracker
+from shm_state import SharedStateWriter
+import segment_archive
+from segment_archive import SegmentArchiver
 from teltonika_eye_scanner import TeltonikaEYEScanner
 
 
@@ -28,21 +36,71 @@ class ContinuousMonitor:
         scan_interval: float = 30.0,
         output_file: Optional[str] = None,
         max_log_size_mb: int = 100,
-        sensor_timeout_minutes: int = 10
+        sensor_timeout_minutes: int = 10,
+        fsync_interval: float = 60.0,
+        sqlite_db: Optional[str] = None,
+        retention_days: Optional[float] = None,
+        compress_rotated: Optional[str] = None,
+        archive_max_mb: Optional[int] = None,
+        archive_max_days: Optional[float] = None,
+        rollup_file: Optional[str] = None,
+        rollup_windows: Optional[List[int]] = None,
+        rollup_grace: float = 60.0,
+        spike_sigma: float = 4.0,
+        metrics_port: Optional[int] = None,
+        metrics_host: str = "0.0.0.0",
+        shm_name: Optional[str] = None
     ):
         self.scan_duration = scan_duration
         self.scan_interval = scan_interval
         self.output_file = output_file
         self.max_log_size_bytes = max_log_size_mb * 1024 * 1024
-        self.sensor_timeout = timedelta(minutes=sensor_timeout_minutes)
+        self.fsync_interval = fsync_interval
+        
+        # Optional SQLite store, written on a background thread
+        self.store = ReadingStore(sqlite_db, retention_days) if sqlite_db else None
+        
+        # Minute/hour aggregates, written to rollup_file and/or the SQLite store
+        self.rollup_file = rollup_file
+        self.rollup = None
+        if rollup_file or self.store is not None:
+            self.rollup = RollupEngine(rollup_windows or [60, 3600], rollup_grace)
+        
+        # Optional compression of rotated segments, on a background thread
+        self.archiver = None
+        if output_file and compress_rotated:
+            self.archiver = SegmentArchiver(
+                output_file,
+                compression=compress_rotated,
+                max_total_bytes=archive_max_mb * 1024 * 1024 if archive_max_mb else None,
+                max_age_days=archive_max_days
+            )
         
         self.logger = logging.getLogger(__name__)
         self.running = True
-        self.scanner = TeltonikaEYEScanner(scan_duration=scan_duration)
+        
+        # Output encoding and file I/O run on a writer thread, off the scan loop
+        self.writer = OutputWriter(
+            output_file,
+            max_size_bytes=self.max_log_size_bytes,
+            fsync_interval=fsync_interval,
+            rollup_file=rollup_file,
+            archiver=self.archiver,
+            logger=self.logger
+        )
+        
+        # Readings reach stdout through the writer thread, once per cycle
+        self.scanner = TeltonikaEYEScanner(scan_duration=scan_duration, output_format="none")
         
         # Track sensor states
         self.known_sensors: Dict[str, Dict] = {}
-        self.last_seen: Dict[str, datetime] = {}
+        self.timeouts = SensorTimeoutTracker(sensor_timeout_minutes * 60)
+        # Timestamp of each sensor's latest reading; scan() keeps returning
+        # the last reading of sensors that have gone quiet
+        self._reading_timestamps: Dict[str, str] = {}
+        
+        # Per-sensor running statistics and anomaly detection
+        self.sensor_stats = SensorStats(spike_sigma=spike_sigma)
         
         # Statistics
         self.stats = {
@@ -50,9 +108,21 @@ class ContinuousMonitor:
             "total_readings": 0,
             "unique_sensors": 0,
             "start_time": datetime.now(),
-            "errors": 0
+            "errors": 0,
+            "anomalies": 0
         }
         
+        # Optional Prometheus endpoint, served from the event loop in run()
+        self.metrics_port = metrics_port
+        self.metrics_host = metrics_host
+        self.metrics: Optional[MetricsExporter] = None
+        self._scan_histogram = None
+        if metrics_port:
+            self._setup_metrics()
+        
+        # Optional shared-memory table of each sensor's latest state
+        self.shared_state = SharedStateWriter(shm_name) if shm_name else None
+        
         # Setup signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
@@ -62,6 +132,26 @@ class ContinuousMonitor:
         self.logger.info(f"Received signal {signum}, shutting down gracefully...")
         self.running = False
     
+    def _setup_metrics(self):
+        """Register the monitor's metrics with a new exporter."""
+        self.metrics = MetricsExporter()
+        self.metrics.counter("scan_cycles_total", "Completed scan cycles", lambda: self.stats["scan_cycles"])
+        self.metrics.counter("readings_total", "Sensor readings processed", lambda: self.stats["total_readings"])
+        self.metrics.counter("errors_total", "Scan and storage errors", lambda: self.stats["errors"])
+        self.metrics.counter("anomalies_total", "Sensor anomalies detected", lambda: self.stats["anomalies"])
+        self.metrics.gauge("known_sensors", "Sensors seen since start", lambda: self.stats["unique_sensors"])
+        self.metrics.gauge("active_sensors", "Sensors seen within the timeout", lambda: self.timeouts.active_count)
+        self.metrics.gauge(
+            "output_queue_depth", "Cycles waiting for the writer thread", lambda: self.writer.queue_depth
+        )
+        self.metrics.counter(
+            "output_dropped_total", "Cycles dropped because the writer fell behind", lambda: self.writer.dropped
+        )
+        self._scan_histogram = self.metrics.histogram("scan_duration_seconds", "Duration of BLE scans")
+        self.scanner.decode_observer = self.metrics.histogram(
+            "decode_seconds", "Time to decode one advert; the count gives adverts decoded"
+        ).observe
+    
     def _setup_logging(self, log_file: Optional[str] = None):
         """Setup logging with rotation."""
         log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -83,24 +173,28 @@ class ContinuousMonitor:
         
         self.logger.setLevel(logging.INFO)
     
-    def _rotate_output_file(self):
-        """Rotate output file if it gets too large."""
-        if not self.output_file or not Path(self.output_file).exists():
-            return
-        
-        file_size = Path(self.output_file).stat().st_size
-        if file_size > self.max_log_size_bytes:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_name = f"{self.output_file}.{timestamp}"
-            Path(self.output_file).rename(backup_name)
-            self.logger.info(f"Rotated output file to {backup_name}")
+    def _is_new_reading(self, device_address: str, sensor_data: Dict) -> bool:
+        """Return True unless this is the same reading as the sensor's previous one."""
+        timestamp = sensor_data["data"]["timestamp"]
+        if self._reading_timestamps.get(device_address) == timestamp:
+            return False
+        self._reading_timestamps[device_address] = timestamp
+        return True
     
-    def _update_sensor_tracking(self, device_address: str, sensor_data: Dict):
-        """Update sensor tracking and statistics."""
+    def _update_sensor_tracking(self, device_address: str, sensor_data: Dict, new: bool = True):
+        """Update sensor tracking and statistics.
+        
+        new is False for a repeat of the sensor's previous reading, which
+        does not count as the sensor being seen again.
+        """
         now = datetime.now()
         
-        # Update last seen time
-        self.last_seen[device_address] = now
+        # Update last seen time, noting sensors that come back online
+        if new and self.timeouts.seen(device_address, time.monotonic()):
+            self.logger.info(
+                f"Sensor back online: {device_address} "
+                f"({self.known_sensors[device_address]['device_name']})"
+            )
         
         # Track unique sensors
         if device_address not in self.known_sensors:
@@ -115,40 +209,46 @@ class ContinuousMonitor:
         # Update reading count
         self.known_sensors[device_address]["reading_count"] += 1
         self.stats["total_readings"] += 1
+        
+        # Flag spikes, implausible jumps and stuck values
+        if not new:
+            return
+        for anomaly in self.sensor_stats.update(sensor_data):
+            self.stats["anomalies"] += 1
+            self.logger.warning(f"Sensor anomaly: {json.dumps(anomaly)}")
     
     def _check_sensor_timeouts(self):
-        """Check for sensors that haven't been seen recently."""
-        now = datetime.now()
-        timeout_sensors = []
+        """Warn once for each sensor that has stopped reporting."""
+        now = time.monotonic()
         
-        for address, last_time in self.last_seen.items():
-            if now - last_time > self.sensor_timeout:
-                timeout_sensors.append(address)
-        
-        for address in timeout_sensors:
+        for address, last_seen in self.timeouts.expire(now):
             sensor_info = self.known_sensors.get(address, {})
             device_name = sensor_info.get("device_name", "Unknown")
             self.logger.warning(
                 f"Sensor timeout: {address} ({device_name}) - "
-                f"last seen {(now - self.last_seen[address]).total_seconds():.0f}s ago"
+                f"last seen {now - last_seen:.0f}s ago"
             )
     
-    def _output_reading(self, reading: Dict):
-        """Output sensor reading to file and/or stdout."""
-        json_line = json.dumps(reading, separators=(',', ':'))
-        
-        # Always output to stdout for piping
-        print(json_line)
-        sys.stdout.flush()
+    def _output_readings(self, readings: List[Dict]):
+        """Hand a cycle's sensor readings to the writer thread for stdout and file output."""
+        if readings:
+            self.writer.submit(readings)
+    
+    def _output_rollups(self, records: List[Dict]):
+        """Send closed rollup windows to the rollup file and the database."""
+        if not records:
+            return
         
-        # Also write to file if specified
-        if self.output_file:
-            try:
-                with open(self.output_file, 'a') as f:
-                    f.write(json_line + '\n')
-                    f.flush()
-            except Exception as e:
-                self.logger.error(f"Failed to write to output file: {e}")
+        self.writer.submit_rollups(records)
+        if self.store is not None:
+            self.store.submit_rollups(records).add_done_callback(self._on_store_written)
+    
+    def _on_store_written(self, future):
+        """Log a failed database write (runs on the store's thread)."""
+        error = future.exception()
+        if error is not None:
+            self.stats["errors"] += 1
+            self.logger.error(f"Failed to write readings to database: {error}")
     
     def _print_status(self):
         """Print monitoring status."""
@@ -160,11 +260,9 @@ class ContinuousMonitor:
             "scan_cycles": self.stats["scan_cycles"],
             "total_readings": self.stats["total_readings"],
             "unique_sensors": self.stats["unique_sensors"],
-            "active_sensors": len([
-                addr for addr, last_time in self.last_seen.items()
-                if datetime.now() - last_time < self.sensor_timeout
-            ]),
+            "active_sensors": self.timeouts.active_count,
             "errors": self.stats["errors"],
+            "anomalies": self.stats["anomalies"],
             "next_scan_in": max(0, int(self.scan_interval - (time.time() % self.scan_interval)))
         }
         
@@ -176,17 +274,36 @@ class ContinuousMonitor:
             self.logger.debug(f"Starting scan cycle {self.stats['scan_cycles'] + 1}")
             
             # Perform scan
+            scan_start = time.monotonic()
             devices = await self.scanner.scan()
+            if self._scan_histogram is not None:
+                self._scan_histogram.observe(time.monotonic() - scan_start)
             
             # Process results
+            new_readings = []
             for device_data in devices:
                 device_address = device_data["device"]["address"]
                 
                 # Update tracking
-                self._update_sensor_tracking(device_address, device_data)
-                
-                # Output reading
-                self._output_reading(device_data)
+                new = self._is_new_reading(device_address, device_data)
+                if new:
+                    new_readings.append(device_data)
+                self._update_sensor_tracking(device_address, device_data, new)
+                if self.metrics is not None:
+                    self.metrics.update_sensor(device_data)
+                if self.shared_state is not None:
+                    self.shared_state.update(device_data)
+            
+            # Output readings
+            self._output_readings(devices)
+            if self.store is not None and devices:
+                self.store.submit(devices).add_done_callback(self._on_store_written)
+            
+            # Update rollups and emit the windows that have closed
+            if self.rollup is not None:
+                for device_data in new_readings:
+                    self.rollup.add(device_data)
+                self._output_rollups(self.rollup.advance(int(time.time() * 1000)))
             
             self.stats["scan_cycles"] += 1
             
@@ -205,32 +322,50 @@ class ContinuousMonitor:
         last_status_time = time.time()
         status_interval = 300  # Print status every 5 minutes
         
-        while self.running:
-            cycle_start = time.time()
-            
-            # Perform scan cycle
-            await self._scan_cycle()
-            
-            # Check for sensor timeouts
-            self._check_sensor_timeouts()
-            
-            # Rotate output file if needed
-            self._rotate_output_file()
-            
-            # Print status periodically
-            if time.time() - last_status_time > status_interval:
-                self._print_status()
-                last_status_time = time.time()
-            
-            # Calculate sleep time to maintain interval
-            cycle_duration = time.time() - cycle_start
-            sleep_time = max(0, self.scan_interval - cycle_duration)
-            
-            if sleep_time > 0:
-                self.logger.debug(f"Sleeping for {sleep_time:.1f}s until next scan")
-                await asyncio.sleep(sleep_time)
-            else:
-                self.logger.warning(f"Scan cycle took {cycle_duration:.1f}s, longer than interval {self.scan_interval}s")
+        # Compress segments a previous run rotated but did not get to
+        if self.archiver is not None:
+            self.archiver.submit_pending()
+        
+        if self.metrics is not None:
+            await self.metrics.start(self.metrics_host, self.metrics_port)
+        
+        try:
+            while self.running:
+                cycle_start = time.time()
+                
+                # Perform scan cycle
+                await self._scan_cycle()
+                
+                # Check for sensor timeouts
+                self._check_sensor_timeouts()
+                
+                # Print status periodically
+                if time.time() - last_status_time > status_interval:
+                    self._print_status()
+                    last_status_time = time.time()
+                
+                # Calculate sleep time to maintain interval
+                cycle_duration = time.time() - cycle_start
+                sleep_time = max(0, self.scan_interval - cycle_duration)
+                
+                if sleep_time > 0:
+                    self.logger.debug(f"Sleeping for {sleep_time:.1f}s until next scan")
+                    await asyncio.sleep(sleep_time)
+                else:
+                    self.logger.warning(f"Scan cycle took {cycle_duration:.1f}s, longer than interval {self.scan_interval}s")
+        finally:
+            # Make sure everything written reaches the disk
+            if self.rollup is not None:
+                self._output_rollups(self.rollup.flush())
+            self.writer.close()
+            if self.store is not None:
+                self.store.close()
+            if self.archiver is not None:
+                self.archiver.close()
+            if self.metrics is not None:
+                await self.metrics.stop()
+            if self.shared_state is not None:
+                self.shared_state.close()
         
         # Print final statistics
         self._print_final_stats()
@@ -246,6 +381,9 @@ class ContinuousMonitor:
             "total_readings": self.stats["total_readings"],
             "unique_sensors_discovered": self.stats["unique_sensors"],
             "total_errors": self.stats["errors"],
+            "total_anomalies": self.stats["anomalies"],
+            "output_batches_dropped": self.writer.dropped,
+            "late_readings_dropped": sum(self.rollup.late_dropped.values()) if self.rollup else 0,
             "average_readings_per_cycle": (
                 self.stats["total_readings"] / max(1, self.stats["scan_cycles"])
             )
@@ -296,6 +434,75 @@ async def main():
         default=10,
         help="Minutes before considering a sensor offline (default: 10)"
     )
+    parser.add_argument(
+        "--fsync-interval",
+        type=float,
+        default=60.0,
+        help="Seconds between syncing the output file to disk; 0 syncs every cycle (default: 60)"
+    )
+    parser.add_argument(
+        "--sqlite-db",
+        type=str,
+        help="Also store readings in this SQLite database (optional)"
+    )
+    parser.add_argument(
+        "--retention-days",
+        type=float,
+        help="Delete database readings older than this many days (default: keep all)"
+    )
+    parser.add_argument(
+        "--rollup-file",
+        type=str,
+        help="Write closed minute/hour min/max/mean windows to this JSONL file (optional)"
+    )
+    parser.add_argument(
+        "--rollup-windows",
+        type=int,
+        nargs="+",
+        default=[60, 3600],
+        help="Rollup window sizes in seconds (default: 60 3600)"
+    )
+    parser.add_argument(
+        "--rollup-grace",
+        type=float,
+        default=60.0,
+        help="Seconds a window stays open for late readings (default: 60)"
+    )
+    parser.add_argument(
+        "--spike-sigma",
+        type=float,
+        default=4.0,
+        help="Standard deviations from a sensor's recent average that count as a spike (default: 4.0)"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics on this port at /metrics (default: disabled)"
+    )
+    parser.add_argument(
+        "--metrics-host",
+        default="0.0.0.0",
+        help="Address to serve metrics on (default: 0.0.0.0)"
+    )
+    parser.add_argument(
+        "--shm-name",
+        help="Keep each sensor's latest state in this shared-memory table for local readers (default: disabled)"
+    )
+    parser.add_argument(
+        "--compress-rotated",
+        choices=["gzip", "zstd"],
+        help="Compress rotated output files in the background (zstd needs the zstandard package)"
+    )
+    parser.add_argument(
+        "--archive-max-mb",
+        type=int,
+        help="Delete the oldest compressed segments beyond this total size in MB (default: keep all)"
+    )
+    parser.add_argument(
+        "--archive-max-days",
+        type=float,
+        help="Delete compressed segments older than this many days (default: keep all)"
+    )
     parser.add_argument(
         "--verbose", "-v",
         action="store_true",
@@ -303,6 +510,8 @@ async def main():
     )
     
     args = parser.parse_args()
+    if args.compress_rotated == "zstd" and segment_archive.zstandard is None:
+        parser.error("--compress-rotated zstd requires the zstandard package (pip install zstandard)")
     
     # Create monitor
     monitor = ContinuousMonitor(
@@ -310,7 +519,20 @@ async def main():
         scan_interval=args.scan_interval,
         output_file=args.output_file,
         max_log_size_mb=args.max_log_size,
-        sensor_timeout_minutes=args.sensor_timeout
+        sensor_timeout_minutes=args.sensor_timeout,
+        fsync_interval=args.fsync_interval,
+        sqlite_db=args.sqlite_db,
+        retention_days=args.retention_days,
+        compress_rotated=args.compress_rotated,
+        archive_max_mb=args.archive_max_mb,
+        archive_max_days=args.archive_max_days,
+        rollup_file=args.rollup_file,
+        rollup_windows=args.rollup_windows,
+        rollup_grace=args.rollup_grace,
+        spike_sigma=args.spike_sigma,
+        metrics_port=args.metrics_port,
+        metrics_host=args.metrics_host,
+        shm_name=args.shm_name
     )
     
     # Setup logging
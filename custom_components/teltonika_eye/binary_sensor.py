@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import logging
+from typing import Any
 
 from homeassistant.components.binary_sensor import (
     BinarySensorDeviceClass,
@@ -27,12 +28,18 @@ async def async_setup_entry(
     """Set up Teltonika EYE binary sensor entities."""
     coordinator: TeltonikaEYECoordinator = hass.data[DOMAIN][config_entry.entry_id]
 
+    added_devices: set[str] = set()
+
     @callback
     def async_add_binary_sensor_entities():
         """Add binary sensor entities for discovered devices."""
         entities = []
         
         for device_address, device_data in coordinator.data.items():
+            # Create entities once per device; returning evicted devices reuse them
+            if device_address in added_devices:
+                continue
+            added_devices.add(device_address)
             sensors = device_data["data"]["sensors"]
             
             # Movement state binary sensor
@@ -59,12 +66,17 @@ async def async_setup_entry(
     async_add_binary_sensor_entities()
     
     # Listen for new devices
-    coordinator.async_add_listener(async_add_binary_sensor_entities)
+    config_entry.async_on_unload(
+        coordinator.async_add_listener(async_add_binary_sensor_entities)
+    )
 
 
 class TeltonikaEYEBinarySensorBase(CoordinatorEntity, BinarySensorEntity):
     """Base class for Teltonika EYE binary sensors."""
 
+    # Sensor key whose transitions update this entity immediately
+    _transition_sensor: str | None = None
+
     def __init__(
         self,
         coordinator: TeltonikaEYECoordinator,
@@ -97,12 +109,31 @@ class TeltonikaEYEBinarySensorBase(CoordinatorEntity, BinarySensorEntity):
         return (
             self.coordinator.last_update_success
             and self.device_address in self.coordinator.data
+            and self.coordinator.device_available(self.device_address)
         )
 
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to immediate state transitions."""
+        await super().async_added_to_hass()
+        if self._transition_sensor is not None:
+            self.async_on_remove(
+                self.coordinator.async_add_transition_listener(
+                    self.device_address, self._handle_transition
+                )
+            )
+
+    @callback
+    def _handle_transition(self, event_data: dict[str, Any]) -> None:
+        """Write the new state as soon as the transition is decoded."""
+        if event_data["sensor"] == self._transition_sensor:
+            self.async_write_ha_state()
+
 
 class TeltonikaEYEMovementSensor(TeltonikaEYEBinarySensorBase):
     """Movement detection binary sensor for Teltonika EYE."""
 
+    _transition_sensor = "movement"
+
     def __init__(self, coordinator: TeltonikaEYECoordinator, device_address: str) -> None:
         """Initialize the movement sensor."""
         super().__init__(coordinator, device_address, "movement_state")
@@ -124,6 +155,8 @@ class TeltonikaEYEMovementSensor(TeltonikaEYEBinarySensorBase):
 class TeltonikaEYEMagneticSensor(TeltonikaEYEBinarySensorBase):
     """Magnetic field detection binary sensor for Teltonika EYE."""
 
+    _transition_sensor = "magnetic"
+
     def __init__(self, coordinator: TeltonikaEYECoordinator, device_address: str) -> None:
         """Initialize the magnetic sensor."""
         super().__init__(coordinator, device_address, "magnetic_field")
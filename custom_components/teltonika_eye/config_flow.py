@@ -1,10 +1,34 @@
 """Config flow for Teltonika EYE Sensors integration."""
 from __future__ import annotations
 
+import re
+from typing import Any
+
+import voluptuous as vol
+
 from homeassistant import config_entries
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 
-from .const import DOMAIN
+from .const import (
+    CONF_AVAILABILITY_TIMEOUT,
+    CONF_DEVICE_FILTER,
+    CONF_EVICTION_TIMEOUT,
+    CONF_MIN_RSSI,
+    CONF_CONTINUOUS_SCANNING,
+    CONF_SCAN_DURATION,
+    CONF_SCAN_INTERVAL,
+    DEADBAND_OPTIONS,
+    DEFAULT_EVICTION_TIMEOUT,
+    DEFAULT_MIN_RSSI,
+    DEFAULT_CONTINUOUS_SCANNING,
+    DEFAULT_SCAN_DURATION,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+)
+from .coordinator import parse_device_filter
+
+MAC_ADDRESS_PATTERN = re.compile(r"^([0-9A-F]{2}:){5}[0-9A-F]{2}$")
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -23,4 +47,74 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 data={},
             )
 
-        return self.async_show_form(step_id="user")
\ No newline at end of file
+        return self.async_show_form(step_id="user")
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle scan, availability, deadband and filter options."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        """Manage the options."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            addresses = parse_device_filter(user_input.get(CONF_DEVICE_FILTER, ""))
+            if all(MAC_ADDRESS_PATTERN.match(address) for address in addresses):
+                user_input[CONF_DEVICE_FILTER] = ", ".join(sorted(addresses))
+                return self.async_create_entry(title="", data=user_input)
+            errors[CONF_DEVICE_FILTER] = "invalid_address"
+
+        options = {**self._entry.options, **(user_input or {})}
+
+        schema = {
+            vol.Required(
+                CONF_SCAN_INTERVAL,
+                default=options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+            ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+            vol.Required(
+                CONF_SCAN_DURATION,
+                default=options.get(CONF_SCAN_DURATION, DEFAULT_SCAN_DURATION),
+            ): vol.All(vol.Coerce(float), vol.Range(min=1, max=30)),
+            vol.Required(
+                CONF_CONTINUOUS_SCANNING,
+                default=options.get(CONF_CONTINUOUS_SCANNING, DEFAULT_CONTINUOUS_SCANNING),
+            ): bool,
+            vol.Required(
+                CONF_AVAILABILITY_TIMEOUT,
+                default=options.get(CONF_AVAILABILITY_TIMEOUT) or 0,
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+            vol.Required(
+                CONF_EVICTION_TIMEOUT,
+                default=options.get(CONF_EVICTION_TIMEOUT, DEFAULT_EVICTION_TIMEOUT),
+            ): vol.All(vol.Coerce(int), vol.Range(min=60, max=30 * 86400)),
+        }
+        for option in DEADBAND_OPTIONS.values():
+            schema[vol.Required(option, default=options.get(option, 0))] = vol.All(
+                vol.Coerce(float), vol.Range(min=0)
+            )
+        schema[vol.Optional(
+            CONF_DEVICE_FILTER,
+            default=options.get(CONF_DEVICE_FILTER, ""),
+        )] = str
+        schema[vol.Required(
+            CONF_MIN_RSSI,
+            default=options.get(CONF_MIN_RSSI, DEFAULT_MIN_RSSI),
+        )] = vol.All(vol.Coerce(int), vol.Range(min=-127, max=0))
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(schema),
+            errors=errors,
+        )
@@ -21,10 +21,46 @@ FLAG_BATTERY_VOLTAGE = 7
 # Default configuration
 DEFAULT_SCAN_DURATION = 5.0
 DEFAULT_SCAN_INTERVAL = 30
+DEFAULT_EVICTION_TIMEOUT = 86400
+DEFAULT_CONTINUOUS_SCANNING = False
+DEFAULT_MIN_RSSI = -127
+
+# Device availability tracking
+# When no availability timeout is configured, a device is considered
+# unavailable after this many of its observed advertising intervals.
+AVAILABILITY_INTERVAL_MULTIPLIER = 5
+# Smoothing factor for the per-device advertising interval estimate
+ADVERT_INTERVAL_SMOOTHING = 0.2
+# Upper bound on devices kept in memory; least recently seen are evicted first
+MAX_TRACKED_DEVICES = 1024
 
 # Device information
 MANUFACTURER = "Teltonika"
 MODEL = "EYE Sensor"
 
 # Entity names
-CONF_SCAN_DURATION = "scan_duration"
\ No newline at end of file
+CONF_SCAN_DURATION = "scan_duration"
+CONF_SCAN_INTERVAL = "scan_interval"
+CONF_CONTINUOUS_SCANNING = "continuous_scanning"
+CONF_AVAILABILITY_TIMEOUT = "availability_timeout"
+CONF_EVICTION_TIMEOUT = "eviction_timeout"
+CONF_DEVICE_FILTER = "device_filter"
+CONF_MIN_RSSI = "min_rssi"
+
+# Per-metric deadbands: sensor type -> option key. A sensor only writes a new
+# state when its value moves by at least the deadband.
+DEADBAND_OPTIONS = {
+    "temperature": "deadband_temperature",
+    "humidity": "deadband_humidity",
+    "battery_voltage": "deadband_battery_voltage",
+    "rssi": "deadband_rssi",
+}
+
+# Services
+SERVICE_IMPORT_HISTORY = "import_history"
+
+# Events
+EVENT_TRANSITION = "teltonika_eye_transition"
+
+# Sensors whose state transitions are reported immediately from the advert path
+TRANSITION_SENSORS = ("magnetic", "movement")
@@ -4,8 +4,9 @@ from __future__ import annotations
 import asyncio
 import logging
 import struct
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set
 
 from bleak import BleakScanner
 from bleak.backends.device import BLEDevice
@@ -15,7 +16,25 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .const import (
+    ADVERT_INTERVAL_SMOOTHING,
+    AVAILABILITY_INTERVAL_MULTIPLIER,
+    CONF_AVAILABILITY_TIMEOUT,
+    CONF_DEVICE_FILTER,
+    CONF_EVICTION_TIMEOUT,
+    CONF_MIN_RSSI,
+    CONF_CONTINUOUS_SCANNING,
+    CONF_SCAN_DURATION,
+    CONF_SCAN_INTERVAL,
+    DEADBAND_OPTIONS,
+    DEFAULT_EVICTION_TIMEOUT,
+    DEFAULT_MIN_RSSI,
+    DEFAULT_CONTINUOUS_SCANNING,
+    DEFAULT_SCAN_DURATION,
+    DEFAULT_SCAN_INTERVAL,
     DOMAIN,
+    EVENT_TRANSITION,
+    MAX_TRACKED_DEVICES,
+    TRANSITION_SENSORS,
     TELTONIKA_COMPANY_ID,
     PROTOCOL_VERSION,
     FLAG_TEMPERATURE,
@@ -27,6 +46,16 @@ from .const import (
     FLAG_LOW_BATTERY,
     FLAG_BATTERY_VOLTAGE,
 )
+from .metrics import CoordinatorMetrics
+
+
+def parse_device_filter(value: str) -> Set[str]:
+    """Parse a comma or whitespace separated list of device addresses."""
+    return {
+        address.strip().upper()
+        for address in value.replace(",", " ").split()
+        if address.strip()
+    }
 
 
 class TeltonikaEYECoordinator(DataUpdateCoordinator):
@@ -39,19 +68,111 @@ class TeltonikaEYECoordinator(DataUpdateCoordinator):
         name: str,
         update_interval: timedelta,
         scan_duration: float = 5.0,
+        availability_timeout: Optional[float] = None,
+        eviction_timeout: float = DEFAULT_EVICTION_TIMEOUT,
+        max_devices: int = MAX_TRACKED_DEVICES,
     ) -> None:
         """Initialize."""
         super().__init__(hass, logger, name=name, update_interval=update_interval)
         self.scan_duration = scan_duration
+        self.availability_timeout = availability_timeout
+        self.eviction_timeout = eviction_timeout
+        self.max_devices = max_devices
         self.devices: Dict[str, Dict[str, Any]] = {}
+        # Monotonic last-seen time per device, ordered least to most recently seen
+        self._last_seen: Dict[str, float] = {}
+        # Smoothed interval between consecutive sightings per device
+        self._advert_intervals: Dict[str, float] = {}
+        # Raw manufacturer payload of the last decoded advert per device
+        self._last_payloads: Dict[str, bytes] = {}
+        self.metrics = CoordinatorMetrics()
+        # Minimum change per sensor type before an entity writes a new state
+        self.deadbands: Dict[str, float] = {}
+        # Only these addresses are tracked when set
+        self.device_filter: Set[str] = set()
+        self.min_rssi = DEFAULT_MIN_RSSI
+        # Scanner left running between refreshes, adverts collected as they arrive
+        self._continuous_scanner: Optional[BleakScanner] = None
+        self._pending_devices: Dict[str, Dict[str, Any]] = {}
+        # Last state and transition count per device and transition sensor
+        self._transition_states: Dict[str, Dict[str, List[Any]]] = {}
+        self._transition_listeners: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+
+    async def async_apply_options(self, options: Mapping[str, Any]) -> None:
+        """Apply config entry options to the running coordinator in place."""
+        self.scan_duration = options.get(CONF_SCAN_DURATION, DEFAULT_SCAN_DURATION)
+        self.update_interval = timedelta(
+            seconds=options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+        )
+        self.availability_timeout = options.get(CONF_AVAILABILITY_TIMEOUT) or None
+        self.eviction_timeout = options.get(CONF_EVICTION_TIMEOUT, DEFAULT_EVICTION_TIMEOUT)
+        self.min_rssi = options.get(CONF_MIN_RSSI, DEFAULT_MIN_RSSI)
+        device_filter = parse_device_filter(options.get(CONF_DEVICE_FILTER, ""))
+        if device_filter != self.device_filter:
+            self.device_filter = device_filter
+            self._drop_filtered_devices()
+        self.deadbands = {
+            sensor_type: options[option]
+            for sensor_type, option in DEADBAND_OPTIONS.items()
+            if options.get(option)
+        }
+
+        # Periodic scans only hear adverts during the scan window, so transitions
+        # are only reported within a second with continuous scanning on
+        if options.get(CONF_CONTINUOUS_SCANNING, DEFAULT_CONTINUOUS_SCANNING):
+            await self.async_start_continuous_scanning()
+        else:
+            await self.async_stop_continuous_scanning()
+
+    async def async_start_continuous_scanning(self) -> None:
+        """Keep a scanner running and collect adverts between refreshes."""
+        if self._continuous_scanner is not None:
+            return
+
+        def detection_callback(device: BLEDevice, advertisement_data: AdvertisementData):
+            """Handle discovered device."""
+            if advertisement_data.manufacturer_data:
+                self._process_advertisement(device, advertisement_data, self._pending_devices)
+
+        scanner = BleakScanner(detection_callback=detection_callback)
+        await scanner.start()
+        self._continuous_scanner = scanner
+        self.logger.debug("Started continuous Teltonika EYE scanning")
+
+    async def async_stop_continuous_scanning(self) -> None:
+        """Stop the continuous scanner if it is running."""
+        scanner, self._continuous_scanner = self._continuous_scanner, None
+        if scanner is None:
+            return
+        try:
+            await scanner.stop()
+        except Exception as err:
+            self.logger.debug("Error stopping continuous scanner: %s", err)
+        self.logger.debug("Stopped continuous Teltonika EYE scanning")
+
+    async def async_shutdown(self) -> None:
+        """Stop scanning and cancel refreshes."""
+        await super().async_shutdown()
+        await self.async_stop_continuous_scanning()
 
     async def _async_update_data(self) -> Dict[str, Dict[str, Any]]:
         """Update data via library."""
+        if self._continuous_scanner is not None:
+            discovered_devices, self._pending_devices = self._pending_devices, {}
+            return self._commit_discovered(discovered_devices)
+
         try:
             return await self._scan_for_devices()
         except Exception as exception:
             raise UpdateFailed(f"Error communicating with API: {exception}") from exception
 
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners and record the fan-out time."""
+        start = time.perf_counter()
+        super().async_update_listeners()
+        self.metrics.update_fanout_time.observe(time.perf_counter() - start)
+
     async def _scan_for_devices(self) -> Dict[str, Dict[str, Any]]:
         """Scan for Teltonika EYE devices."""
         discovered_devices = {}
@@ -59,28 +180,242 @@ class TeltonikaEYECoordinator(DataUpdateCoordinator):
         def detection_callback(device: BLEDevice, advertisement_data: AdvertisementData):
             """Handle discovered device."""
             if advertisement_data.manufacturer_data:
-                parsed_data = self._parse_manufacturer_data(
-                    device, advertisement_data.manufacturer_data, advertisement_data.rssi
-                )
-                if parsed_data:
-                    discovered_devices[device.address] = parsed_data
+                self._process_advertisement(device, advertisement_data, discovered_devices)
 
         try:
+            scan_start = time.perf_counter()
             scanner = BleakScanner(detection_callback=detection_callback)
             await scanner.start()
             await asyncio.sleep(self.scan_duration)
             await scanner.stop()
-            
-            # Update our devices dict with new data
-            for address, data in discovered_devices.items():
-                self.devices[address] = data
-                
-            return self.devices
+            self.metrics.scan_duration.observe(time.perf_counter() - scan_start)
+
+            return self._commit_discovered(discovered_devices)
             
         except Exception as err:
             self.logger.error("Error during BLE scan: %s", err)
             raise UpdateFailed(f"Error during BLE scan: {err}") from err
 
+    def _commit_discovered(
+        self, discovered_devices: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Merge newly discovered readings into the device data and evict stale devices."""
+        # Update our devices dict with new data
+        for address, data in discovered_devices.items():
+            self.devices[address] = data
+
+        self._evict_stale_devices(time.monotonic())
+        self.metrics.devices_tracked = len(self.devices)
+
+        return self.devices
+
+    def _process_advertisement(
+        self,
+        device: BLEDevice,
+        advertisement_data: AdvertisementData,
+        discovered_devices: Dict[str, Dict[str, Any]],
+    ) -> None:
+        """Decode a single advertisement into discovered_devices."""
+        payload = advertisement_data.manufacturer_data.get(TELTONIKA_COMPANY_ID)
+        if payload is None:
+            return
+
+        metrics = self.metrics
+        metrics.adverts_received += 1
+        address = device.address
+
+        if self.device_filter and address.upper() not in self.device_filter:
+            return
+        if advertisement_data.rssi < self.min_rssi:
+            return
+
+        previous = discovered_devices.get(address) or self.devices.get(address)
+        if previous is not None and self._last_payloads.get(address) == payload:
+            # Same readings as the last advert, only the signal strength can differ
+            metrics.duplicate_adverts += 1
+            # previous may already be held by entities and diagnostics; don't change it
+            discovered_devices[address] = {
+                **previous,
+                "device": {**previous["device"], "rssi": advertisement_data.rssi},
+            }
+            self._record_sighting(address, time.monotonic())
+            return
+
+        decode_start = time.perf_counter()
+        parsed_data = self._parse_manufacturer_data(
+            device, advertisement_data.manufacturer_data, advertisement_data.rssi
+        )
+        metrics.decode_time.observe(time.perf_counter() - decode_start)
+        if not parsed_data:
+            return
+
+        metrics.adverts_decoded += 1
+        self._last_payloads[address] = payload
+        discovered_devices[address] = parsed_data
+        self._record_sighting(address, time.monotonic())
+        self._detect_transitions(address, parsed_data)
+
+    def _detect_transitions(self, address: str, parsed_data: Dict[str, Any]) -> None:
+        """Fire events for magnet and movement state changes as soon as they are decoded.
+
+        This runs in the advert path, so listeners are notified without waiting
+        for the next coordinator refresh.
+        """
+        sensors = parsed_data["data"]["sensors"]
+        states = self._transition_states.setdefault(address, {})
+        transitions = []
+
+        for sensor_type in TRANSITION_SENSORS:
+            if sensor_type not in sensors:
+                continue
+            state = sensors[sensor_type]["state"]
+            tracked = states.get(sensor_type)
+            if tracked is None:
+                states[sensor_type] = [state, 0]
+                continue
+            if tracked[0] == state:
+                continue
+
+            tracked[1] += 1
+            transitions.append({
+                "address": address,
+                "name": parsed_data["device"]["name"],
+                "sensor": sensor_type,
+                "from": tracked[0],
+                "to": state,
+                "timestamp": parsed_data["data"]["timestamp"],
+                "count": tracked[1],
+            })
+            tracked[0] = state
+
+        if not transitions:
+            return
+
+        # Make the new state visible to entities before notifying them
+        self.devices[address] = parsed_data
+        listeners = self._transition_listeners.get(address, ())
+        for event_data in transitions:
+            self.hass.bus.async_fire(EVENT_TRANSITION, event_data)
+            for listener in list(listeners):
+                listener(event_data)
+
+    @callback
+    def async_add_transition_listener(
+        self, address: str, update_callback: Callable[[Dict[str, Any]], None]
+    ) -> Callable[[], None]:
+        """Listen for state transitions of one device. Returns a remove function."""
+        listeners = self._transition_listeners.setdefault(address, [])
+        listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            listeners.remove(update_callback)
+            if not listeners:
+                self._transition_listeners.pop(address, None)
+
+        return remove_listener
+
+    def _record_sighting(self, address: str, now: float) -> None:
+        """Record an advertisement from a device and update its interval estimate."""
+        previous = self._last_seen.pop(address, None)
+        # Re-insert so the dict stays ordered from least to most recently seen
+        self._last_seen[address] = now
+
+        if previous is not None:
+            gap = now - previous
+            interval = self._advert_intervals.get(address)
+            if interval is None:
+                self._advert_intervals[address] = gap
+            else:
+                self._advert_intervals[address] = interval + ADVERT_INTERVAL_SMOOTHING * (gap - interval)
+
+    def _evict_stale_devices(self, now: float) -> None:
+        """Drop devices not seen within the eviction timeout from memory.
+
+        Only in-memory state is removed; entity and device registry entries are
+        kept so a returning device picks up its existing entities again.
+        """
+        stale = []
+        remaining = len(self._last_seen)
+        for address, last_seen in self._last_seen.items():
+            if now - last_seen <= self.eviction_timeout and remaining <= self.max_devices:
+                break
+            stale.append(address)
+            remaining -= 1
+
+        for address in stale:
+            self._forget_device(address)
+
+        if stale:
+            self.logger.debug("Evicted %d stale Teltonika EYE devices", len(stale))
+
+    def _drop_filtered_devices(self) -> None:
+        """Drop devices the device filter no longer includes from memory."""
+        if not self.device_filter:
+            return
+        excluded = [
+            address
+            for address in {*self.devices, *self._last_seen, *self._pending_devices}
+            if address not in self.device_filter
+        ]
+        for address in excluded:
+            self._forget_device(address)
+            self._pending_devices.pop(address, None)
+
+        if excluded:
+            self.metrics.devices_tracked = len(self.devices)
+            self.logger.debug("Dropped %d Teltonika EYE devices excluded by the device filter", len(excluded))
+            if self.data is not None:
+                # Entities of dropped devices become unavailable
+                self.async_update_listeners()
+
+    def _forget_device(self, address: str) -> None:
+        """Remove a device's in-memory state."""
+        self.devices.pop(address, None)
+        self._last_seen.pop(address, None)
+        self._advert_intervals.pop(address, None)
+        self._last_payloads.pop(address, None)
+        self._transition_states.pop(address, None)
+
+    def availability_timeout_for(self, address: str) -> float:
+        """Return the availability timeout in seconds for a device.
+
+        Uses the configured timeout if set, otherwise a multiple of the device's
+        observed advertising interval, never less than two scan cycles.
+        """
+        if self.availability_timeout:
+            return self.availability_timeout
+
+        minimum = self.scan_duration
+        if self.update_interval is not None:
+            minimum += 2 * self.update_interval.total_seconds()
+
+        interval = self._advert_intervals.get(address)
+        if interval is None:
+            return minimum
+        return max(minimum, AVAILABILITY_INTERVAL_MULTIPLIER * interval)
+
+    def device_available(self, address: str) -> bool:
+        """Return True if the device has been seen within its availability timeout."""
+        last_seen = self._last_seen.get(address)
+        if last_seen is None:
+            return False
+        return time.monotonic() - last_seen <= self.availability_timeout_for(address)
+
+    def device_diagnostics(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-device tracking state for diagnostics."""
+        now = time.monotonic()
+        return {
+            address: {
+                "last_seen_seconds_ago": round(now - last_seen, 1),
+                "advert_interval": self._advert_intervals.get(address),
+                "availability_timeout": self.availability_timeout_for(address),
+                "available": self.device_available(address),
+                "rssi": self.devices.get(address, {}).get("device", {}).get("rssi"),
+            }
+            for address, last_seen in self._last_seen.items()
+        }
+
     def _parse_manufacturer_data(
         self, device: BLEDevice, manufacturer_data: Dict[int, bytes], rssi: int
     ) -> Optional[Dict[str, Any]]:
@@ -0,0 +1,30 @@
+"""Diagnostics support for Teltonika EYE Sensors."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import TeltonikaEYECoordinator
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: TeltonikaEYECoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    return {
+        "options": dict(entry.options),
+        "scan_duration": coordinator.scan_duration,
+        "update_interval": (
+            coordinator.update_interval.total_seconds()
+            if coordinator.update_interval
+            else None
+        ),
+        "last_update_success": coordinator.last_update_success,
+        "metrics": coordinator.metrics.as_dict(),
+        "devices": coordinator.device_diagnostics(),
+    }
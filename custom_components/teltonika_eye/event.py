@@ -0,0 +1,145 @@
+"""Support for Teltonika EYE transition event entities."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.components.event import EventDeviceClass, EventEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN, MANUFACTURER, MODEL
+from .coordinator import TeltonikaEYECoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Sensor state -> event type fired on entering that state
+MAGNETIC_EVENT_TYPES = {"open": "opened", "closed": "closed"}
+MOVEMENT_EVENT_TYPES = {"moving": "started", "stationary": "stopped"}
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up Teltonika EYE event entities."""
+    coordinator: TeltonikaEYECoordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    added_devices: set[str] = set()
+
+    @callback
+    def async_add_event_entities():
+        """Add event entities for discovered devices."""
+        entities = []
+
+        for device_address, device_data in coordinator.data.items():
+            # Create entities once per device; returning evicted devices reuse them
+            if device_address in added_devices:
+                continue
+            added_devices.add(device_address)
+            sensors = device_data["data"]["sensors"]
+
+            if "magnetic" in sensors:
+                entities.append(
+                    TeltonikaEYEDoorEvent(coordinator, device_address)
+                )
+
+            if "movement" in sensors:
+                entities.append(
+                    TeltonikaEYEMovementEvent(coordinator, device_address)
+                )
+
+        if entities:
+            async_add_entities(entities)
+
+    # Add entities for currently discovered devices
+    async_add_event_entities()
+
+    # Listen for new devices
+    config_entry.async_on_unload(
+        coordinator.async_add_listener(async_add_event_entities)
+    )
+
+
+class TeltonikaEYEEventBase(EventEntity):
+    """Base class for Teltonika EYE transition events.
+
+    Events are fired straight from the advert path through the coordinator's
+    transition listeners, independent of the coordinator refresh.
+    """
+
+    _attr_should_poll = False
+
+    def __init__(
+        self,
+        coordinator: TeltonikaEYECoordinator,
+        device_address: str,
+        sensor_type: str,
+        name: str,
+        event_types: dict[str, str],
+    ) -> None:
+        """Initialize the event entity."""
+        self.coordinator = coordinator
+        self.device_address = device_address
+        self.sensor_type = sensor_type
+        self._event_types = event_types
+        self._attr_event_types = list(event_types.values())
+
+        device_data = coordinator.data.get(device_address, {})
+        device_info = device_data.get("device", {})
+        device_name = device_info.get("name", f"Teltonika EYE {device_address[-8:].replace(':', '')}")
+
+        self._attr_unique_id = f"{device_address}_{sensor_type}_event"
+        self._attr_name = f"{device_name} {name}"
+
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, device_address)},
+            name=device_name,
+            manufacturer=MANUFACTURER,
+            model=MODEL,
+            sw_version=str(device_data.get("data", {}).get("protocol_version", 1)),
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to transitions of this device."""
+        self.async_on_remove(
+            self.coordinator.async_add_transition_listener(
+                self.device_address, self._handle_transition
+            )
+        )
+
+    @callback
+    def _handle_transition(self, event_data: dict[str, Any]) -> None:
+        """Trigger the event for a matching transition."""
+        if event_data["sensor"] != self.sensor_type:
+            return
+        self._trigger_event(
+            self._event_types[event_data["to"]],
+            {
+                "previous_state": event_data["from"],
+                "transition_time": event_data["timestamp"],
+                "transition_count": event_data["count"],
+            },
+        )
+        self.async_write_ha_state()
+
+
+class TeltonikaEYEDoorEvent(TeltonikaEYEEventBase):
+    """Door/window open and close events for Teltonika EYE."""
+
+    def __init__(self, coordinator: TeltonikaEYECoordinator, device_address: str) -> None:
+        """Initialize the door event."""
+        super().__init__(coordinator, device_address, "magnetic", "Door", MAGNETIC_EVENT_TYPES)
+        self._attr_icon = "mdi:door"
+
+
+class TeltonikaEYEMovementEvent(TeltonikaEYEEventBase):
+    """Movement start and stop events for Teltonika EYE."""
+
+    def __init__(self, coordinator: TeltonikaEYECoordinator, device_address: str) -> None:
+        """Initialize the movement event."""
+        super().__init__(coordinator, device_address, "movement", "Movement", MOVEMENT_EVENT_TYPES)
+        self._attr_device_class = EventDeviceClass.MOTION
@@ -0,0 +1,164 @@
+"""Backfill long-term statistics from recorded sensor history files."""
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    async_import_statistics,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# Sensor entity type -> (sensors key, value key, unit); None reads device RSSI
+HISTORY_METRICS: Dict[str, Tuple[str | None, str, str]] = {
+    "temperature": ("temperature", "value", "°C"),
+    "humidity": ("humidity", "value", "%"),
+    "battery_voltage": ("battery_voltage", "value", "V"),
+    "pitch": ("angle", "pitch", "°"),
+    "roll": ("angle", "roll", "°"),
+    "rssi": (None, "rssi", "dBm"),
+}
+
+# Hourly aggregate: [count, total, minimum, maximum]
+HourlyBuckets = Dict[str, List[float]]
+
+
+def _hour_key(timestamp: str) -> str | None:
+    """Return the UTC hour of an ISO timestamp as 'YYYY-MM-DDTHH'."""
+    # Monitor output is always UTC with a trailing Z, so the hour is a prefix
+    if timestamp.endswith("Z") and len(timestamp) >= 13:
+        return timestamp[:13]
+    try:
+        parsed = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.strftime("%Y-%m-%dT%H")
+
+
+def aggregate_history_file(
+    path: str,
+) -> Tuple[Dict[Tuple[str, str], HourlyBuckets], Dict[str, str]]:
+    """Stream a JSONL history file into hourly min/max/mean per sensor.
+
+    Returns the aggregates keyed by (device address, metric) and the last
+    seen device name per address. Runs in an executor; memory grows with
+    the number of sensor-hours, not with the number of readings. Compressed
+    segments from the monitor (.gz) are read directly.
+    """
+    series: Dict[Tuple[str, str], HourlyBuckets] = {}
+    names: Dict[str, str] = {}
+
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                reading = json.loads(line)
+                device = reading["device"]
+                data = reading["data"]
+                hour = _hour_key(data["timestamp"])
+            except (ValueError, KeyError, TypeError):
+                continue
+            if hour is None:
+                continue
+
+            address = device["address"]
+            names[address] = device.get("name") or names.get(address, "")
+            sensors = data.get("sensors", {})
+
+            for metric, (sensor_key, value_key, _unit) in HISTORY_METRICS.items():
+                source = device if sensor_key is None else sensors.get(sensor_key)
+                if not source:
+                    continue
+                value = source.get(value_key)
+                if value is None:
+                    continue
+
+                buckets = series.get((address, metric))
+                if buckets is None:
+                    buckets = series[(address, metric)] = {}
+                bucket = buckets.get(hour)
+                if bucket is None:
+                    buckets[hour] = [1, value, value, value]
+                else:
+                    bucket[0] += 1
+                    bucket[1] += value
+                    if value < bucket[2]:
+                        bucket[2] = value
+                    if value > bucket[3]:
+                        bucket[3] = value
+
+    return series, names
+
+
+async def async_import_history(hass: HomeAssistant, path: str) -> int:
+    """Import a history file into long-term statistics.
+
+    Series belonging to an existing sensor entity are imported into that
+    entity's statistics; others are added as external statistics. Returns
+    the number of hourly statistics rows imported.
+    """
+    if not hass.config.is_allowed_path(path):
+        raise HomeAssistantError(f"Path is not allowed: {path}")
+
+    try:
+        series, names = await hass.async_add_executor_job(aggregate_history_file, path)
+    except OSError as err:
+        raise HomeAssistantError(f"Unable to read history file {path}: {err}") from err
+
+    registry = er.async_get(hass)
+    imported = 0
+
+    for (address, metric), buckets in series.items():
+        statistics = [
+            StatisticData(
+                start=datetime.strptime(hour, "%Y-%m-%dT%H").replace(tzinfo=timezone.utc),
+                mean=total / count,
+                min=minimum,
+                max=maximum,
+            )
+            for hour, (count, total, minimum, maximum) in sorted(buckets.items())
+        ]
+        name = f"{names.get(address) or address} {metric.replace('_', ' ').title()}"
+        unit = HISTORY_METRICS[metric][2]
+
+        entity_id = registry.async_get_entity_id("sensor", DOMAIN, f"{address}_{metric}")
+        if entity_id is not None:
+            metadata = StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=name,
+                source="recorder",
+                statistic_id=entity_id,
+                unit_of_measurement=unit,
+            )
+            async_import_statistics(hass, metadata, statistics)
+        else:
+            metadata = StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=name,
+                source=DOMAIN,
+                statistic_id=f"{DOMAIN}:{address.replace(':', '').lower()}_{metric}",
+                unit_of_measurement=unit,
+            )
+            async_add_external_statistics(hass, metadata, statistics)
+
+        imported += len(statistics)
+
+    _LOGGER.info(
+        "Imported %d hourly statistics for %d series from %s", imported, len(series), path
+    )
+    return imported
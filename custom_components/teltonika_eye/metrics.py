@@ -0,0 +1,94 @@
+"""Pipeline performance metrics for the Teltonika EYE coordinator."""
+from __future__ import annotations
+
+import bisect
+from typing import Any, Dict, Sequence
+
+# Histogram bucket upper bounds in seconds (10 µs .. 30 s)
+TIMING_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class TimingHistogram:
+    """Fixed-bucket histogram of durations in seconds."""
+
+    __slots__ = ("buckets", "counts", "count", "total", "max", "last")
+
+    def __init__(self, buckets: Sequence[float] = TIMING_BUCKETS) -> None:
+        """Initialize an empty histogram."""
+        self.buckets = tuple(buckets)
+        # One extra slot for values above the largest bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record a duration."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.last = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        """Return the mean of all recorded durations."""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, quantile: float) -> float:
+        """Return the bucket upper bound containing the given quantile."""
+        if not self.count:
+            return 0.0
+        target = quantile * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                if index < len(self.buckets):
+                    return min(self.buckets[index], self.max)
+                break
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return a summary suitable for diagnostics and state attributes."""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "last": self.last,
+            "max": self.max,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+        }
+
+
+class CoordinatorMetrics:
+    """Counters and timing histograms for the advert-to-entity pipeline."""
+
+    def __init__(self) -> None:
+        """Initialize all counters at zero."""
+        self.adverts_received = 0
+        self.adverts_decoded = 0
+        self.duplicate_adverts = 0
+        self.devices_tracked = 0
+        self.decode_time = TimingHistogram()
+        self.scan_duration = TimingHistogram()
+        self.update_fanout_time = TimingHistogram()
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return all metrics as a plain dictionary."""
+        return {
+            "adverts_received": self.adverts_received,
+            "adverts_decoded": self.adverts_decoded,
+            "duplicate_adverts": self.duplicate_adverts,
+            "devices_tracked": self.devices_tracked,
+            "decode_time": self.decode_time.as_dict(),
+            "scan_duration": self.scan_duration.as_dict(),
+            "update_fanout_time": self.update_fanout_time.as_dict(),
+        }
@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+from typing import Any, Callable
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -15,17 +15,52 @@ from homeassistant.const import (
     UnitOfTemperature,
     UnitOfElectricPotential,
     SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
+    UnitOfTime,
 )
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN, MANUFACTURER, MODEL
 from .coordinator import TeltonikaEYECoordinator
+from .metrics import CoordinatorMetrics, TimingHistogram
 
 _LOGGER = logging.getLogger(__name__)
 
+# Hub diagnostic sensors: key -> (name, unit, state class, value function)
+HUB_SENSORS: dict[str, tuple[str, str | None, SensorStateClass, Callable[[CoordinatorMetrics], Any]]] = {
+    "adverts_received": (
+        "Adverts Received", None, SensorStateClass.TOTAL_INCREASING,
+        lambda metrics: metrics.adverts_received,
+    ),
+    "adverts_decoded": (
+        "Adverts Decoded", None, SensorStateClass.TOTAL_INCREASING,
+        lambda metrics: metrics.adverts_decoded,
+    ),
+    "duplicate_adverts": (
+        "Duplicate Adverts", None, SensorStateClass.TOTAL_INCREASING,
+        lambda metrics: metrics.duplicate_adverts,
+    ),
+    "decode_time": (
+        "Decode Time", UnitOfTime.MICROSECONDS, SensorStateClass.MEASUREMENT,
+        lambda metrics: round(metrics.decode_time.mean * 1_000_000, 1),
+    ),
+    "scan_duration": (
+        "Scan Duration", UnitOfTime.SECONDS, SensorStateClass.MEASUREMENT,
+        lambda metrics: round(metrics.scan_duration.last, 3),
+    ),
+    "update_fanout_time": (
+        "Update Fan-out Time", UnitOfTime.MILLISECONDS, SensorStateClass.MEASUREMENT,
+        lambda metrics: round(metrics.update_fanout_time.last * 1000, 2),
+    ),
+    "devices_tracked": (
+        "Devices Tracked", None, SensorStateClass.MEASUREMENT,
+        lambda metrics: metrics.devices_tracked,
+    ),
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -35,12 +70,18 @@ async def async_setup_entry(
     """Set up Teltonika EYE sensor entities."""
     coordinator: TeltonikaEYECoordinator = hass.data[DOMAIN][entry.entry_id]
 
+    added_devices: set[str] = set()
+
     @callback
     def async_add_sensor_entities():
         """Add sensor entities for discovered devices."""
         entities = []
         
         for device_address, device_data in coordinator.data.items():
+            # Create entities once per device; returning evicted devices reuse them
+            if device_address in added_devices:
+                continue
+            added_devices.add(device_address)
             sensors = device_data["data"]["sensors"]
             
             # Temperature sensor
@@ -84,16 +125,27 @@ async def async_setup_entry(
         if entities:
             async_add_entities(entities)
 
+    # Pipeline diagnostics on the hub device
+    async_add_entities(
+        TeltonikaEYEHubSensor(coordinator, entry, key) for key in HUB_SENSORS
+    )
+
     # Add entities for currently discovered devices
     async_add_sensor_entities()
     
     # Listen for new devices
-    coordinator.async_add_listener(async_add_sensor_entities)
+    entry.async_on_unload(
+        coordinator.async_add_listener(async_add_sensor_entities)
+    )
 
 
 class TeltonikaEYESensorBase(CoordinatorEntity, SensorEntity):
     """Base class for Teltonika EYE sensors."""
 
+    # Last value and availability written to the state machine
+    _written_value: Any = None
+    _written_available: bool | None = None
+
     def __init__(
         self,
         coordinator: TeltonikaEYECoordinator,
@@ -126,8 +178,29 @@ class TeltonikaEYESensorBase(CoordinatorEntity, SensorEntity):
         return (
             self.coordinator.last_update_success
             and self.device_address in self.coordinator.data
+            and self.coordinator.device_available(self.device_address)
         )
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state unless the value moved less than the configured deadband."""
+        value = self.native_value
+        available = self.available
+        deadband = self.coordinator.deadbands.get(self.sensor_type)
+
+        if (
+            deadband
+            and available == self._written_available
+            and value is not None
+            and self._written_value is not None
+            and abs(value - self._written_value) < deadband
+        ):
+            return
+
+        self._written_value = value
+        self._written_available = available
+        self.async_write_ha_state()
+
 
 class TeltonikaEYETemperatureSensor(TeltonikaEYESensorBase):
     """Temperature sensor for Teltonika EYE."""
@@ -278,4 +351,53 @@ class TeltonikaEYERSSISensor(TeltonikaEYESensorBase):
             return None
         
         device_data = self.coordinator.data[self.device_address]["device"]
-        return device_data.get("rssi")
\ No newline at end of file
+        return device_data.get("rssi")
+
+
+class TeltonikaEYEHubSensor(CoordinatorEntity, SensorEntity):
+    """Pipeline diagnostic sensor on the Teltonika EYE hub device."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        coordinator: TeltonikaEYECoordinator,
+        entry: ConfigEntry,
+        key: str,
+    ) -> None:
+        """Initialize the hub sensor."""
+        super().__init__(coordinator)
+        self.key = key
+        name, unit, state_class, self._value_fn = HUB_SENSORS[key]
+
+        self._attr_unique_id = f"{entry.entry_id}_{key}"
+        self._attr_name = f"Teltonika EYE Hub {name}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_state_class = state_class
+        if unit is not None:
+            self._attr_device_class = SensorDeviceClass.DURATION
+
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry.entry_id)},
+            name="Teltonika EYE Hub",
+            manufacturer=MANUFACTURER,
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return True, diagnostics stay readable even when scans fail."""
+        return True
+
+    @property
+    def native_value(self) -> Any:
+        """Return the current metric value."""
+        return self._value_fn(self.coordinator.metrics)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return histogram percentiles for timing metrics."""
+        metric = getattr(self.coordinator.metrics, self.key)
+        if isinstance(metric, TimingHistogram):
+            return metric.as_dict()
+        return None
\ No newline at end of file
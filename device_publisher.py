@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Per-device state publisher for the MQTT bridge
+
+A DevicePublisher is built once per device when its discovery configuration
+is published. It holds the device's topic strings, the value extractors for
+the sensors the device reports, and the state encoder, so publishing a
+reading is a loop over prepared (topic, extractor) pairs without string
+formatting or per-sensor checks. A new publisher is built when the device's
+capabilities change.
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import state_codec
+
+# Value published per reading: key (topic suffix and compact state key),
+# sensor it needs (None: always present) and extractor from the reading
+FIELDS: List[Tuple[str, Optional[str], Callable[[Dict[str, Any]], Any]]] = [
+    ("temperature", "temperature", lambda reading: reading["data"]["sensors"]["temperature"]["value"]),
+    ("humidity", "humidity", lambda reading: reading["data"]["sensors"]["humidity"]["value"]),
+    ("battery", "battery_voltage", lambda reading: reading["data"]["sensors"]["battery_voltage"]["value"]),
+    ("movement_count", "movement", lambda reading: reading["data"]["sensors"]["movement"]["count"]),
+    ("movement_state", "movement",
+     lambda reading: "ON" if reading["data"]["sensors"]["movement"]["state"] == "moving" else "OFF"),
+    ("magnetic", "magnetic",
+     lambda reading: "true" if reading["data"]["sensors"]["magnetic"]["detected"] else "false"),
+    ("pitch", "angle", lambda reading: reading["data"]["sensors"]["angle"]["pitch"]),
+    ("roll", "angle", lambda reading: reading["data"]["sensors"]["angle"]["roll"]),
+    ("rssi", None, lambda reading: reading["device"]["rssi"]),
+    ("low_battery", None, lambda reading: "true" if reading["data"]["battery"]["low"] else "false"),
+]
+
+encode_compact = json.JSONEncoder(separators=(",", ":")).encode
+encode_json = json.JSONEncoder().encode
+
+
+class DevicePublisher:
+    """Prepared topics, extractors and encoders for one device."""
+
+    __slots__ = (
+        "address", "device_id", "sensor_keys", "protocol_version", "advertised_name",
+        "discovery_messages", "compact_state", "state_topic", "fields",
+        "encoded_state_topic", "encode_state",
+    )
+
+    def __init__(
+        self,
+        device_id: str,
+        device_data: Dict[str, Any],
+        discovery_messages: List[Tuple[str, bytes]],
+        compact_state: bool = False,
+        state_encoding: str = "json",
+        raw_payloads: Optional[Dict[str, bytes]] = None
+    ):
+        self.address = device_data["device"]["address"]
+        self.device_id = device_id
+        sensors = device_data["data"]["sensors"]
+
+        # What the discovery configuration was built from
+        self.sensor_keys = frozenset(sensors)
+        self.protocol_version = device_data["data"]["protocol_version"]
+        self.advertised_name = device_data["device"].get("name")
+        self.discovery_messages = discovery_messages
+
+        self.compact_state = compact_state
+        self.state_topic = f"teltonika_eye/{device_id}/state"
+
+        # (topic or compact key, extractor) for the values this device reports
+        self.fields = [
+            (key if compact_state else f"teltonika_eye/{device_id}/{key}", extract)
+            for key, sensor, extract in FIELDS
+            if sensor is None or sensor in sensors
+        ]
+
+        # Full state document: JSON on the state topic, or a binary encoding
+        if state_encoding == "json":
+            self.encoded_state_topic = None if compact_state else self.state_topic
+            self.encode_state = encode_json
+        else:
+            self.encoded_state_topic = f"{self.state_topic}/{state_encoding}"
+            if state_encoding == "raw":
+                address = self.address
+                self.encode_state = lambda reading: (
+                    state_codec.encode_state("raw", reading, raw_payloads[address])
+                    if address in raw_payloads else None
+                )
+            else:
+                self.encode_state = lambda reading: state_codec.encode_state(state_encoding, reading)
+
+    def matches(self, device_data: Dict[str, Any]) -> bool:
+        """Return True if a reading has the capabilities this publisher was built for."""
+        return (
+            device_data["data"]["sensors"].keys() == self.sensor_keys
+            and device_data["data"]["protocol_version"] == self.protocol_version
+            and device_data["device"].get("name") == self.advertised_name
+        )
+
+    def publish(self, device_data: Dict[str, Any], publish: Callable[[str, Any], None]):
+        """Publish a reading through publish(topic, payload)."""
+        if self.compact_state:
+            state = {"timestamp": device_data["data"]["timestamp"]}
+            for key, extract in self.fields:
+                state[key] = extract(device_data)
+            publish(self.state_topic, encode_compact(state))
+        else:
+            for topic, extract in self.fields:
+                publish(topic, extract(device_data))
+
+        if self.encoded_state_topic is not None:
+            payload = self.encode_state(device_data)
+            if payload is not None:
+                publish(self.encoded_state_topic, payload)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Lease-based ownership election between cooperating MQTT bridges
+
+Several bridges in one building hear the same sensors. Each bridge announces
+the devices it hears, with their smoothed RSSI, on a shared MQTT topic. Every
+bridge runs the same election over those announcements, so they agree on a
+single owner per device without a central server. Only the owner publishes
+that device's readings.
+
+The owner is the gateway with the strongest signal. A gateway that already
+owns a device keeps it until another gateway is better by more than the
+hysteresis margin, so ownership does not flap between gateways at similar
+RSSI. Announcements are only valid for their lease, measured on the
+receiving gateway's clock. A gateway stops announcing a device it has not
+heard for a lease, so ownership fails over when the owner stops hearing the
+device, and when the owner itself goes away.
+"""
+
+import math
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+# Smoothing factor for per-device RSSI
+RSSI_SMOOTHING = 0.3
+
+
+def _is_number(value: Any) -> bool:
+    """Return True for a finite int or float (bool excluded)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+class GatewayElection:
+    """Device ownership election state for one gateway."""
+
+    def __init__(self, gateway_id: str, lease: float = 30.0, hysteresis: float = 5.0):
+        self.gateway_id = gateway_id
+        self.lease = lease
+        self.hysteresis = hysteresis
+
+        # Device id -> (smoothed RSSI, last heard) as seen by this gateway
+        self._heard: Dict[str, Tuple[float, float]] = {}
+        # Peer gateway id -> (lease expiry on our clock, device id -> RSSI, claimed device ids)
+        self._peers: Dict[str, Tuple[float, Dict[str, float], Set[str]]] = {}
+        # Devices this gateway currently considers its own
+        self._owned: Set[str] = set()
+
+    def observe(self, device_id: str, rssi: float, now: Optional[float] = None):
+        """Record that this gateway heard a device."""
+        now = time.monotonic() if now is None else now
+        previous = self._heard.get(device_id)
+        if previous is not None:
+            rssi = previous[0] + RSSI_SMOOTHING * (rssi - previous[0])
+        self._heard[device_id] = (rssi, now)
+
+    def announcement(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Build this gateway's announcement and forget devices no longer heard."""
+        now = time.monotonic() if now is None else now
+        for device_id in [device_id for device_id, (_rssi, heard) in self._heard.items()
+                          if now - heard > self.lease]:
+            del self._heard[device_id]
+            self._owned.discard(device_id)
+
+        return {
+            "gateway": self.gateway_id,
+            "lease": self.lease,
+            "devices": {device_id: round(rssi, 1) for device_id, (rssi, _heard) in self._heard.items()},
+            "owned": sorted(self._owned),
+        }
+
+    def handle_announcement(self, gateway_id: str, announcement: Optional[Dict[str, Any]],
+                            now: Optional[float] = None):
+        """Apply a peer's announcement; None withdraws the peer.
+
+        Raises ValueError for a malformed announcement, leaving the peer's
+        previous announcement in place.
+        """
+        if gateway_id == self.gateway_id:
+            return
+        if announcement is not None and not isinstance(announcement, dict):
+            raise ValueError("Announcement is not an object")
+        if not announcement:
+            self._peers.pop(gateway_id, None)
+            return
+
+        lease = announcement.get("lease", self.lease)
+        devices = announcement.get("devices", {})
+        owned = announcement.get("owned", [])
+        if not _is_number(lease) or lease <= 0:
+            raise ValueError(f"Invalid lease: {lease!r}")
+        if not isinstance(devices, dict) or not all(
+            isinstance(device_id, str) and _is_number(rssi) for device_id, rssi in devices.items()
+        ):
+            raise ValueError("Invalid devices: expected device id -> RSSI")
+        if not isinstance(owned, list) or not all(isinstance(device_id, str) for device_id in owned):
+            raise ValueError("Invalid owned: expected a list of device ids")
+
+        now = time.monotonic() if now is None else now
+        self._peers[gateway_id] = (now + lease, dict(devices), set(owned))
+
+    def owner(self, device_id: str, now: Optional[float] = None) -> Optional[str]:
+        """Return the gateway that should publish a device, or None if nobody hears it."""
+        now = time.monotonic() if now is None else now
+
+        # Candidates: gateway id -> (RSSI, claims ownership)
+        candidates: Dict[str, Tuple[float, bool]] = {}
+        heard = self._heard.get(device_id)
+        if heard is not None and now - heard[1] <= self.lease:
+            candidates[self.gateway_id] = (heard[0], device_id in self._owned)
+        for gateway_id, (expires, devices, owned) in self._peers.items():
+            if expires >= now and device_id in devices:
+                candidates[gateway_id] = (devices[device_id], device_id in owned)
+
+        if not candidates:
+            return None
+
+        # Strongest signal wins; ties go to the lowest gateway id
+        def rank(gateway_id: str) -> Tuple[float, str]:
+            return (-candidates[gateway_id][0], gateway_id)
+
+        best = min(candidates, key=rank)
+        claimants = [gateway_id for gateway_id, (_rssi, claims) in candidates.items() if claims]
+        if claimants:
+            incumbent = min(claimants, key=rank)
+            if candidates[incumbent][0] >= candidates[best][0] - self.hysteresis:
+                best = incumbent
+        return best
+
+    def owns(self, device_id: str, now: Optional[float] = None) -> bool:
+        """Return True if this gateway should publish a device, updating its claim."""
+        if self.owner(device_id, now) == self.gateway_id:
+            self._owned.add(device_id)
+            return True
+        self._owned.discard(device_id)
+        return False
+
+    def expire_peers(self, now: Optional[float] = None):
+        """Drop peers whose lease has run out."""
+        now = time.monotonic() if now is None else now
+        for gateway_id in [gateway_id for gateway_id, (expires, _devices, _owned) in self._peers.items()
+                           if expires < now]:
+            del self._peers[gateway_id]
@@ -3,19 +3,42 @@
 Teltonika EYE Sensor to Home Assistant MQTT Bridge
 
 Scans for Teltonika EYE sensors and publishes data to MQTT with Home Assistant
-auto-discovery support. No logging - Home Assistant handles all logging.
+auto-discovery support. No logging beyond debug messages - Home Assistant
+handles all logging.
 """
 
 import asyncio
 import json
+import logging
+import random
 import signal
 import sys
 import time
-from typing import Dict, Optional, Set
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple, Union
 
-import paho.mqtt.client as mqtt
+import aiomqtt
+import state_codec
+from device_publisher import DevicePublisher
+from gateway_election import GatewayElection
+from metrics_exporter import MetricsExporter
+from mqtt_spool import DiskSpool
 from teltonika_eye_scanner import TeltonikaEYEScanner
 
+# Topic classes, each with its own configurable QoS
+TOPIC_CLASS_DISCOVERY = "discovery"
+TOPIC_CLASS_STATE = "state"
+
+# Reconnect backoff bounds in seconds
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 60.0
+
+# Gateway announcements for multi-gateway election
+GATEWAY_TOPIC_PREFIX = "teltonika_eye/_gateways"
+
+# Queued message: topic, payload, topic class, retain, enqueue time
+OutgoingMessage = Tuple[str, Union[str, bytes, int, float], str, bool, float]
+
 
 class HomeAssistantMQTT:
     """Home Assistant MQTT bridge for Teltonika EYE sensors."""
@@ -28,7 +51,24 @@ class HomeAssistantMQTT:
         mqtt_password: Optional[str] = None,
         scan_duration: float = 5.0,
         scan_interval: float = 30.0,
-        discovery_prefix: str = "homeassistant"
+        discovery_prefix: str = "homeassistant",
+        compact_state: bool = False,
+        qos_discovery: int = 1,
+        qos_state: int = 0,
+        max_inflight: int = 100,
+        max_queue: int = 10000,
+        client_id: Optional[str] = None,
+        device_discovery: bool = False,
+        streaming: bool = False,
+        coalesce_window: float = 0.25,
+        spool_dir: Optional[str] = None,
+        spool_max_bytes: int = 100 * 1024 * 1024,
+        spool_replay_rate: float = 200.0,
+        state_encoding: str = "json",
+        gateway_id: Optional[str] = None,
+        gateway_lease: Optional[float] = None,
+        metrics_port: Optional[int] = None,
+        metrics_host: str = "0.0.0.0"
     ):
         self.mqtt_host = mqtt_host
         self.mqtt_port = mqtt_port
@@ -37,41 +77,388 @@ class HomeAssistantMQTT:
         self.scan_duration = scan_duration
         self.scan_interval = scan_interval
         self.discovery_prefix = discovery_prefix
+        self.compact_state = compact_state
+        self.state_encoding = state_encoding
+        self.qos = {
+            TOPIC_CLASS_DISCOVERY: qos_discovery,
+            TOPIC_CLASS_STATE: qos_state,
+        }
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.client_id = client_id
+        self.logger = logging.getLogger(__name__)
         
         self.running = True
-        self.mqtt_client = None
-        self.scanner = TeltonikaEYEScanner(scan_duration=scan_duration, output_format="json")
-        self.discovered_sensors: Set[str] = set()
+        self.mqtt_client: Optional[aiomqtt.Client] = None
+        self.streaming = streaming
+        self.coalesce_window = coalesce_window
+        if streaming:
+            self.scanner = TeltonikaEYEScanner(
+                scan_duration=scan_duration, output_format="none", reading_callback=self._on_reading
+            )
+        else:
+            self.scanner = TeltonikaEYEScanner(scan_duration=scan_duration, output_format="json")
+        
+        # Streaming mode: latest unpublished reading and flush timer per device
+        self._pending_readings: Dict[str, Dict] = {}
+        self._coalesce_timers: Dict[str, asyncio.TimerHandle] = {}
+        # Magnet/movement state last published per device; changes bypass coalescing
+        self._published_alarm_state: Dict[str, Tuple] = {}
+        self.device_discovery = device_discovery
+        # Device address -> publisher with prepared topics and discovery payloads
+        self._publishers: Dict[str, DevicePublisher] = {}
+        self._device_ids: Dict[str, str] = {}
+        
+        # Outgoing messages waiting for the connection, bounded by max_queue
+        self._outgoing: Deque[OutgoingMessage] = deque()
+        self._outgoing_ready = asyncio.Event()
+        self._inflight = 0
+        self._send_tasks: Set[asyncio.Task] = set()
+        self._send_failed = False
+        # Topic filter -> handler, (re)subscribed on every connect
+        self._subscriptions: Dict[str, Callable[[aiomqtt.Message], None]] = {}
+        
+        # State messages go to the disk spool while disconnected and are
+        # replayed in order, at most spool_replay_rate per second, on reconnect
+        self.spool = DiskSpool(spool_dir, max_size_bytes=spool_max_bytes) if spool_dir else None
+        self.spool_replay_rate = spool_replay_rate
+        self._spool_ready = asyncio.Event()
+        
+        self.stats = {
+            "published": 0,
+            "dropped": 0,
+            "errors": 0,
+            "reconnects": 0,
+            "spooled": 0,
+            "replayed": 0,
+            "publish_latency_total": 0.0,
+            "publish_latency_max": 0.0,
+        }
+        
+        # Multi-gateway election: only publish devices this gateway owns. The
+        # lease must outlast the time between two sightings of a device.
+        self.election: Optional[GatewayElection] = None
+        self._observed_timestamps: Dict[str, str] = {}
+        if gateway_id:
+            if gateway_lease is None:
+                gateway_lease = 30.0 if streaming else max(30.0, 3 * (scan_interval + scan_duration))
+            self.election = GatewayElection(gateway_id, lease=gateway_lease)
+            self._subscribe(f"{GATEWAY_TOPIC_PREFIX}/+", self._on_gateway_announcement)
+        
+        # Optional Prometheus endpoint, served from the event loop in run()
+        self.metrics_port = metrics_port
+        self.metrics_host = metrics_host
+        self.metrics: Optional[MetricsExporter] = None
+        self._latency_histogram = None
+        self._scan_histogram = None
+        if metrics_port:
+            self._setup_metrics()
+        
+        # Home Assistant birth message: republish discovery when it comes online
+        self._subscribe(f"{discovery_prefix}/status", self._on_homeassistant_status)
         
         # Setup signal handlers
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
     
+    def _setup_metrics(self):
+        """Register the bridge's metrics with a new exporter."""
+        self.metrics = MetricsExporter()
+        for key, help_text in (
+            ("published", "Messages published"),
+            ("dropped", "Messages dropped because the queue was full"),
+            ("errors", "Failed publishes"),
+            ("reconnects", "MQTT reconnections"),
+            ("spooled", "State messages written to the disk spool"),
+            ("replayed", "Spooled messages replayed"),
+        ):
+            self.metrics.counter(f"{key}_total", help_text, lambda key=key: self.stats[key])
+        self.metrics.gauge("queue_depth", "Messages waiting to be sent", lambda: self.queue_depth)
+        self.metrics.gauge("inflight", "Publishes awaiting completion", lambda: self.inflight)
+        if self.spool is not None:
+            self.metrics.gauge("spool_bytes", "Size of the disk spool", lambda: self.spool.size_bytes)
+        self._latency_histogram = self.metrics.histogram(
+            "publish_latency_seconds", "Time from queueing a message to its publish completing"
+        )
+        if not self.streaming:
+            self._scan_histogram = self.metrics.histogram("scan_duration_seconds", "Duration of BLE scans")
+        self.scanner.decode_observer = self.metrics.histogram(
+            "decode_seconds", "Time to decode one advert; the count gives adverts decoded"
+        ).observe
+    
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals gracefully."""
         self.running = False
-        if self.mqtt_client:
-            self.mqtt_client.disconnect()
     
-    def _setup_mqtt(self):
-        """Setup MQTT client connection."""
-        self.mqtt_client = mqtt.Client()
+    @property
+    def queue_depth(self) -> int:
+        """Number of messages waiting to be sent."""
+        return len(self._outgoing)
+    
+    @property
+    def inflight(self) -> int:
+        """Number of publishes sent but not yet completed."""
+        return self._inflight
+    
+    def _publish(self, topic: str, payload, topic_class: str = TOPIC_CLASS_STATE, retain: bool = False):
+        """Queue a message for the MQTT connection without blocking the scan loop."""
+        # While disconnected or replaying, state goes behind the spooled backlog
+        if self.spool is not None and topic_class == TOPIC_CLASS_STATE:
+            if self.mqtt_client is None or not self.spool.empty:
+                self._spool_message(topic, payload, retain)
+                return
+        
+        if len(self._outgoing) >= self.max_queue:
+            self._outgoing.popleft()
+            self.stats["dropped"] += 1
+        self._outgoing.append((topic, payload, topic_class, retain, time.monotonic()))
+        self._outgoing_ready.set()
+    
+    def _spool_message(self, topic: str, payload, retain: bool):
+        """Append a state message to the disk spool."""
+        if not isinstance(payload, bytes):
+            payload = str(payload).encode("utf-8")
+        self.spool.append(topic, payload, self.qos[TOPIC_CLASS_STATE], retain)
+        self.stats["spooled"] += 1
+        self._spool_ready.set()
+    
+    def _requeue(self, message: OutgoingMessage):
+        """Put a message that failed in flight back in the queue at its original position."""
+        queued_at = message[4]
+        index = len(self._outgoing)
+        for position, queued in enumerate(self._outgoing):
+            if queued[4] > queued_at:
+                index = position
+                break
+        self._outgoing.insert(index, message)
+    
+    def _spool_outgoing(self):
+        """Move queued state messages to the spool, keeping discovery in memory."""
+        remaining = deque()
+        for message in self._outgoing:
+            topic, payload, topic_class, retain, _queued_at = message
+            if topic_class == TOPIC_CLASS_STATE:
+                self._spool_message(topic, payload, retain)
+            else:
+                remaining.append(message)
+        self._outgoing = remaining
+    
+    def _subscribe(self, topic_filter: str, handler: Callable[[aiomqtt.Message], None]):
+        """Register a subscription that is restored after every reconnect."""
+        self._subscriptions[topic_filter] = handler
+    
+    async def _mqtt_loop(self):
+        """Keep the MQTT connection up, reconnecting with exponential backoff."""
+        delay = RECONNECT_MIN_DELAY
         
-        if self.mqtt_username and self.mqtt_password:
-            self.mqtt_client.username_pw_set(self.mqtt_username, self.mqtt_password)
+        while self.running:
+            try:
+                async with aiomqtt.Client(
+                    hostname=self.mqtt_host,
+                    port=self.mqtt_port,
+                    username=self.mqtt_username,
+                    password=self.mqtt_password,
+                    identifier=self.client_id,
+                    keepalive=60,
+                    max_inflight_messages=self.max_inflight,
+                    will=self._gateway_will()
+                ) as client:
+                    self.mqtt_client = client
+                    # Our own window bounds outstanding publishes, don't warn below it
+                    client.pending_calls_threshold = self.max_inflight
+                    self._send_failed = False
+                    delay = RECONNECT_MIN_DELAY
+                    
+                    for topic_filter in self._subscriptions:
+                        await client.subscribe(topic_filter)
+                    
+                    tasks = [
+                        asyncio.create_task(self._publisher(client)),
+                        asyncio.create_task(self._receiver(client)),
+                    ]
+                    if self.spool is not None:
+                        tasks.append(asyncio.create_task(self._replayer(client)))
+                    if self.election is not None:
+                        tasks.append(asyncio.create_task(self._announcer(client)))
+                    try:
+                        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+                        for task in done:
+                            task.result()
+                    finally:
+                        for task in tasks:
+                            task.cancel()
+                        await asyncio.gather(*tasks, return_exceptions=True)
+                        # Publishes still awaiting an ack would only fail at their
+                        # timeout; requeue them now so they are spooled in order
+                        send_tasks = list(self._send_tasks)
+                        for task in send_tasks:
+                            task.cancel()
+                        await asyncio.gather(*send_tasks, return_exceptions=True)
+            
+            except aiomqtt.MqttError as e:
+                print(f"MQTT connection error: {e}", file=sys.stderr)
+            except Exception as e:
+                # Anything else (spool I/O, a handler bug) also reconnects rather
+                # than leaving the bridge scanning with no connection
+                print(f"MQTT loop error: {e!r}", file=sys.stderr)
+            finally:
+                self.mqtt_client = None
+                if self.spool is not None:
+                    try:
+                        self._spool_outgoing()
+                    except Exception as e:
+                        # Unspooled messages stay queued in memory
+                        print(f"Error spooling queued messages: {e!r}", file=sys.stderr)
+            
+            if not self.running:
+                break
+            
+            self.stats["reconnects"] += 1
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+    
+    async def _publisher(self, client: aiomqtt.Client):
+        """Send queued messages, keeping at most max_inflight publishes outstanding."""
+        window = asyncio.Semaphore(self.max_inflight)
         
-        # Connect to MQTT broker
+        while True:
+            if self._send_failed:
+                raise aiomqtt.MqttError("Publish failed, reconnecting")
+            
+            if not self._outgoing:
+                self._outgoing_ready.clear()
+                await self._outgoing_ready.wait()
+                continue
+            
+            await window.acquire()
+            if not self._outgoing:
+                window.release()
+                continue
+            message = self._outgoing.popleft()
+            self._inflight += 1
+            task = asyncio.create_task(self._send(client, message, window))
+            self._send_tasks.add(task)
+            task.add_done_callback(self._send_tasks.discard)
+    
+    async def _send(self, client: aiomqtt.Client, message: OutgoingMessage, window: asyncio.Semaphore):
+        """Publish one message and record its queue-to-completion latency."""
+        topic, payload, topic_class, retain, queued_at = message
         try:
-            self.mqtt_client.connect(self.mqtt_host, self.mqtt_port, 60)
-            self.mqtt_client.loop_start()
+            await client.publish(topic, payload, qos=self.qos[topic_class], retain=retain)
+        except aiomqtt.MqttError:
+            # Keep it, ahead of newer messages, for the next connection (or the
+            # spool) and make the publisher reconnect
+            self._requeue(message)
+            self.stats["errors"] += 1
+            self._send_failed = True
+            self._outgoing_ready.set()
+        except asyncio.CancelledError:
+            # Disconnected before the broker acknowledged it
+            self._requeue(message)
+            raise
+        else:
+            latency = time.monotonic() - queued_at
+            self.stats["published"] += 1
+            self.stats["publish_latency_total"] += latency
+            if latency > self.stats["publish_latency_max"]:
+                self.stats["publish_latency_max"] = latency
+            if self._latency_histogram is not None:
+                self._latency_histogram.observe(latency)
+        finally:
+            self._inflight -= 1
+            window.release()
+    
+    async def _replayer(self, client: aiomqtt.Client):
+        """Replay spooled messages in order, at most spool_replay_rate per second."""
+        batch_size = max(1, int(self.spool_replay_rate / 10))
+        
+        while True:
+            if self.spool.empty:
+                self._spool_ready.clear()
+                await self._spool_ready.wait()
+                continue
+            
+            batch_start = time.monotonic()
+            batch = self.spool.read(batch_size)
+            # One at a time, so the broker sees the original order
+            for topic, payload, qos, retain in batch:
+                await client.publish(topic, payload, qos=qos, retain=retain)
+            # Only committed once delivered; a failed batch is replayed again
+            self.spool.commit()
+            self.stats["replayed"] += len(batch)
+            
+            elapsed = time.monotonic() - batch_start
+            await asyncio.sleep(max(0.0, len(batch) / self.spool_replay_rate - elapsed))
+    
+    def _gateway_will(self) -> Optional[aiomqtt.Will]:
+        """Return the last will withdrawing this gateway's announcement, if electing."""
+        if self.election is None:
+            return None
+        return aiomqtt.Will(f"{GATEWAY_TOPIC_PREFIX}/{self.election.gateway_id}", b"", qos=1)
+    
+    async def _announcer(self, client: aiomqtt.Client):
+        """Announce the devices this gateway hears, three times per lease."""
+        topic = f"{GATEWAY_TOPIC_PREFIX}/{self.election.gateway_id}"
+        while True:
+            self.election.expire_peers()
+            # Sent directly so a backlog of state messages cannot delay it past the lease
+            await client.publish(
+                topic,
+                json.dumps(self.election.announcement(), separators=(",", ":")),
+                qos=1
+            )
+            await asyncio.sleep(self.election.lease / 3)
+    
+    def _on_gateway_announcement(self, message: aiomqtt.Message):
+        """Apply another gateway's announcement; an empty payload withdraws it."""
+        gateway_id = str(message.topic).rsplit("/", 1)[-1]
+        try:
+            announcement = json.loads(message.payload) if message.payload else None
+            self.election.handle_announcement(gateway_id, announcement)
+        except ValueError as e:
+            self.logger.debug(f"Ignoring announcement from gateway {gateway_id}: {e}")
+    
+    def _owns_device(self, device_data: Dict) -> bool:
+        """Return True if this gateway should publish the device."""
+        if self.election is None:
             return True
-        except Exception as e:
-            print(f"Failed to connect to MQTT broker: {e}", file=sys.stderr)
-            return False
+        return self.election.owns(self._get_device_id(device_data["device"]["address"]))
+    
+    def _observe_device(self, device_data: Dict):
+        """Feed a sighting into the gateway election."""
+        if self.election is None:
+            return
+        # Scan mode hands back every device seen so far; only count new readings
+        device_id = self._get_device_id(device_data["device"]["address"])
+        timestamp = device_data["data"]["timestamp"]
+        if self._observed_timestamps.get(device_id) == timestamp:
+            return
+        self._observed_timestamps[device_id] = timestamp
+        self.election.observe(device_id, device_data["device"]["rssi"])
+    
+    async def _receiver(self, client: aiomqtt.Client):
+        """Dispatch incoming messages to subscription handlers."""
+        async for message in client.messages:
+            for topic_filter, handler in self._subscriptions.items():
+                if message.topic.matches(topic_filter):
+                    # One bad message must not stop the receiver
+                    try:
+                        handler(message)
+                    except Exception as e:
+                        print(f"Error handling message on {message.topic}: {e}", file=sys.stderr)
+    
+    async def _flush(self, timeout: float = 5.0):
+        """Wait until queued and in-flight messages are sent, up to timeout seconds."""
+        deadline = time.monotonic() + timeout
+        while (self._outgoing or self._inflight) and self.mqtt_client and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
     
     def _get_device_id(self, device_address: str) -> str:
         """Generate a clean device ID for Home Assistant."""
-        return device_address.replace(":", "").lower()
+        device_id = self._device_ids.get(device_address)
+        if device_id is None:
+            device_id = self._device_ids[device_address] = sys.intern(device_address.replace(":", "").lower())
+        return device_id
     
     def _get_device_name(self, device_data: Dict) -> str:
         """Get a friendly device name."""
@@ -82,290 +469,321 @@ class HomeAssistantMQTT:
             return f"Teltonika EYE {device_address[-8:].replace(':', '')}"
         return device_name
     
-    def _publish_discovery_config(self, device_data: Dict):
-        """Publish Home Assistant auto-discovery configuration."""
+    def _state_source(self, device_id: str, key: str) -> Dict[str, str]:
+        """Return the discovery fields telling Home Assistant where a value is published."""
+        if self.compact_state:
+            return {
+                "state_topic": f"teltonika_eye/{device_id}/state",
+                "value_template": f"{{{{ value_json.{key} }}}}"
+            }
+        return {"state_topic": f"teltonika_eye/{device_id}/{key}"}
+    
+    def _build_discovery_components(self, device_data: Dict) -> List[Tuple[str, str, Dict]]:
+        """Build (platform, object id, config) for every entity of a device."""
         device_address = device_data["device"]["address"]
         device_id = self._get_device_id(device_address)
         device_name = self._get_device_name(device_data)
         sensors = device_data["data"]["sensors"]
+        components = []
         
-        # Base device configuration
-        device_config = {
-            "identifiers": [f"teltonika_eye_{device_id}"],
-            "name": device_name,
-            "model": "EYE Sensor",
-            "manufacturer": "Teltonika",
-            "sw_version": str(device_data["data"]["protocol_version"]),
-            "via_device": "teltonika_ble_scanner"
-        }
-        
-        # Publish sensor configurations
         if "temperature" in sensors:
-            temp_config = {
+            components.append(("sensor", "temperature", {
                 "name": f"{device_name} Temperature",
                 "unique_id": f"teltonika_eye_{device_id}_temperature",
-                "state_topic": f"teltonika_eye/{device_id}/temperature",
+                **self._state_source(device_id, "temperature"),
                 "unit_of_measurement": "°C",
                 "device_class": "temperature",
-                "state_class": "measurement",
-                "device": device_config
-            }
-            self.mqtt_client.publish(
-                f"{self.discovery_prefix}/sensor/teltonika_eye_{device_id}/temperature/config",
-                json.dumps(temp_config),
-                retain=True
-            )
+                "state_class": "measurement"
+            }))
         
         if "humidity" in sensors:
-            humidity_config = {
+            components.append(("sensor", "humidity", {
                 "name": f"{device_name} Humidity",
                 "unique_id": f"teltonika_eye_{device_id}_humidity",
-                "state_topic": f"teltonika_eye/{device_id}/humidity",
+                **self._state_source(device_id, "humidity"),
                 "unit_of_measurement": "%",
                 "device_class": "humidity",
-                "state_class": "measurement",
-                "device": device_config
-            }
-            self.mqtt_client.publish(
-                f"{self.discovery_prefix}/sensor/teltonika_eye_{device_id}/humidity/config",
-                json.dumps(humidity_config),
-                retain=True
-            )
+                "state_class": "measurement"
+            }))
         
         if "battery_voltage" in sensors:
-            battery_config = {
+            components.append(("sensor", "battery", {
                 "name": f"{device_name} Battery",
                 "unique_id": f"teltonika_eye_{device_id}_battery",
-                "state_topic": f"teltonika_eye/{device_id}/battery",
+                **self._state_source(device_id, "battery"),
                 "unit_of_measurement": "V",
                 "device_class": "voltage",
-                "state_class": "measurement",
-                "device": device_config
-            }
-            self.mqtt_client.publish(
-                f"{self.discovery_prefix}/sensor/teltonika_eye_{device_id}/battery/config",
-                json.dumps(battery_config),
-                retain=True
-            )
+                "state_class": "measurement"
+            }))
         
         if "movement" in sensors:
-            movement_config = {
+            components.append(("sensor", "movement_count", {
                 "name": f"{device_name} Movement Count",
                 "unique_id": f"teltonika_eye_{device_id}_movement_count",
-                "state_topic": f"teltonika_eye/{device_id}/movement_count",
+                **self._state_source(device_id, "movement_count"),
                 "state_class": "total_increasing",
-                "icon": "mdi:motion-sensor",
-                "device": device_config
-            }
-            self.mqtt_client.publish(
-                f"{self.discovery_prefix}/sensor/teltonika_eye_{device_id}/movement_count/config",
-                json.dumps(movement_config),
-                retain=True
-            )
-            
-            movement_state_config = {
+                "icon": "mdi:motion-sensor"
+            }))
+            components.append(("binary_sensor", "movement_state", {
                 "name": f"{device_name} Movement State",
                 "unique_id": f"teltonika_eye_{device_id}_movement_state",
-                "state_topic": f"teltonika_eye/{device_id}/movement_state",
-                "icon": "mdi:motion-sensor",
-                "device": device_config
-            }
-            self.mqtt_client.publish(
-                f"{self.discovery_prefix}/binary_sensor/teltonika_eye_{device_id}/movement_state/config",
-                json.dumps(movement_state_config),
-                retain=True
-            )
+                **self._state_source(device_id, "movement_state"),
+                "icon": "mdi:motion-sensor"
+            }))
         
         if "magnetic" in sensors:
-            magnetic_config = {
+            components.append(("binary_sensor", "magnetic", {
                 "name": f"{device_name} Magnetic Field",
                 "unique_id": f"teltonika_eye_{device_id}_magnetic",
-                "state_topic": f"teltonika_eye/{device_id}/magnetic",
+                **self._state_source(device_id, "magnetic"),
                 "payload_on": "true",
                 "payload_off": "false",
                 "device_class": "opening",
-                "icon": "mdi:magnet",
-                "device": device_config
-            }
-            self.mqtt_client.publish(
-                f"{self.discovery_prefix}/binary_sensor/teltonika_eye_{device_id}/magnetic/config",
-                json.dumps(magnetic_config),
-                retain=True
-            )
+                "icon": "mdi:magnet"
+            }))
         
         if "angle" in sensors:
-            pitch_config = {
+            components.append(("sensor", "pitch", {
                 "name": f"{device_name} Pitch",
                 "unique_id": f"teltonika_eye_{device_id}_pitch",
-                "state_topic": f"teltonika_eye/{device_id}/pitch",
+                **self._state_source(device_id, "pitch"),
                 "unit_of_measurement": "°",
                 "icon": "mdi:angle-acute",
-                "state_class": "measurement",
-                "device": device_config
-            }
-            self.mqtt_client.publish(
-                f"{self.discovery_prefix}/sensor/teltonika_eye_{device_id}/pitch/config",
-                json.dumps(pitch_config),
-                retain=True
-            )
-            
-            roll_config = {
+                "state_class": "measurement"
+            }))
+            components.append(("sensor", "roll", {
                 "name": f"{device_name} Roll",
                 "unique_id": f"teltonika_eye_{device_id}_roll",
-                "state_topic": f"teltonika_eye/{device_id}/roll",
+                **self._state_source(device_id, "roll"),
                 "unit_of_measurement": "°",
                 "icon": "mdi:angle-acute",
-                "state_class": "measurement",
-                "device": device_config
-            }
-            self.mqtt_client.publish(
-                f"{self.discovery_prefix}/sensor/teltonika_eye_{device_id}/roll/config",
-                json.dumps(roll_config),
-                retain=True
-            )
+                "state_class": "measurement"
+            }))
         
         # RSSI sensor
-        rssi_config = {
+        components.append(("sensor", "rssi", {
             "name": f"{device_name} Signal Strength",
             "unique_id": f"teltonika_eye_{device_id}_rssi",
-            "state_topic": f"teltonika_eye/{device_id}/rssi",
+            **self._state_source(device_id, "rssi"),
             "unit_of_measurement": "dBm",
             "device_class": "signal_strength",
             "state_class": "measurement",
-            "entity_category": "diagnostic",
-            "device": device_config
-        }
-        self.mqtt_client.publish(
-            f"{self.discovery_prefix}/sensor/teltonika_eye_{device_id}/rssi/config",
-            json.dumps(rssi_config),
-            retain=True
-        )
+            "entity_category": "diagnostic"
+        }))
         
         # Battery status (low battery indicator)
-        battery_status_config = {
+        components.append(("binary_sensor", "low_battery", {
             "name": f"{device_name} Low Battery",
             "unique_id": f"teltonika_eye_{device_id}_low_battery",
-            "state_topic": f"teltonika_eye/{device_id}/low_battery",
+            **self._state_source(device_id, "low_battery"),
             "payload_on": "true",
             "payload_off": "false",
             "device_class": "battery",
-            "entity_category": "diagnostic",
-            "device": device_config
-        }
-        self.mqtt_client.publish(
-            f"{self.discovery_prefix}/binary_sensor/teltonika_eye_{device_id}/low_battery/config",
-            json.dumps(battery_status_config),
-            retain=True
-        )
+            "entity_category": "diagnostic"
+        }))
+        
+        return components
     
-    def _publish_sensor_data(self, device_data: Dict):
-        """Publish sensor data to MQTT topics."""
-        device_address = device_data["device"]["address"]
-        device_id = self._get_device_id(device_address)
-        sensors = device_data["data"]["sensors"]
+    def _build_discovery_messages(self, device_data: Dict) -> List[Tuple[str, bytes]]:
+        """Serialize the discovery configuration of a device into (topic, payload) pairs."""
+        device_id = self._get_device_id(device_data["device"]["address"])
+        components = self._build_discovery_components(device_data)
         
-        # Publish individual sensor values
-        if "temperature" in sensors:
-            self.mqtt_client.publish(
-                f"teltonika_eye/{device_id}/temperature",
-                sensors["temperature"]["value"]
-            )
+        # Base device configuration
+        device_config = {
+            "identifiers": [f"teltonika_eye_{device_id}"],
+            "name": self._get_device_name(device_data),
+            "model": "EYE Sensor",
+            "manufacturer": "Teltonika",
+            "sw_version": str(device_data["data"]["protocol_version"]),
+            "via_device": "teltonika_ble_scanner"
+        }
         
-        if "humidity" in sensors:
-            self.mqtt_client.publish(
-                f"teltonika_eye/{device_id}/humidity",
-                sensors["humidity"]["value"]
-            )
+        # Single device-level message (Home Assistant 2024.11 and later)
+        if self.device_discovery:
+            config = {
+                "device": device_config,
+                "origin": {"name": "teltonika_eye_mqtt"},
+                "components": {
+                    object_id: {"platform": platform, **component}
+                    for platform, object_id, component in components
+                }
+            }
+            return [(
+                f"{self.discovery_prefix}/device/teltonika_eye_{device_id}/config",
+                json.dumps(config).encode("utf-8")
+            )]
         
-        if "battery_voltage" in sensors:
-            self.mqtt_client.publish(
-                f"teltonika_eye/{device_id}/battery",
-                sensors["battery_voltage"]["value"]
+        return [
+            (
+                f"{self.discovery_prefix}/{platform}/teltonika_eye_{device_id}/{object_id}/config",
+                json.dumps({**component, "device": device_config}).encode("utf-8")
             )
+            for platform, object_id, component in components
+        ]
+    
+    def _publish_discovery_config(self, device_data: Dict) -> DevicePublisher:
+        """Publish Home Assistant auto-discovery configuration if it is new or changed.
         
-        if "movement" in sensors:
-            self.mqtt_client.publish(
-                f"teltonika_eye/{device_id}/movement_count",
-                sensors["movement"]["count"]
-            )
-            self.mqtt_client.publish(
-                f"teltonika_eye/{device_id}/movement_state",
-                "ON" if sensors["movement"]["state"] == "moving" else "OFF"
-            )
+        Returns the device's publisher, built along with its discovery payloads.
+        """
+        device_address = device_data["device"]["address"]
+        publisher = self._publishers.get(device_address)
+        if publisher is not None and publisher.matches(device_data):
+            return publisher
         
-        if "magnetic" in sensors:
-            self.mqtt_client.publish(
-                f"teltonika_eye/{device_id}/magnetic",
-                "true" if sensors["magnetic"]["detected"] else "false"
-            )
+        publisher = DevicePublisher(
+            self._get_device_id(device_address),
+            device_data,
+            self._build_discovery_messages(device_data),
+            compact_state=self.compact_state,
+            state_encoding=self.state_encoding,
+            raw_payloads=self.scanner.raw_payloads
+        )
+        self._publishers[device_address] = publisher
+        for topic, payload in publisher.discovery_messages:
+            self._publish(topic, payload, TOPIC_CLASS_DISCOVERY, retain=True)
+        return publisher
+    
+    def _republish_discovery(self):
+        """Publish every cached discovery payload again, e.g. after Home Assistant restarts."""
+        for publisher in self._publishers.values():
+            for topic, payload in publisher.discovery_messages:
+                self._publish(topic, payload, TOPIC_CLASS_DISCOVERY, retain=True)
+    
+    def _on_homeassistant_status(self, message: aiomqtt.Message):
+        """Republish discovery when Home Assistant announces it is online."""
+        if message.payload == b"online":
+            self._republish_discovery()
+    
+    def _publish_sensor_data(self, device_data: Dict):
+        """Publish sensor data to MQTT topics."""
+        publisher = self._publishers.get(device_data["device"]["address"])
+        if publisher is None:
+            publisher = self._publish_discovery_config(device_data)
+        publisher.publish(device_data, self._publish)
+    
+    def _get_alarm_state(self, device_data: Dict) -> Tuple:
+        """Return the magnet and movement state of a reading."""
+        sensors = device_data["data"]["sensors"]
+        return (
+            sensors["magnetic"]["detected"] if "magnetic" in sensors else None,
+            sensors["movement"]["state"] if "movement" in sensors else None,
+        )
+    
+    def _on_reading(self, device_data: Dict):
+        """Handle a reading from the advert path in streaming mode.
         
-        if "angle" in sensors:
-            self.mqtt_client.publish(
-                f"teltonika_eye/{device_id}/pitch",
-                sensors["angle"]["pitch"]
-            )
-            self.mqtt_client.publish(
-                f"teltonika_eye/{device_id}/roll",
-                sensors["angle"]["roll"]
-            )
+        Readings are coalesced per device over coalesce_window seconds, so only
+        the latest one is published. Magnet and movement state changes are
+        published immediately.
+        """
+        device_address = device_data["device"]["address"]
+        self._pending_readings[device_address] = device_data
+        self._observe_device(device_data)
+        if self.metrics is not None:
+            self.metrics.update_sensor(device_data)
         
-        # Always publish RSSI and battery status
-        self.mqtt_client.publish(
-            f"teltonika_eye/{device_id}/rssi",
-            device_data["device"]["rssi"]
-        )
+        if self._published_alarm_state.get(device_address) != self._get_alarm_state(device_data):
+            self._flush_reading(device_address)
+        elif device_address not in self._coalesce_timers:
+            self._coalesce_timers[device_address] = asyncio.get_running_loop().call_later(
+                self.coalesce_window, self._flush_reading, device_address
+            )
+    
+    def _flush_reading(self, device_address: str):
+        """Publish the pending reading of a device."""
+        timer = self._coalesce_timers.pop(device_address, None)
+        if timer is not None:
+            timer.cancel()
         
-        self.mqtt_client.publish(
-            f"teltonika_eye/{device_id}/low_battery",
-            "true" if device_data["data"]["battery"]["low"] else "false"
-        )
+        device_data = self._pending_readings.pop(device_address, None)
+        if device_data is None:
+            return
         
-        # Publish complete device state as JSON for advanced users
-        self.mqtt_client.publish(
-            f"teltonika_eye/{device_id}/state",
-            json.dumps(device_data)
-        )
+        self._published_alarm_state[device_address] = self._get_alarm_state(device_data)
+        if not self._owns_device(device_data):
+            return
+        self._publish_discovery_config(device_data).publish(device_data, self._publish)
+    
+    async def _run_streaming(self):
+        """Keep the scanner running and publish from the advert path."""
+        await self.scanner.start()
+        try:
+            while self.running:
+                await asyncio.sleep(1)
+        finally:
+            await self.scanner.stop()
+            for device_address in list(self._pending_readings):
+                self._flush_reading(device_address)
     
     async def _scan_cycle(self):
         """Perform a single scan cycle."""
         try:
+            scan_start = time.monotonic()
             devices = await self.scanner.scan()
+            if self._scan_histogram is not None:
+                self._scan_histogram.observe(time.monotonic() - scan_start)
             
             for device_data in devices:
-                device_address = device_data["device"]["address"]
+                if self.metrics is not None:
+                    self.metrics.update_sensor(device_data)
                 
-                # Setup auto-discovery for new sensors
-                if device_address not in self.discovered_sensors:
-                    self._publish_discovery_config(device_data)
-                    self.discovered_sensors.add(device_address)
+                # Another gateway may be better placed to publish this device
+                self._observe_device(device_data)
+                if not self._owns_device(device_data):
+                    continue
                 
-                # Publish sensor data
-                self._publish_sensor_data(device_data)
+                # Setup auto-discovery for new or changed sensors, then publish
+                publisher = self._publish_discovery_config(device_data)
+                publisher.publish(device_data, self._publish)
                 
         except Exception as e:
             print(f"Error during scan: {e}", file=sys.stderr)
     
     async def run(self):
         """Run the MQTT bridge."""
-        if not self._setup_mqtt():
-            return
+        mqtt_task = asyncio.create_task(self._mqtt_loop())
+        if self.metrics is not None:
+            await self.metrics.start(self.metrics_host, self.metrics_port)
         
-        while self.running:
-            cycle_start = time.time()
-            
-            await self._scan_cycle()
-            
-            # Calculate sleep time
-            cycle_duration = time.time() - cycle_start
-            sleep_time = max(0, self.scan_interval - cycle_duration)
+        try:
+            if self.streaming:
+                await self._run_streaming()
             
-            if sleep_time > 0:
-                await asyncio.sleep(sleep_time)
-        
-        # Cleanup
-        if self.mqtt_client:
-            self.mqtt_client.loop_stop()
-            self.mqtt_client.disconnect()
+            while self.running:
+                cycle_start = time.time()
+                
+                await self._scan_cycle()
+                
+                # Calculate sleep time
+                cycle_duration = time.time() - cycle_start
+                sleep_time = max(0, self.scan_interval - cycle_duration)
+                
+                if sleep_time > 0:
+                    await asyncio.sleep(sleep_time)
+        finally:
+            # Cleanup: send what is queued, hand our devices over, then disconnect
+            self.running = False
+            await self._flush()
+            if self.election is not None and self.mqtt_client is not None:
+                try:
+                    await self.mqtt_client.publish(
+                        f"{GATEWAY_TOPIC_PREFIX}/{self.election.gateway_id}", b"", qos=1
+                    )
+                except aiomqtt.MqttError:
+                    pass
+            mqtt_task.cancel()
+            try:
+                await mqtt_task
+            except asyncio.CancelledError:
+                pass
+            # Keep unsent state for the next run
+            if self.spool is not None:
+                self._spool_outgoing()
+                self.spool.close()
+            if self.metrics is not None:
+                await self.metrics.stop()
 
 
 async def main():
@@ -411,8 +829,102 @@ async def main():
         default="homeassistant",
         help="Home Assistant discovery prefix (default: homeassistant)"
     )
+    parser.add_argument(
+        "--qos-discovery",
+        type=int,
+        choices=[0, 1, 2],
+        default=1,
+        help="QoS for discovery config messages (default: 1)"
+    )
+    parser.add_argument(
+        "--qos-state",
+        type=int,
+        choices=[0, 1, 2],
+        default=0,
+        help="QoS for sensor state messages (default: 0)"
+    )
+    parser.add_argument(
+        "--max-inflight",
+        type=int,
+        default=100,
+        help="Maximum publishes awaiting completion at once (default: 100)"
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=10000,
+        help="Maximum queued messages before the oldest are dropped (default: 10000)"
+    )
+    parser.add_argument(
+        "--device-discovery",
+        action="store_true",
+        help="Publish one device-level discovery message per sensor (Home Assistant 2024.11+)"
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Scan continuously and publish readings as they arrive instead of once per scan cycle"
+    )
+    parser.add_argument(
+        "--coalesce-ms",
+        type=float,
+        default=250,
+        help="Streaming mode: publish at most one reading per device per window, "
+             "except magnet and movement changes (default: 250)"
+    )
+    parser.add_argument(
+        "--spool-dir",
+        help="Directory for spooling state messages to disk while the broker is unreachable (optional)"
+    )
+    parser.add_argument(
+        "--spool-max-mb",
+        type=float,
+        default=100,
+        help="Maximum spool size in MB before the oldest messages are dropped (default: 100)"
+    )
+    parser.add_argument(
+        "--spool-replay-rate",
+        type=float,
+        default=200,
+        help="Spooled messages replayed per second after reconnecting (default: 200)"
+    )
+    parser.add_argument(
+        "--state-encoding",
+        choices=state_codec.STATE_ENCODINGS,
+        default="json",
+        help="Encoding of the full state document; msgpack and raw are published on "
+             "teltonika_eye/<id>/state/<encoding> (default: json)"
+    )
+    parser.add_argument(
+        "--gateway-id",
+        help="Cooperate with other bridges using this unique gateway name: each device is "
+             "published only by the gateway hearing it best (optional)"
+    )
+    parser.add_argument(
+        "--gateway-lease",
+        type=float,
+        help="Seconds a gateway announcement stays valid (default: 30 when streaming, "
+             "otherwise 3 scan cycles)"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics on this port at /metrics (default: disabled)"
+    )
+    parser.add_argument(
+        "--metrics-host",
+        default="0.0.0.0",
+        help="Address to serve metrics on (default: 0.0.0.0)"
+    )
+    parser.add_argument(
+        "--compact-state",
+        action="store_true",
+        help="Publish one compact JSON state message per device instead of one message per value"
+    )
     
     args = parser.parse_args()
+    if args.state_encoding == "msgpack" and state_codec.msgpack is None:
+        parser.error("--state-encoding msgpack requires the msgpack package (pip install msgpack)")
     
     # Create and run bridge
     bridge = HomeAssistantMQTT(
@@ -422,7 +934,23 @@ async def main():
         mqtt_password=args.mqtt_password,
         scan_duration=args.scan_duration,
         scan_interval=args.scan_interval,
-        discovery_prefix=args.discovery_prefix
+        discovery_prefix=args.discovery_prefix,
+        compact_state=args.compact_state,
+        qos_discovery=args.qos_discovery,
+        qos_state=args.qos_state,
+        max_inflight=args.max_inflight,
+        max_queue=args.max_queue,
+        device_discovery=args.device_discovery,
+        streaming=args.streaming,
+        coalesce_window=args.coalesce_ms / 1000,
+        spool_dir=args.spool_dir,
+        spool_max_bytes=int(args.spool_max_mb * 1024 * 1024),
+        spool_replay_rate=args.spool_replay_rate,
+        state_encoding=args.state_encoding,
+        gateway_id=args.gateway_id,
+        gateway_lease=args.gateway_lease,
+        metrics_port=args.metrics_port,
+        metrics_host=args.metrics_host
     )
     
     try:
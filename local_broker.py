@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Minimal in-process MQTT 3.1.1 broker
+
+A local broker stand-in for benchmarking and testing the MQTT bridge without
+an external Mosquitto instance. Supports CONNECT, PUBLISH (QoS 0/1/2),
+SUBSCRIBE/UNSUBSCRIBE with + and # wildcards, retained messages, last will
+messages and PING.
+Messages are always delivered to subscribers at QoS 0. Not intended for
+production use: there is no authentication, persistence or session state.
+"""
+
+import asyncio
+import struct
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# MQTT control packet types
+CONNECT = 1
+PUBLISH = 3
+PUBACK = 4
+PUBREC = 5
+PUBREL = 6
+SUBSCRIBE = 8
+UNSUBSCRIBE = 10
+PINGREQ = 12
+DISCONNECT = 14
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    """Return True if a topic matches an MQTT topic filter with + and # wildcards."""
+    filter_levels = topic_filter.split("/")
+    topic_levels = topic.split("/")
+
+    for index, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if index >= len(topic_levels):
+            return False
+        if level != "+" and level != topic_levels[index]:
+            return False
+
+    return len(filter_levels) == len(topic_levels)
+
+
+def encode_remaining_length(length: int) -> bytes:
+    """Encode an MQTT variable-length remaining length field."""
+    encoded = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        if length:
+            byte |= 0x80
+        encoded.append(byte)
+        if not length:
+            return bytes(encoded)
+
+
+def encode_publish(topic: str, payload: bytes, retain: bool = False) -> bytes:
+    """Encode a QoS 0 PUBLISH packet."""
+    topic_bytes = topic.encode("utf-8")
+    body = struct.pack(">H", len(topic_bytes)) + topic_bytes + payload
+    return bytes([(PUBLISH << 4) | int(retain)]) + encode_remaining_length(len(body)) + body
+
+
+class _Session:
+    """A connected client and its subscriptions."""
+
+    __slots__ = ("writer", "subscriptions", "will")
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.subscriptions: List[str] = []
+        # Last will: topic, payload, retain; sent if the client drops without DISCONNECT
+        self.will: Optional[Tuple[str, bytes, bool]] = None
+
+    def matches(self, topic: str) -> bool:
+        return any(topic_matches(topic_filter, topic) for topic_filter in self.subscriptions)
+
+
+class LocalBroker:
+    """In-process asyncio MQTT broker for benchmarks and tests."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        on_publish: Optional[Callable[[str, bytes, float], None]] = None
+    ):
+        self.host = host
+        self.port = port
+        self.on_publish = on_publish
+
+        self.retained: Dict[str, bytes] = {}
+        self.messages_received = 0
+        self.bytes_received = 0
+        self._sessions: List[_Session] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> int:
+        """Start listening and return the bound port."""
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self):
+        """Stop listening and drop all client connections."""
+        if self._server:
+            self._server.close()
+        for session in list(self._sessions):
+            session.writer.close()
+        if self._server:
+            await self._server.wait_closed()
+            self._server = None
+        self._sessions.clear()
+
+    async def _read_packet(self, reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+        """Read one packet, returning its first header byte and body."""
+        header = (await reader.readexactly(1))[0]
+
+        length = 0
+        multiplier = 1
+        while True:
+            byte = (await reader.readexactly(1))[0]
+            length += (byte & 0x7F) * multiplier
+            if not byte & 0x80:
+                break
+            multiplier *= 128
+
+        body = await reader.readexactly(length) if length else b""
+        return header, body
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one client connection."""
+        session = _Session(writer)
+        self._sessions.append(session)
+
+        try:
+            while True:
+                header, body = await self._read_packet(reader)
+                packet_type = header >> 4
+
+                if packet_type == CONNECT:
+                    session.will = self._parse_will(body)
+                    writer.write(b"\x20\x02\x00\x00")
+
+                elif packet_type == PUBLISH:
+                    self._handle_publish(session, header, body)
+
+                elif packet_type == PUBREL:
+                    writer.write(b"\x70\x02" + body[:2])
+
+                elif packet_type == SUBSCRIBE:
+                    self._handle_subscribe(session, body)
+
+                elif packet_type == UNSUBSCRIBE:
+                    offset = 2
+                    while offset < len(body):
+                        (filter_length,) = struct.unpack_from(">H", body, offset)
+                        topic_filter = body[offset + 2:offset + 2 + filter_length].decode("utf-8")
+                        offset += 2 + filter_length
+                        if topic_filter in session.subscriptions:
+                            session.subscriptions.remove(topic_filter)
+                    writer.write(b"\xb0\x02" + body[:2])
+
+                elif packet_type == PINGREQ:
+                    writer.write(b"\xd0\x00")
+
+                elif packet_type == DISCONNECT:
+                    session.will = None
+                    break
+
+                await writer.drain()
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if session in self._sessions:
+                self._sessions.remove(session)
+            writer.close()
+            if session.will is not None and self._server is not None:
+                topic, payload, retain = session.will
+                self._route(topic, payload, retain, time.perf_counter())
+
+    def _parse_will(self, body: bytes) -> Optional[Tuple[str, bytes, bool]]:
+        """Return the last will from a CONNECT packet body, if it has one."""
+        (protocol_length,) = struct.unpack_from(">H", body, 0)
+        offset = 2 + protocol_length + 1  # protocol name and level
+        flags = body[offset]
+        if not flags & 0x04:
+            return None
+        offset += 3  # flags and keep alive
+        (client_id_length,) = struct.unpack_from(">H", body, offset)
+        offset += 2 + client_id_length
+        (topic_length,) = struct.unpack_from(">H", body, offset)
+        topic = body[offset + 2:offset + 2 + topic_length].decode("utf-8")
+        offset += 2 + topic_length
+        (payload_length,) = struct.unpack_from(">H", body, offset)
+        payload = body[offset + 2:offset + 2 + payload_length]
+        return topic, payload, bool(flags & 0x20)
+
+    def _handle_publish(self, session: _Session, header: int, body: bytes):
+        """Acknowledge, retain and route a PUBLISH packet."""
+        received_at = time.perf_counter()
+        qos = (header >> 1) & 0x03
+        retain = bool(header & 0x01)
+
+        (topic_length,) = struct.unpack_from(">H", body, 0)
+        topic = body[2:2 + topic_length].decode("utf-8")
+        offset = 2 + topic_length
+        if qos:
+            packet_id = body[offset:offset + 2]
+            offset += 2
+            # PUBACK for QoS 1, PUBREC for QoS 2
+            session.writer.write(bytes([0x40 if qos == 1 else 0x50, 0x02]) + packet_id)
+        payload = body[offset:]
+
+        self.messages_received += 1
+        self.bytes_received += len(body)
+        self._route(topic, payload, retain, received_at)
+
+    def _route(self, topic: str, payload: bytes, retain: bool, received_at: float):
+        """Retain a message and deliver it to matching subscribers."""
+        if self.on_publish:
+            self.on_publish(topic, payload, received_at)
+
+        if retain:
+            if payload:
+                self.retained[topic] = payload
+            else:
+                self.retained.pop(topic, None)
+
+        packet = None
+        for subscriber in self._sessions:
+            if subscriber.matches(topic):
+                if packet is None:
+                    packet = encode_publish(topic, payload)
+                subscriber.writer.write(packet)
+
+    def _handle_subscribe(self, session: _Session, body: bytes):
+        """Register subscriptions, acknowledge and deliver retained messages."""
+        packet_id = body[:2]
+        offset = 2
+        new_filters = []
+        while offset < len(body):
+            (filter_length,) = struct.unpack_from(">H", body, offset)
+            topic_filter = body[offset + 2:offset + 2 + filter_length].decode("utf-8")
+            offset += 2 + filter_length + 1  # skip requested QoS
+            new_filters.append(topic_filter)
+
+        session.subscriptions.extend(new_filters)
+        granted = bytes(len(new_filters))  # everything is delivered at QoS 0
+        session.writer.write(
+            b"\x90" + encode_remaining_length(2 + len(granted)) + packet_id + granted
+        )
+
+        for topic, payload in self.retained.items():
+            if any(topic_matches(topic_filter, topic) for topic_filter in new_filters):
+                session.writer.write(encode_publish(topic, payload, retain=True))
+
+
+async def main():
+    """Run the broker stand-alone."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Minimal local MQTT broker for testing")
+    parser.add_argument("--host", default="127.0.0.1", help="Listen address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=1883, help="Listen port (default: 1883)")
+    args = parser.parse_args()
+
+    broker = LocalBroker(args.host, args.port)
+    port = await broker.start()
+    print(f"Local MQTT broker listening on {args.host}:{port}", file=sys.stderr)
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await broker.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Prometheus metrics endpoint for the monitor and the MQTT bridge
+
+MetricsExporter serves GET /metrics in the Prometheus text format from an
+asyncio server on the caller's event loop. It exposes:
+
+- the latest values of each sensor, labelled by address and name
+- counters and gauges read through callbacks at scrape time, so callers
+  keep their existing stats dicts
+- histograms for latencies and durations
+
+Rendering is incremental. A sensor reading only stores the values and marks
+the sensor dirty. A scrape formats lines only for sensors updated since the
+previous scrape and reuses the rest. The encoded sensor section is reused
+outright when nothing has changed.
+
+The last-seen time is the timestamp of the sensor's latest reading. Repeats
+of that reading, which scan() keeps returning for sensors that have gone
+quiet, are ignored. Sensor age is best derived in PromQL as
+time() - teltonika_eye_sensor_last_seen_timestamp_seconds. A precomputed age
+would change on every scrape and defeat the cache.
+"""
+
+import asyncio
+import bisect
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from state_codec import timestamp_ms
+
+# Default histogram buckets in seconds, from BLE decode to a full scan
+LATENCY_BUCKETS = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0
+)
+
+# Per-sensor families: name suffix, help text and extractor from a reading
+SENSOR_METRICS: List[Tuple[str, str, Callable[[Dict[str, Any]], Any]]] = [
+    ("temperature_celsius", "Latest temperature",
+     lambda reading: reading["data"]["sensors"].get("temperature", {}).get("value")),
+    ("humidity_percent", "Latest relative humidity",
+     lambda reading: reading["data"]["sensors"].get("humidity", {}).get("value")),
+    ("battery_volts", "Latest battery voltage",
+     lambda reading: reading["data"]["sensors"].get("battery_voltage", {}).get("value")),
+    ("movement_count", "Latest movement counter",
+     lambda reading: reading["data"]["sensors"].get("movement", {}).get("count")),
+    ("low_battery", "1 if the sensor reports a low battery",
+     lambda reading: reading["data"].get("battery", {}).get("low")),
+    ("rssi_dbm", "Signal strength of the latest advert", lambda reading: reading["device"].get("rssi")),
+]
+
+
+def _label_value(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _number(value: Any) -> str:
+    """Format a sample value."""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Fixed-bucket histogram of observed values."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """Record one observation."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str) -> str:
+        """Return the bucket, sum and count samples."""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}\n')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}\n')
+        lines.append(f"{name}_sum {self.sum!r}\n{name}_count {self.count}\n")
+        return "".join(lines)
+
+
+class MetricsExporter:
+    """Collects metrics and serves them over HTTP."""
+
+    def __init__(self, prefix: str = "teltonika_eye"):
+        self.prefix = prefix
+        self.logger = logging.getLogger(__name__)
+
+        # name -> (type, help, callback) for counters and gauges
+        self._callbacks: Dict[str, Tuple[str, str, Callable[[], float]]] = {}
+        # name -> (help, histogram)
+        self._histograms: Dict[str, Tuple[str, Histogram]] = {}
+
+        # Per-sensor name, values, last-seen time and reading timestamp, and
+        # formatted lines per family for each sensor
+        self._sensor_values: Dict[str, Tuple[str, List[Any], float, str]] = {}
+        self._sensor_lines: List[Dict[str, str]] = [{} for _ in SENSOR_METRICS]
+        self._last_seen_lines: Dict[str, str] = {}
+        self._dirty = set()
+        # Encoded sensor section, reused until a sensor is updated
+        self._sensor_block: Optional[bytes] = None
+
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def counter(self, name: str, help_text: str, callback: Callable[[], float]):
+        """Expose a monotonically increasing value read from callback."""
+        self._callbacks[f"{self.prefix}_{name}"] = ("counter", help_text, callback)
+
+    def gauge(self, name: str, help_text: str, callback: Callable[[], float]):
+        """Expose a current value read from callback."""
+        self._callbacks[f"{self.prefix}_{name}"] = ("gauge", help_text, callback)
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        """Create and expose a histogram; the caller observes values on it."""
+        histogram = Histogram(buckets)
+        self._histograms[f"{self.prefix}_{name}"] = (help_text, histogram)
+        return histogram
+
+    def update_sensor(self, reading: Dict[str, Any]):
+        """Store a sensor's latest values; they are formatted at the next scrape.
+
+        A repeat of the sensor's previous reading is ignored.
+        """
+        address = reading["device"]["address"]
+        timestamp = reading["data"]["timestamp"]
+        previous = self._sensor_values.get(address)
+        if previous is not None and previous[3] == timestamp:
+            return
+
+        values = [extract(reading) for _suffix, _help, extract in SENSOR_METRICS]
+        self._sensor_values[address] = (
+            reading["device"].get("name") or "Unknown", values, timestamp_ms(timestamp) / 1000, timestamp
+        )
+        self._dirty.add(address)
+
+    def render(self) -> bytes:
+        """Return all metrics in the Prometheus text format."""
+        if self._dirty or self._sensor_block is None:
+            self._render_sensors()
+
+        parts = []
+        for name, (metric_type, help_text, callback) in self._callbacks.items():
+            try:
+                value = callback()
+            except Exception as e:
+                self.logger.debug(f"Metric {name} unavailable: {e}")
+                continue
+            parts.append(f"# HELP {name} {help_text}\n# TYPE {name} {metric_type}\n{name} {_number(value)}\n")
+
+        for name, (help_text, histogram) in self._histograms.items():
+            parts.append(f"# HELP {name} {help_text}\n# TYPE {name} histogram\n")
+            parts.append(histogram.render(name))
+
+        return self._sensor_block + "".join(parts).encode("utf-8")
+
+    def _render_sensors(self):
+        """Format the sensors updated since the last scrape and rebuild the sensor section."""
+        for address in self._dirty:
+            name, values, last_seen, _timestamp = self._sensor_values[address]
+            labels = f'{{address="{_label_value(address)}",name="{_label_value(name)}"}}'
+            for (suffix, _help, _extract), lines, value in zip(SENSOR_METRICS, self._sensor_lines, values):
+                if value is None:
+                    lines.pop(address, None)
+                else:
+                    lines[address] = f"{self.prefix}_sensor_{suffix}{labels} {_number(value)}\n"
+            self._last_seen_lines[address] = (
+                f"{self.prefix}_sensor_last_seen_timestamp_seconds{labels} {last_seen:.3f}\n"
+            )
+        self._dirty.clear()
+
+        parts = []
+        for (suffix, help_text, _extract), lines in zip(SENSOR_METRICS, self._sensor_lines):
+            name = f"{self.prefix}_sensor_{suffix}"
+            parts.append(f"# HELP {name} {help_text}\n# TYPE {name} gauge\n")
+            parts.extend(lines.values())
+        name = f"{self.prefix}_sensor_last_seen_timestamp_seconds"
+        parts.append(f"# HELP {name} Unix time of the latest reading\n# TYPE {name} gauge\n")
+        parts.extend(self._last_seen_lines.values())
+        self._sensor_block = "".join(parts).encode("utf-8")
+
+    async def start(self, host: str = "0.0.0.0", port: int = 9100):
+        """Start serving /metrics on the running event loop."""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+
+    async def stop(self):
+        """Stop the HTTP server."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer one HTTP request and close the connection."""
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5)
+            # Headers are not needed; read up to the blank line
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (b"\r\n", b"\n", b""):
+                pass
+
+            parts = request.split()
+            if len(parts) >= 2 and parts[0] == b"GET" and parts[1].split(b"?")[0] == b"/metrics":
+                status, body = b"200 OK", self.render()
+            else:
+                status, body = b"404 Not Found", b"Not Found\n"
+
+            writer.write(
+                b"HTTP/1.1 " + status + b"\r\n"
+                b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                b"Connection: close\r\n\r\n" + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -4,8 +4,8 @@
 # Optimized for temperature and humidity monitoring
 
 # Configuration
-SCAN_DURATION=5        # Seconds per scan cycle
 SCAN_INTERVAL=30       # Seconds between scans
+SOCKET="/tmp/teltonika-eye.sock"   # Resident scanner daemon socket
 OUTPUT_FILE="sensor_readings.json"
 LOG_FILE="monitor.log"
 
@@ -20,6 +20,9 @@ log_message() {
 
 # Function to handle cleanup on exit
 cleanup() {
+    if [ -n "$DAEMON_PID" ]; then
+        kill "$DAEMON_PID" 2>/dev/null
+    fi
     log_message "Monitoring stopped by user"
     exit 0
 }
@@ -28,7 +31,19 @@ cleanup() {
 trap cleanup SIGINT SIGTERM
 
 log_message "Starting continuous monitoring..."
-log_message "Scan duration: ${SCAN_DURATION}s, Interval: ${SCAN_INTERVAL}s"
+
+# The daemon scans continuously; start one unless one already answers on the
+# socket. A socket file left by a crashed daemon refuses connections, and the
+# new daemon removes it.
+if ! python3 teltonika_eye_client.py --socket "$SOCKET" --latest --max-age 0 >/dev/null 2>&1; then
+    python3 teltonika_eye_scanner.py --daemon --socket "$SOCKET" 2>>"$LOG_FILE" &
+    DAEMON_PID=$!
+    log_message "Started scanner daemon (PID $DAEMON_PID)"
+    # Sensors advertise every few seconds; give the first adverts time to arrive
+    sleep 5
+fi
+
+log_message "Interval: ${SCAN_INTERVAL}s, Socket: $SOCKET"
 log_message "Output file: $OUTPUT_FILE"
 log_message "Log file: $LOG_FILE"
 
@@ -41,8 +56,8 @@ while true; do
     
     log_message "Starting scan cycle $cycle_count"
     
-    # Run scanner and capture output
-    scan_output=$(python3 teltonika_eye_scanner.py --duration "$SCAN_DURATION" 2>/dev/null)
+    # Latest reading of each sensor seen since the previous cycle
+    scan_output=$(python3 teltonika_eye_client.py --socket "$SOCKET" --latest --max-age "$SCAN_INTERVAL" 2>>"$LOG_FILE")
     
     # Count readings in this cycle
     if [ -n "$scan_output" ]; then
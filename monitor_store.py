@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+SQLite time-series store for Teltonika EYE readings
+
+Optional storage backend for ContinuousMonitor. Readings go into a narrow,
+typed table keyed by (integer device id, epoch-ms timestamp) in a WAL-mode
+SQLite database, one transaction per scan cycle. All database work runs on a
+single background thread, so the scan loop never waits for the disk.
+
+With rollups enabled, closed minute/hour windows go into the rollups table,
+so long-range queries do not need the raw readings. Retention pruning only
+applies to raw readings; rollups are kept.
+
+Example query, temperature of one sensor over a day:
+
+    SELECT ts, temperature FROM readings
+    WHERE device_id = (SELECT id FROM devices WHERE address = '7C:D9:F4:00:11:22')
+      AND ts BETWEEN 1791849600000 AND 1791936000000;
+"""
+
+import logging
+import sqlite3
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from state_codec import timestamp_ms
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    id INTEGER PRIMARY KEY,
+    address TEXT NOT NULL UNIQUE,
+    name TEXT
+);
+CREATE TABLE IF NOT EXISTS readings (
+    device_id INTEGER NOT NULL REFERENCES devices(id),
+    ts INTEGER NOT NULL,            -- epoch milliseconds, UTC
+    rssi INTEGER,
+    temperature REAL,               -- °C
+    humidity INTEGER,               -- %
+    battery_mv INTEGER,
+    movement_count INTEGER,
+    moving INTEGER,
+    magnet INTEGER,
+    pitch INTEGER,
+    roll INTEGER,
+    low_battery INTEGER,
+    PRIMARY KEY (device_id, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS readings_ts ON readings (ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    device_id INTEGER NOT NULL REFERENCES devices(id),
+    metric TEXT NOT NULL,
+    window_seconds INTEGER NOT NULL,
+    start INTEGER NOT NULL,         -- epoch milliseconds, UTC
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,            -- mean = total / count
+    minimum REAL NOT NULL,
+    maximum REAL NOT NULL,
+    PRIMARY KEY (device_id, metric, window_seconds, start)
+) WITHOUT ROWID;
+"""
+
+INSERT_READING = """
+INSERT OR IGNORE INTO readings (
+    device_id, ts, rssi, temperature, humidity, battery_mv,
+    movement_count, moving, magnet, pitch, roll, low_battery
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Parts of a window emitted separately (e.g. across a restart) are merged
+UPSERT_ROLLUP = """
+INSERT INTO rollups (device_id, metric, window_seconds, start, count, total, minimum, maximum)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (device_id, metric, window_seconds, start) DO UPDATE SET
+    count = count + excluded.count,
+    total = total + excluded.total,
+    minimum = min(minimum, excluded.minimum),
+    maximum = max(maximum, excluded.maximum)
+"""
+
+# Seconds between retention pruning runs
+PRUNE_INTERVAL = 3600
+
+
+class ReadingStore:
+    """Batched, background-thread SQLite writer for sensor readings."""
+
+    def __init__(self, path: str, retention_days: Optional[float] = None):
+        self.path = path
+        self.retention_days = retention_days
+        self.logger = logging.getLogger(__name__)
+
+        self.rows_written = 0
+        self._device_ids: Dict[str, int] = {}
+        self._device_names: Dict[str, str] = {}
+        self._last_prune: Optional[float] = None
+        self._connection: Optional[sqlite3.Connection] = None
+
+        # The connection belongs to this one worker thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="monitor-store")
+        self._executor.submit(self._open).result()
+
+    def submit(self, readings: Iterable[Dict[str, Any]]) -> Future:
+        """Queue a scan cycle's readings for writing and return immediately."""
+        return self._executor.submit(self._write, list(readings))
+
+    def submit_rollups(self, records: Iterable[Dict[str, Any]]) -> Future:
+        """Queue closed rollup windows (see rollup.py) for writing and return immediately."""
+        return self._executor.submit(self._write_rollups, list(records))
+
+    def close(self):
+        """Finish pending writes and close the database."""
+        self._executor.submit(self._close).result()
+        self._executor.shutdown(wait=True)
+
+    def readings_between(self, address: str, start_ms: int, end_ms: int) -> List[sqlite3.Row]:
+        """Return one device's readings in a time range, oldest first."""
+        return self._executor.submit(self._query, address, start_ms, end_ms).result()
+
+    def _open(self):
+        """Open the database and create the schema."""
+        self._connection = sqlite3.connect(self.path)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("PRAGMA busy_timeout=5000")
+        self._connection.executescript(SCHEMA)
+        self._load_devices()
+
+    def _load_devices(self):
+        """Fill the device id and name caches from the devices table."""
+        self._device_ids.clear()
+        self._device_names.clear()
+        for device_id, address, name in self._connection.execute("SELECT id, address, name FROM devices"):
+            self._device_ids[address] = device_id
+            self._device_names[address] = name
+
+    @contextmanager
+    def _transaction(self):
+        """Run a transaction, forgetting devices it registered if it rolls back."""
+        try:
+            with self._connection:
+                yield
+        except Exception:
+            self._load_devices()
+            raise
+
+    def _close(self):
+        """Close the connection on the worker thread."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _device_id(self, address: str, name: Optional[str]) -> int:
+        """Return the integer id of a device, registering it on first sight."""
+        device_id = self._device_ids.get(address)
+        if device_id is None:
+            cursor = self._connection.execute(
+                "INSERT INTO devices (address, name) VALUES (?, ?)", (address, name)
+            )
+            device_id = self._device_ids[address] = cursor.lastrowid
+            self._device_names[address] = name
+        elif name and name != self._device_names.get(address):
+            self._connection.execute("UPDATE devices SET name = ? WHERE id = ?", (name, device_id))
+            self._device_names[address] = name
+        return device_id
+
+    def _row(self, reading: Dict[str, Any]) -> Tuple:
+        """Flatten a reading into a readings table row."""
+        device = reading["device"]
+        data = reading["data"]
+        sensors = data["sensors"]
+        temperature = sensors.get("temperature")
+        humidity = sensors.get("humidity")
+        battery = sensors.get("battery_voltage")
+        movement = sensors.get("movement")
+        magnetic = sensors.get("magnetic")
+        angle = sensors.get("angle")
+
+        return (
+            self._device_id(device["address"], device.get("name")),
+            timestamp_ms(data["timestamp"]),
+            device.get("rssi"),
+            temperature["value"] if temperature else None,
+            humidity["value"] if humidity else None,
+            battery["millivolts"] if battery else None,
+            movement["count"] if movement else None,
+            (movement["state"] == "moving") if movement else None,
+            magnetic["detected"] if magnetic else None,
+            angle["pitch"] if angle else None,
+            angle["roll"] if angle else None,
+            data["battery"]["low"],
+        )
+
+    def _write(self, readings: List[Dict[str, Any]]):
+        """Insert one batch of readings in a single transaction."""
+        with self._transaction():
+            cursor = self._connection.executemany(INSERT_READING, [self._row(reading) for reading in readings])
+        # Readings repeated from an earlier cycle are ignored by the primary key
+        self.rows_written += max(0, cursor.rowcount)
+
+        if self.retention_days and (
+            self._last_prune is None or time.monotonic() - self._last_prune >= PRUNE_INTERVAL
+        ):
+            self._prune()
+
+    def _write_rollups(self, records: List[Dict[str, Any]]):
+        """Merge one batch of rollup windows in a single transaction."""
+        with self._transaction():
+            self._connection.executemany(UPSERT_ROLLUP, [
+                (
+                    self._device_id(record["device"], None),
+                    record["metric"],
+                    record["window"],
+                    timestamp_ms(record["start"]),
+                    record["count"],
+                    record["total"],
+                    record["min"],
+                    record["max"],
+                )
+                for record in records
+            ])
+
+    def _prune(self):
+        """Delete readings older than the retention period."""
+        cutoff = int((time.time() - self.retention_days * 86400) * 1000)
+        with self._connection:
+            deleted = self._connection.execute("DELETE FROM readings WHERE ts < ?", (cutoff,)).rowcount
+        self._last_prune = time.monotonic()
+        if deleted:
+            self.logger.info(f"Pruned {deleted} readings older than {self.retention_days} days")
+
+    def _query(self, address: str, start_ms: int, end_ms: int) -> List[sqlite3.Row]:
+        """Run a time-range query on the worker thread."""
+        return self._connection.execute(
+            "SELECT r.* FROM readings r JOIN devices d ON d.id = r.device_id "
+            "WHERE d.address = ? AND r.ts BETWEEN ? AND ? ORDER BY r.ts",
+            (address, start_ms, end_ms)
+        ).fetchall()
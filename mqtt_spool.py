@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Disk-backed MQTT message spool
+
+Append-only, segment-based queue used by the MQTT bridge to keep messages
+while the broker is unreachable and replay them in order once it is back.
+Segments are capped in size; when the spool exceeds its total size limit
+the oldest segment is deleted first. Memory use does not depend on how much
+is spooled: only the active segment's write handle and the batch currently
+being replayed are held in memory.
+
+The replay position is saved next to the segments on every commit, so
+messages already replayed are not sent again after a restart.
+"""
+
+import logging
+import os
+import struct
+from pathlib import Path
+from typing import List, Tuple
+
+# Record header: topic length, payload length, QoS, retain flag
+RECORD_HEADER = struct.Struct(">HIBB")
+SEGMENT_SUFFIX = ".seg"
+# Replay position: oldest segment's name and the offset replayed up to
+OFFSET_FILE = "replay.offset"
+
+# Spooled message: topic, payload, QoS, retain
+SpoolRecord = Tuple[str, bytes, int, bool]
+
+
+class DiskSpool:
+    """Append-only segmented spool of MQTT messages on disk."""
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size_bytes: int = 1024 * 1024,
+        max_size_bytes: int = 100 * 1024 * 1024
+    ):
+        self.directory = Path(directory)
+        self.segment_size_bytes = segment_size_bytes
+        self.max_size_bytes = max_size_bytes
+        self.logger = logging.getLogger(__name__)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # Segment paths oldest first, with their sizes
+        self._segments: List[Path] = sorted(self.directory.glob(f"*{SEGMENT_SUFFIX}"))
+        self._sizes = {path: path.stat().st_size for path in self._segments}
+        self._next_sequence = (int(self._segments[-1].stem) + 1) if self._segments else 0
+        self._writer = None
+
+        # Replay position in the oldest segment: committed, and after the last read()
+        self._read_offset = self._load_offset()
+        self._pending_offset = self._read_offset
+
+        self.evicted_segments = 0
+
+    @property
+    def size_bytes(self) -> int:
+        """Total bytes on disk, including already replayed parts of the oldest segment."""
+        return sum(self._sizes.values())
+
+    @property
+    def empty(self) -> bool:
+        """True if every spooled message has been replayed and committed."""
+        if not self._segments:
+            return True
+        return len(self._segments) == 1 and self._read_offset >= self._sizes[self._segments[0]]
+
+    def append(self, topic: str, payload: bytes, qos: int = 0, retain: bool = False):
+        """Append a message to the newest segment."""
+        topic_bytes = topic.encode("utf-8")
+        record = RECORD_HEADER.pack(len(topic_bytes), len(payload), qos, int(retain)) + topic_bytes + payload
+
+        if self._writer is None or self._sizes[self._segments[-1]] >= self.segment_size_bytes:
+            self._roll_segment()
+
+        self._writer.write(record)
+        self._writer.flush()
+        self._sizes[self._segments[-1]] += len(record)
+
+        while self.size_bytes > self.max_size_bytes and len(self._segments) > 1:
+            self._delete_oldest()
+            self.evicted_segments += 1
+            self.logger.warning("Spool size limit reached, dropped oldest segment")
+
+    def read(self, max_records: int) -> List[SpoolRecord]:
+        """Return up to max_records messages, oldest first, without consuming them.
+
+        Call commit() once they have been delivered; otherwise the next read()
+        returns the same messages again.
+        """
+        if not self._segments:
+            return []
+
+        path = self._segments[0]
+        records = []
+        with open(path, "rb") as segment:
+            segment.seek(self._read_offset)
+            offset = self._read_offset
+            while len(records) < max_records:
+                header = segment.read(RECORD_HEADER.size)
+                if not header:
+                    break
+                if len(header) < RECORD_HEADER.size:
+                    offset = self._skip_torn_record(path)
+                    break
+                topic_length, payload_length, qos, retain = RECORD_HEADER.unpack(header)
+                body = segment.read(topic_length + payload_length)
+                if len(body) < topic_length + payload_length:
+                    offset = self._skip_torn_record(path)
+                    break
+                records.append((
+                    body[:topic_length].decode("utf-8"),
+                    body[topic_length:],
+                    qos,
+                    bool(retain)
+                ))
+                offset += RECORD_HEADER.size + topic_length + payload_length
+
+        self._pending_offset = offset
+        return records
+
+    def commit(self):
+        """Mark the messages returned by the last read() as delivered."""
+        if not self._segments:
+            return
+
+        self._read_offset = self._pending_offset
+        path = self._segments[0]
+        if self._read_offset < self._sizes[path]:
+            self._save_offset()
+            return
+
+        # Oldest segment fully replayed; if it is the active one, the next
+        # append starts a new segment
+        if len(self._segments) == 1:
+            self.close()
+        self._delete_oldest()
+
+    def close(self):
+        """Close the active segment."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def _load_offset(self) -> int:
+        """Return the saved replay position if it belongs to the oldest segment."""
+        try:
+            name, offset = (self.directory / OFFSET_FILE).read_text().split()
+            offset = int(offset)
+        except (OSError, ValueError):
+            return 0
+        if not self._segments or name != self._segments[0].name:
+            return 0
+        return min(offset, self._sizes[self._segments[0]])
+
+    def _save_offset(self):
+        """Save the replay position, replacing the previous one atomically."""
+        path = self.directory / OFFSET_FILE
+        temporary = path.with_suffix(".tmp")
+        try:
+            temporary.write_text(f"{self._segments[0].name} {self._read_offset}\n")
+            os.replace(temporary, path)
+        except OSError as e:
+            self.logger.warning("Could not save spool replay position: %s", e)
+
+    def _skip_torn_record(self, path: Path) -> int:
+        """Skip a partially written record at the end of a segment left by a crash."""
+        self.logger.warning("Skipping truncated record at the end of %s", path.name)
+        return self._sizes[path]
+
+    def _roll_segment(self):
+        """Start a new segment file."""
+        if self._writer is not None:
+            self._writer.close()
+        path = self.directory / f"{self._next_sequence:012d}{SEGMENT_SUFFIX}"
+        self._next_sequence += 1
+        self._writer = open(path, "ab")
+        self._segments.append(path)
+        self._sizes[path] = 0
+
+    def _delete_oldest(self):
+        """Remove the oldest segment and reset the replay position."""
+        path = self._segments.pop(0)
+        self._sizes.pop(path, None)
+        self._read_offset = 0
+        self._pending_offset = 0
+        for stale in (path, self.directory / OFFSET_FILE):
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
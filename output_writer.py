@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Background writer for monitor output
+
+OutputWriter does the monitor's output I/O on a dedicated thread: JSON
+encoding, stdout, appending to the output file, periodic fsync, size-based
+rotation and appending rollup records. The scan loop hands over each cycle
+through a bounded queue and returns at once, so a slow SD card or a blocked
+stdout pipe no longer stretches scan cycles. If the queue is full, the
+cycle is dropped from the output and counted instead of stalling the scan.
+
+close() writes everything still queued, then syncs and closes the file.
+An error while writing or rotating is logged and the thread carries on.
+"""
+
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Queue item kinds
+READINGS = "readings"
+ROLLUPS = "rollups"
+
+
+class OutputWriter:
+    """Writes readings to stdout and the output file from a background thread."""
+
+    def __init__(
+        self,
+        output_file: Optional[str] = None,
+        max_size_bytes: int = 100 * 1024 * 1024,
+        fsync_interval: float = 60.0,
+        rollup_file: Optional[str] = None,
+        archiver=None,
+        max_queue: int = 100,
+        logger: Optional[logging.Logger] = None
+    ):
+        self.output_file = output_file
+        self.max_size_bytes = max_size_bytes
+        self.fsync_interval = fsync_interval
+        self.rollup_file = rollup_file
+        self.archiver = archiver
+        self.logger = logger or logging.getLogger(__name__)
+
+        # Batches dropped because the queue was full
+        self.dropped = 0
+
+        # Output file handle and size; only touched by the writer thread
+        self._handle = None
+        self._bytes = 0
+        self._last_fsync = time.monotonic()
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="output-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        """Batches waiting to be written."""
+        return self._queue.qsize()
+
+    def submit(self, readings: List[Dict[str, Any]]):
+        """Queue a cycle's readings for output without blocking."""
+        self._put((READINGS, readings))
+
+    def submit_rollups(self, records: List[Dict[str, Any]]):
+        """Queue closed rollup windows for the rollup file without blocking."""
+        if self.rollup_file:
+            self._put((ROLLUPS, records))
+
+    def close(self, timeout: float = 30.0):
+        """Write everything queued, then sync and close the output file.
+
+        Gives up after timeout seconds if the writer is stuck, for example on
+        a blocked stdout pipe, so shutdown cannot hang.
+        """
+        if not self._thread.is_alive():
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            self.logger.error(f"Output writer stuck, {self.queue_depth} batches not written")
+            return
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+        if self._thread.is_alive():
+            self.logger.error("Output writer did not finish within the shutdown timeout")
+
+    def _put(self, item):
+        """Queue an item, dropping it if the writer has fallen too far behind."""
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            self.logger.warning(f"Output queue full, dropped a batch of {len(item[1])} ({self.dropped} so far)")
+
+    def _run(self):
+        """Writer thread: drain the queue, syncing the file every fsync_interval."""
+        while True:
+            try:
+                item = self._queue.get(timeout=self.fsync_interval or None)
+            except queue.Empty:
+                self._sync()
+                continue
+            if item is None:
+                break
+
+            kind, batch = item
+            try:
+                if kind == READINGS:
+                    self._write_readings(batch)
+                    self._rotate()
+                else:
+                    self._write_rollups(batch)
+                self._sync()
+            except Exception as e:
+                self.logger.error(f"Output writer error: {e}")
+
+        self._close()
+
+    def _write_readings(self, readings: List[Dict[str, Any]]):
+        """Write a cycle's readings to stdout and the output file, one write each."""
+        output = "".join(json.dumps(reading, separators=(',', ':')) + "\n" for reading in readings)
+
+        # Always output to stdout for piping
+        try:
+            sys.stdout.write(output)
+            sys.stdout.flush()
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Failed to write to stdout: {e}")
+
+        if not self.output_file:
+            return
+        try:
+            if self._handle is None:
+                self._open()
+            data = output.encode("utf-8")
+            self._handle.write(data)
+            # Hand the cycle to the OS now; fsync happens on its own interval
+            self._handle.flush()
+            self._bytes += len(data)
+        except Exception as e:
+            self.logger.error(f"Failed to write to output file: {e}")
+            self._discard()
+
+    def _write_rollups(self, records: List[Dict[str, Any]]):
+        """Append closed rollup windows to the rollup file."""
+        try:
+            with open(self.rollup_file, "a") as f:
+                f.write("".join(json.dumps(record, separators=(',', ':')) + "\n" for record in records))
+        except Exception as e:
+            self.logger.error(f"Failed to write to rollup file: {e}")
+
+    def _open(self):
+        """Open the output file for appending and pick up its current size."""
+        self._handle = open(self.output_file, "ab", buffering=64 * 1024)
+        self._bytes = self._handle.tell()
+
+    def _sync(self, force: bool = False):
+        """Flush the output file to disk every fsync_interval seconds, or now if forced."""
+        if self._handle is None:
+            return
+
+        now = time.monotonic()
+        if not force and now - self._last_fsync < self.fsync_interval:
+            return
+
+        try:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+        except OSError as e:
+            self.logger.error(f"Failed to sync output file: {e}")
+        self._last_fsync = now
+
+    def _close(self):
+        """Sync and close the output file."""
+        if self._handle is None:
+            return
+
+        self._sync(force=True)
+        try:
+            self._handle.close()
+        except OSError as e:
+            self.logger.error(f"Failed to close output file: {e}")
+        self._handle = None
+
+    def _discard(self):
+        """Close the output file after a write error, without syncing; it is reopened on the next write."""
+        if self._handle is None:
+            return
+        try:
+            self._handle.close()
+        except OSError:
+            pass
+        self._handle = None
+
+    def _rotate(self):
+        """Rotate the output file once it exceeds max_size_bytes."""
+        if self._handle is None or self._bytes <= self.max_size_bytes:
+            return
+
+        self._close()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_name = f"{self.output_file}.{timestamp}"
+        try:
+            Path(self.output_file).rename(backup_name)
+        except OSError as e:
+            # Keep appending to the current file and retry after the next cycle
+            self.logger.error(f"Failed to rotate output file: {e}")
+            return
+        self.logger.info(f"Rotated output file to {backup_name}")
+
+        # Compression happens on the archiver's own thread
+        if self.archiver is not None:
+            self.archiver.submit(backup_name)
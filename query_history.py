@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Query recorded Teltonika EYE readings by device and time range
+
+Reads the output of continuous_monitor.py, meaning the live output file, its
+rotated segments and their compressed archives, and streams the readings that
+match as JSONL or CSV. Work per segment is kept to a minimum:
+
+- A compressed segment's index (see segment_archive.py) gives its time range
+  and devices. Segments that cannot match are skipped without being opened,
+  and only the blocks overlapping the range are read and decompressed.
+- Plain segments are time-ordered, so the start of the range is found by
+  binary search on byte offsets, and reading stops once it is passed.
+- Lines are filtered on the raw bytes (device address, timestamp) before any
+  JSON parsing.
+
+Segments are queried in parallel by a process pool; output stays in time order.
+
+Example:
+    python3 query_history.py sensor_readings.json --device 7C:D9:F4:00:11:22 \\
+        --start 2025-06-10 --end 2025-06-11 --format csv > readings.csv
+"""
+
+import csv
+import gzip
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
+import segment_archive
+
+# Monitor readings are appended per scan cycle, so timestamps in a plain
+# segment can run backwards by up to a cycle; seeking allows this much slack
+ORDER_SLACK_MS = 5 * 60 * 1000
+
+# Binary search stops once the window is this small and scans the rest
+SEEK_WINDOW_BYTES = 64 * 1024
+
+TIMESTAMP = re.compile(rb'"timestamp":\s*"([^"]+)"')
+
+CSV_COLUMNS = [
+    "timestamp", "address", "name", "rssi", "temperature", "humidity", "battery_voltage",
+    "movement_count", "movement_state", "magnetic", "pitch", "roll", "low_battery",
+]
+
+
+def parse_time(value: str) -> int:
+    """Parse an ISO date or time (UTC unless it has an offset) to epoch milliseconds."""
+    parsed = datetime.fromisoformat(value.rstrip("Z"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+def line_timestamp_ms(line: bytes) -> Optional[int]:
+    """Return the timestamp of a raw reading line without parsing the JSON."""
+    match = TIMESTAMP.search(line)
+    if match is None:
+        return None
+    try:
+        return parse_time(match.group(1).decode())
+    except ValueError:
+        return None
+
+
+def _matches(line: bytes, start_ms: int, end_ms: int, devices: Optional[Sequence[bytes]]) -> bool:
+    """Return True if a raw line is a reading from one of devices within the range."""
+    if devices is not None and not any(device in line for device in devices):
+        return False
+    timestamp = line_timestamp_ms(line)
+    return timestamp is not None and start_ms <= timestamp <= end_ms
+
+
+def _seek_plain(handle, size: int, target_ms: int) -> int:
+    """Return an offset at or before the first line with a timestamp >= target_ms."""
+    low, high = 0, size
+    while high - low > SEEK_WINDOW_BYTES:
+        middle = (low + high) // 2
+        handle.seek(middle)
+        handle.readline()  # skip the partial line
+
+        timestamp = None
+        while timestamp is None:
+            line = handle.readline()
+            if not line:
+                break
+            timestamp = line_timestamp_ms(line)
+
+        if timestamp is not None and timestamp < target_ms:
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def _query_plain(path: str, start_ms: int, end_ms: int, devices: Optional[Sequence[bytes]]) -> List[bytes]:
+    """Return matching lines from an uncompressed segment."""
+    matches = []
+    with open(path, "rb") as handle:
+        offset = _seek_plain(handle, os.path.getsize(path), start_ms - ORDER_SLACK_MS)
+        handle.seek(offset)
+        if offset:
+            handle.readline()
+
+        for line in handle:
+            timestamp = line_timestamp_ms(line)
+            if timestamp is None:
+                continue
+            if timestamp > end_ms + ORDER_SLACK_MS:
+                break
+            if start_ms <= timestamp <= end_ms and (
+                devices is None or any(device in line for device in devices)
+            ):
+                matches.append(line)
+    return matches
+
+
+def _query_archive(path: str, start_ms: int, end_ms: int, devices: Optional[Sequence[bytes]]) -> List[bytes]:
+    """Return matching lines from a compressed segment, reading only the blocks needed."""
+    index = segment_archive.load_index(path)
+    if index is None:
+        # No index: decompress the whole segment
+        opener = gzip.open if path.endswith(".gz") else segment_archive.zstandard.open
+        with opener(path, "rb") as handle:
+            return [line for line in handle if _matches(line, start_ms, end_ms, devices)]
+
+    matches = []
+    with open(path, "rb") as handle:
+        for first_ts, last_ts, offset, length in index["blocks"]:
+            if first_ts is None or last_ts < start_ms or first_ts > end_ms:
+                continue
+            handle.seek(offset)
+            block = segment_archive.decompress_block(index["compression"], handle.read(length))
+            matches.extend(
+                line for line in block.splitlines(keepends=True)
+                if _matches(line, start_ms, end_ms, devices)
+            )
+    return matches
+
+
+def query_segment(path: str, start_ms: int, end_ms: int, devices: Optional[Sequence[bytes]]) -> List[bytes]:
+    """Return the raw reading lines in one segment that match the query."""
+    if path.endswith((".gz", ".zst")):
+        return _query_archive(path, start_ms, end_ms, devices)
+    return _query_plain(path, start_ms, end_ms, devices)
+
+
+def find_segments(output_file: str, start_ms: int, end_ms: int, devices: Optional[Sequence[str]]) -> List[str]:
+    """Return the segments of a monitor output file that may hold matching readings, oldest first."""
+    # Keyed by rotated name; an archive replaces the plain segment it was made from
+    segments = {str(path): str(path) for path in segment_archive.rotated_segments(output_file)}
+    for path in segment_archive.archived_segments(output_file):
+        name = str(path)[:-len(path.suffix)]
+        segments[name] = str(path)
+
+        index = segment_archive.load_index(str(path))
+        if index is None:
+            continue
+        if (
+            index["first_ts"] is None or index["last_ts"] < start_ms or index["first_ts"] > end_ms
+            or devices is not None and not set(devices) & set(index["devices"])
+        ):
+            del segments[name]
+
+    segments = [path for _name, path in sorted(segments.items())]
+
+    if Path(output_file).exists():
+        segments.append(output_file)
+    return segments
+
+
+def query(
+    output_file: str,
+    start_ms: int,
+    end_ms: int,
+    devices: Optional[Sequence[str]] = None,
+    workers: Optional[int] = None
+) -> Iterator[bytes]:
+    """Yield the raw reading lines matching the query, in time order."""
+    segments = find_segments(output_file, start_ms, end_ms, devices)
+    device_bytes = [device.encode() for device in devices] if devices else None
+
+    if len(segments) <= 1 or workers == 1:
+        for path in segments:
+            yield from query_segment(path, start_ms, end_ms, device_bytes)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        task = partial(query_segment, start_ms=start_ms, end_ms=end_ms, devices=device_bytes)
+        for lines in executor.map(task, segments):
+            yield from lines
+
+
+def csv_row(reading: dict) -> list:
+    """Flatten a reading into the CSV_COLUMNS values."""
+    device = reading["device"]
+    data = reading["data"]
+    sensors = data.get("sensors", {})
+    movement = sensors.get("movement", {})
+    angle = sensors.get("angle", {})
+    return [
+        data.get("timestamp"),
+        device.get("address"),
+        device.get("name"),
+        device.get("rssi"),
+        sensors.get("temperature", {}).get("value"),
+        sensors.get("humidity", {}).get("value"),
+        sensors.get("battery_voltage", {}).get("value"),
+        movement.get("count"),
+        movement.get("state"),
+        sensors.get("magnetic", {}).get("detected"),
+        angle.get("pitch"),
+        angle.get("roll"),
+        data.get("battery", {}).get("low"),
+    ]
+
+
+def main():
+    """Command-line entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query recorded Teltonika EYE readings")
+    parser.add_argument("output_file", help="Output file given to continuous_monitor.py (--output-file)")
+    parser.add_argument("--device", action="append", help="Device MAC address (repeatable; default: all)")
+    parser.add_argument("--start", help="Start of the range, ISO date or time, UTC unless an offset is given")
+    parser.add_argument("--end", help="End of the range, inclusive (default: now)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl", help="Output format (default: jsonl)")
+    parser.add_argument("--workers", type=int, help="Segments queried in parallel (default: CPU count)")
+    args = parser.parse_args()
+
+    try:
+        start_ms = parse_time(args.start) if args.start else 0
+        end_ms = parse_time(args.end) if args.end else int(datetime.now(timezone.utc).timestamp() * 1000)
+    except ValueError as e:
+        parser.error(f"Invalid time: {e}")
+    devices = [device.upper() for device in args.device] if args.device else None
+
+    count = 0
+    try:
+        if args.format == "csv":
+            writer = csv.writer(sys.stdout)
+            writer.writerow(CSV_COLUMNS)
+            for line in query(args.output_file, start_ms, end_ms, devices, args.workers):
+                writer.writerow(csv_row(json.loads(line)))
+                count += 1
+        else:
+            for line in query(args.output_file, start_ms, end_ms, devices, args.workers):
+                sys.stdout.buffer.write(line)
+                count += 1
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Output piped into head or similar; silence the flush at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+
+    print(f"{count} readings", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Streaming minute/hour rollups of Teltonika EYE readings
+
+RollupEngine keeps, for each device, metric and window size, the count, sum,
+minimum and maximum of the windows that are still open. Memory per series is
+constant. Windows are closed once the watermark (wall clock minus a grace
+period) passes their end. Readings that arrive late or out of order still
+count as long as their window is open. Readings for a window that has
+already been emitted are dropped and counted.
+
+A window cut short by a restart is emitted in two parts. Records carry the
+count and sum rather than only the mean, so the parts can be merged (the
+SQLite store does this on insert).
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from state_codec import timestamp_ms
+
+# Metric -> (sensors key, value key); None reads the device's RSSI
+ROLLUP_METRICS: Dict[str, Tuple[Optional[str], str]] = {
+    "temperature": ("temperature", "value"),
+    "humidity": ("humidity", "value"),
+    "battery_voltage": ("battery_voltage", "value"),
+    "pitch": ("angle", "pitch"),
+    "roll": ("angle", "roll"),
+    "rssi": (None, "rssi"),
+}
+
+# Open window aggregate: [count, total, minimum, maximum]
+Aggregate = List[float]
+
+
+def window_record(window: int, start_ms: int, series: Tuple[str, str], aggregate: Aggregate) -> Dict[str, Any]:
+    """Build the output record of one closed window."""
+    count, total, minimum, maximum = aggregate
+    return {
+        "window": window,
+        "start": datetime.fromtimestamp(start_ms / 1000, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "device": series[0],
+        "metric": series[1],
+        "count": int(count),
+        "total": total,
+        "min": minimum,
+        "max": maximum,
+        "mean": total / count,
+    }
+
+
+class RollupEngine:
+    """Incremental per-device, per-metric window aggregates."""
+
+    def __init__(self, windows: Sequence[int] = (60, 3600), grace_seconds: float = 60.0):
+        self.windows = sorted(windows)
+        self.grace_ms = int(grace_seconds * 1000)
+
+        # Window size -> window start (ms) -> (address, metric) -> aggregate
+        self._open: Dict[int, Dict[int, Dict[Tuple[str, str], Aggregate]]] = {
+            window: {} for window in self.windows
+        }
+        # Window size -> start of the oldest window that may still be open
+        self._closed_until: Dict[int, int] = {window: 0 for window in self.windows}
+
+        self.late_dropped: Dict[int, int] = {window: 0 for window in self.windows}
+
+    def add(self, reading: Dict[str, Any]):
+        """Add one reading's metrics to every window it falls in."""
+        timestamp = timestamp_ms(reading["data"]["timestamp"])
+        address = reading["device"]["address"]
+        sensors = reading["data"]["sensors"]
+
+        values = []
+        for metric, (sensor, key) in ROLLUP_METRICS.items():
+            source = reading["device"] if sensor is None else sensors.get(sensor)
+            value = source.get(key) if source else None
+            if value is not None:
+                values.append((metric, value))
+
+        for window in self.windows:
+            size = window * 1000
+            start = timestamp - timestamp % size
+            if start < self._closed_until[window]:
+                self.late_dropped[window] += 1
+                continue
+
+            series = self._open[window].setdefault(start, {})
+            for metric, value in values:
+                aggregate = series.get((address, metric))
+                if aggregate is None:
+                    series[(address, metric)] = [1, value, value, value]
+                else:
+                    aggregate[0] += 1
+                    aggregate[1] += value
+                    if value < aggregate[2]:
+                        aggregate[2] = value
+                    if value > aggregate[3]:
+                        aggregate[3] = value
+
+    def advance(self, now_ms: int) -> List[Dict[str, Any]]:
+        """Close and return the windows that ended before now_ms minus the grace period."""
+        watermark = now_ms - self.grace_ms
+        records = []
+        for window in self.windows:
+            size = window * 1000
+            open_windows = self._open[window]
+            for start in sorted(open_windows):
+                if start + size > watermark:
+                    break
+                records.extend(
+                    window_record(window, start, series, aggregate)
+                    for series, aggregate in open_windows.pop(start).items()
+                )
+            self._closed_until[window] = max(self._closed_until[window], watermark - watermark % size)
+        return records
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Close and return every open window, complete or not (used at shutdown)."""
+        records = []
+        for window in self.windows:
+            open_windows = self._open[window]
+            for start in sorted(open_windows):
+                records.extend(
+                    window_record(window, start, series, aggregate)
+                    for series, aggregate in open_windows[start].items()
+                )
+            open_windows.clear()
+        return records
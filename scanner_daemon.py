@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Resident Teltonika EYE scanner serving readings over a Unix domain socket
+
+One long-lived process owns the Bluetooth adapter and scans continuously.
+Local programs connect to the socket (see teltonika_eye_client.py) instead of
+each starting a Python interpreter and a scan of their own.
+
+Protocol: the client sends one JSON request line, then reads JSONL readings
+in the scanner's output format.
+
+    {"mode": "stream", "devices": ["7C:D9:F4:00:11:22"]}
+        Every reading from the listed devices (all devices if omitted) as it
+        arrives, until the client disconnects.
+    {"mode": "latest", "max_age": 60}
+        The latest reading of each device seen in the last max_age seconds,
+        then the connection is closed.
+
+Each reading is encoded once, however many subscribers receive it. Every
+stream subscriber has a bounded queue. A subscriber that falls behind loses
+readings (counted and logged) rather than holding up the scanner or others.
+
+With shm_name set, the daemon also keeps every sensor's latest state in a
+shared-memory table (see shm_state.py) for readers that poll it directly.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Any, Dict, Optional, Set
+
+from shm_state import SharedStateWriter
+from teltonika_eye_scanner import TeltonikaEYEScanner
+
+DEFAULT_SOCKET = "/tmp/teltonika-eye.sock"
+
+
+def encode_reading(reading: Dict[str, Any]) -> bytes:
+    """Encode a reading as one JSONL line."""
+    return (json.dumps(reading, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class _Subscriber:
+    """A stream client: its device filter and outgoing queue."""
+
+    __slots__ = ("devices", "queue", "dropped")
+
+    def __init__(self, devices: Optional[Set[str]], max_queue: int):
+        self.devices = devices
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+
+class ScannerDaemon:
+    """Continuous BLE scan fanned out to Unix socket subscribers."""
+
+    def __init__(
+        self,
+        socket_path: str = DEFAULT_SOCKET,
+        max_client_queue: int = 1000,
+        shm_name: Optional[str] = None
+    ):
+        self.socket_path = socket_path
+        self.max_client_queue = max_client_queue
+        self.logger = logging.getLogger(__name__)
+
+        self.scanner = TeltonikaEYEScanner(output_format="none", reading_callback=self._on_reading)
+        # Address -> time.monotonic() of its latest reading
+        self._last_seen: Dict[str, float] = {}
+        self._subscribers: Set[_Subscriber] = set()
+        self._stopped = asyncio.Event()
+        self.shared_state = SharedStateWriter(shm_name) if shm_name else None
+
+    def stop(self):
+        """Ask run() to shut down."""
+        self._stopped.set()
+
+    async def run(self):
+        """Serve until stop() is called or SIGINT/SIGTERM arrives."""
+        self._remove_stale_socket()
+        server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path)
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.stop)
+
+        self.logger.info(f"Serving readings on {self.socket_path}")
+        try:
+            await self.scanner.start()
+            await self._stopped.wait()
+        finally:
+            await self.scanner.stop()
+            server.close()
+            await server.wait_closed()
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+            if self.shared_state is not None:
+                self.shared_state.close()
+
+    def _remove_stale_socket(self):
+        """Remove a socket file left by a daemon that is no longer running."""
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(self.socket_path)
+        else:
+            raise RuntimeError(f"A scanner daemon is already serving {self.socket_path}")
+        finally:
+            probe.close()
+
+    def _on_reading(self, reading: Dict[str, Any]):
+        """Fan a reading out to the subscribers that want it."""
+        address = reading["device"]["address"]
+        self._last_seen[address] = time.monotonic()
+        if self.shared_state is not None:
+            self.shared_state.update(reading)
+
+        line = None
+        for subscriber in self._subscribers:
+            if subscriber.devices is not None and address not in subscriber.devices:
+                continue
+            if line is None:
+                line = encode_reading(reading)
+            try:
+                subscriber.queue.put_nowait(line)
+            except asyncio.QueueFull:
+                subscriber.dropped += 1
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Read a client's request and serve it."""
+        try:
+            request = json.loads(await asyncio.wait_for(reader.readline(), 5) or b"{}")
+            devices = {address.upper() for address in request["devices"]} if request.get("devices") else None
+            if request.get("mode", "stream") == "latest":
+                await self._send_latest(writer, devices, float(request.get("max_age", 60)))
+            else:
+                await self._stream(reader, writer, devices)
+        except (ValueError, TypeError, AttributeError, KeyError) as e:
+            writer.write(encode_reading({"error": f"Invalid request: {e}"}))
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send_latest(self, writer: asyncio.StreamWriter, devices: Optional[Set[str]], max_age: float):
+        """Send the latest reading of each recently seen device."""
+        cutoff = time.monotonic() - max_age
+        for address, seen in self._last_seen.items():
+            if seen >= cutoff and (devices is None or address in devices):
+                writer.write(encode_reading(self.scanner.devices_found[address]))
+        await writer.drain()
+
+    async def _stream(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, devices: Optional[Set[str]]
+    ):
+        """Stream readings to a subscriber until it disconnects."""
+        subscriber = _Subscriber(devices, self.max_client_queue)
+        self._subscribers.add(subscriber)
+        # A client that disconnects while its devices are quiet wakes the loop below
+        watcher = asyncio.create_task(self._wait_for_eof(reader, subscriber))
+        try:
+            while True:
+                line = await subscriber.queue.get()
+                if line is None:
+                    break
+                writer.write(line)
+                await writer.drain()
+        finally:
+            self._subscribers.discard(subscriber)
+            watcher.cancel()
+            if subscriber.dropped:
+                self.logger.warning(f"Subscriber fell behind; {subscriber.dropped} readings dropped")
+
+    async def _wait_for_eof(self, reader: asyncio.StreamReader, subscriber: _Subscriber):
+        """Wake a subscriber's stream when the client closes its end."""
+        await reader.read()
+        try:
+            subscriber.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            # The stream is busy writing and will see the closed connection
+            pass
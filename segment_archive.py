@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Background compression and retention for rotated monitor output
+
+When ContinuousMonitor rotates its output file, the finished segment is
+handed to a SegmentArchiver. On a background thread, the archiver compresses
+it into blocks of about block_bytes of readings. Each block is a separate gzip
+member (or zstd frame), so the archive still decompresses with zcat (or zstdcat)
+while any block can be read on its own. A JSON index next to the archive
+records the segment's time range and devices, plus each block's time range
+and offset. Archives beyond the total size or age limit are deleted, oldest
+first.
+
+Index format (<archive>.idx):
+
+    {"version": 1, "compression": "gzip", "readings": 12000,
+     "first_ts": 1791849600000, "last_ts": 1791935999000,
+     "devices": ["7C:D9:F4:00:11:22", ...],
+     "blocks": [[first_ts, last_ts, offset, length], ...]}
+
+Timestamps are epoch milliseconds (UTC); offset and length are bytes in the
+compressed archive.
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for zstd compression
+    zstandard = None
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".idx"
+ARCHIVE_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+# Suffix ContinuousMonitor gives rotated segments: .YYYYmmdd_HHMMSS
+ROTATED_SUFFIX = re.compile(r"\.\d{8}_\d{6}$")
+
+
+def reading_timestamp_ms(reading: Dict[str, Any]) -> Optional[int]:
+    """Return a reading's timestamp in epoch milliseconds, or None if it has none."""
+    try:
+        parsed = datetime.fromisoformat(reading["data"]["timestamp"].rstrip("Z"))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+def compress_block(compression: str, data: bytes) -> bytes:
+    """Compress one block as a self-contained gzip member or zstd frame."""
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def decompress_block(compression: str, data: bytes) -> bytes:
+    """Decompress one block written by compress_block."""
+    if compression == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def load_index(archive_path: str) -> Optional[Dict[str, Any]]:
+    """Load the index of an archive, or None if it is missing or unreadable."""
+    try:
+        with open(archive_path + INDEX_SUFFIX, encoding="utf-8") as handle:
+            index = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    return index if index.get("version") == INDEX_VERSION else None
+
+
+def rotated_segments(output_file: str) -> List[Path]:
+    """Return the rotated but uncompressed segments of an output file, oldest first."""
+    output_file = Path(output_file)
+    return sorted(
+        path for path in output_file.parent.glob(output_file.name + ".*")
+        if ROTATED_SUFFIX.search(path.name[len(output_file.name):])
+    )
+
+
+def archived_segments(output_file: str) -> List[Path]:
+    """Return the compressed segments of an output file, oldest first."""
+    output_file = Path(output_file)
+    return sorted(
+        path for path in output_file.parent.glob(output_file.name + ".*")
+        if path.suffix in (".gz", ".zst")
+        and ROTATED_SUFFIX.search(path.name[len(output_file.name):-len(path.suffix)])
+    )
+
+
+def archive_segment(path: str, compression: str = "gzip", block_bytes: int = 256 * 1024) -> str:
+    """Compress a rotated segment into an indexed block archive and remove it.
+
+    Returns the archive path. The archive and index are written under
+    temporary names and renamed into place, so a crash leaves either the
+    original segment or a complete archive.
+    """
+    archive_path = path + ARCHIVE_SUFFIXES[compression]
+    temporary_archive = archive_path + ".tmp"
+    temporary_index = archive_path + INDEX_SUFFIX + ".tmp"
+
+    blocks: List[List[int]] = []
+    devices = set()
+    readings = 0
+    offset = 0
+
+    with open(path, "rb") as source, open(temporary_archive, "wb") as archive:
+        lines: List[bytes] = []
+        size = 0
+        first_ts: Optional[int] = None
+        last_ts: Optional[int] = None
+
+        def write_block():
+            nonlocal offset
+            data = compress_block(compression, b"".join(lines))
+            archive.write(data)
+            blocks.append([first_ts, last_ts, offset, len(data)])
+            offset += len(data)
+
+        for line in source:
+            try:
+                reading = json.loads(line)
+                timestamp = reading_timestamp_ms(reading)
+                devices.add(reading["device"]["address"])
+            except (ValueError, KeyError, TypeError):
+                timestamp = None
+            if timestamp is not None:
+                first_ts = timestamp if first_ts is None else min(first_ts, timestamp)
+                last_ts = timestamp if last_ts is None else max(last_ts, timestamp)
+
+            lines.append(line)
+            size += len(line)
+            readings += 1
+
+            if size >= block_bytes:
+                write_block()
+                lines, size, first_ts, last_ts = [], 0, None, None
+
+        if lines:
+            write_block()
+
+        archive.flush()
+        os.fsync(archive.fileno())
+
+    timestamps = [ts for block in blocks for ts in block[:2] if ts is not None]
+    index = {
+        "version": INDEX_VERSION,
+        "compression": compression,
+        "readings": readings,
+        "first_ts": min(timestamps) if timestamps else None,
+        "last_ts": max(timestamps) if timestamps else None,
+        "devices": sorted(devices),
+        "blocks": blocks,
+    }
+    with open(temporary_index, "w", encoding="utf-8") as handle:
+        json.dump(index, handle, separators=(",", ":"))
+
+    os.replace(temporary_archive, archive_path)
+    os.replace(temporary_index, archive_path + INDEX_SUFFIX)
+    os.remove(path)
+    return archive_path
+
+
+class SegmentArchiver:
+    """Compresses rotated segments and enforces retention on a background thread."""
+
+    def __init__(
+        self,
+        output_file: str,
+        compression: str = "gzip",
+        max_total_bytes: Optional[int] = None,
+        max_age_days: Optional[float] = None,
+        block_bytes: int = 256 * 1024
+    ):
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("zstd compression requires the zstandard package")
+
+        self.output_file = Path(output_file)
+        self.compression = compression
+        self.max_total_bytes = max_total_bytes
+        self.max_age_days = max_age_days
+        self.block_bytes = block_bytes
+        self.logger = logging.getLogger(__name__)
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="segment-archiver")
+
+    def submit(self, segment_path: str):
+        """Queue a rotated segment for compression; returns immediately."""
+        future = self._executor.submit(self._archive, segment_path)
+        future.add_done_callback(self._log_failure)
+
+    def submit_pending(self):
+        """Queue rotated segments left uncompressed by an earlier run."""
+        for path in rotated_segments(self.output_file):
+            self.submit(str(path))
+
+    def close(self):
+        """Wait for the segment being compressed; queued ones are picked up next start."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _archive(self, segment_path: str):
+        """Compress one segment, then apply retention."""
+        started = time.monotonic()
+        original_size = os.path.getsize(segment_path)
+        archive_path = archive_segment(segment_path, self.compression, self.block_bytes)
+        self.logger.info(
+            f"Compressed {segment_path} ({original_size} -> {os.path.getsize(archive_path)} bytes) "
+            f"in {time.monotonic() - started:.1f}s"
+        )
+        self._enforce_retention()
+
+    def _enforce_retention(self):
+        """Delete the oldest archives beyond the size or age limit."""
+        archives = archived_segments(self.output_file)
+        sizes = {path: path.stat().st_size for path in archives}
+        total = sum(sizes.values())
+        cutoff = time.time() - self.max_age_days * 86400 if self.max_age_days else None
+
+        for path in archives:
+            too_big = self.max_total_bytes is not None and total > self.max_total_bytes
+            too_old = cutoff is not None and path.stat().st_mtime < cutoff
+            if not (too_big or too_old):
+                break
+            path.unlink()
+            Path(str(path) + INDEX_SUFFIX).unlink(missing_ok=True)
+            total -= sizes[path]
+            self.logger.info(f"Deleted archived segment {path} (retention)")
+
+    def _log_failure(self, future):
+        """Log a failed archive job."""
+        if not future.cancelled() and future.exception() is not None:
+            self.logger.error(f"Failed to archive segment: {future.exception()}")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Streaming per-sensor statistics and anomaly detection
+
+SensorStats keeps running statistics for temperature, humidity and battery
+voltage of every sensor: count, Welford mean and variance, an EWMA, and the
+rate of change. Each (sensor, metric) series is a fixed-size slot in one
+flat array of doubles, so memory per series is constant and small. Each
+reading is checked in O(1) for:
+
+- spike: the value is more than spike_sigma standard deviations from the EWMA
+  (once the series has min_samples readings)
+- jump: the rate of change is physically implausible for the metric
+- stuck: the value has not changed at all for longer than is plausible
+
+A stuck series is reported once, and again only after it has changed.
+"""
+
+import math
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from state_codec import timestamp_ms
+
+# Metric -> (sensors key, largest plausible change per minute, seconds
+# unchanged before the value counts as stuck; None disables the check)
+METRIC_LIMITS: Dict[str, Tuple[str, float, Optional[float]]] = {
+    "temperature": ("temperature", 10.0, 3 * 3600),
+    "humidity": ("humidity", 30.0, 24 * 3600),
+    "battery_voltage": ("battery_voltage", 0.5, None),
+}
+
+# Slot layout in the statistics array
+COUNT, MEAN, M2, EWMA, LAST_VALUE, LAST_TS, RATE, UNCHANGED_SINCE, STUCK_REPORTED = range(9)
+SLOT_SIZE = 9
+
+
+def _anomaly(kind: str, reading: Dict[str, Any], metric: str, value: float, **details) -> Dict[str, Any]:
+    """Build an anomaly event."""
+    return {
+        "kind": kind,
+        "device": reading["device"]["address"],
+        "metric": metric,
+        "value": value,
+        "timestamp": reading["data"]["timestamp"],
+        **details,
+    }
+
+
+class SensorStats:
+    """Per-sensor running statistics with spike, jump and stuck-value detection."""
+
+    def __init__(self, ewma_alpha: float = 0.1, spike_sigma: float = 4.0, min_samples: int = 20):
+        self.ewma_alpha = ewma_alpha
+        self.spike_sigma = spike_sigma
+        self.min_samples = min_samples
+
+        # (address, metric) -> slot number; slot fields live in _values
+        self._slots: Dict[Tuple[str, str], int] = {}
+        self._values = array("d")
+
+    def _slot(self, address: str, metric: str) -> int:
+        """Return the array offset of a series, allocating it on first use."""
+        slot = self._slots.get((address, metric))
+        if slot is None:
+            slot = self._slots[(address, metric)] = len(self._values)
+            self._values.extend([0.0] * SLOT_SIZE)
+        return slot
+
+    def update(self, reading: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Add a reading to its sensor's statistics and return any anomalies it shows."""
+        address = reading["device"]["address"]
+        sensors = reading["data"]["sensors"]
+        anomalies = []
+        timestamp = None
+        stats = self._values
+
+        for metric, (sensor, max_rate, stuck_after) in METRIC_LIMITS.items():
+            if sensor not in sensors:
+                continue
+            value = sensors[sensor]["value"]
+            if timestamp is None:
+                timestamp = timestamp_ms(reading["data"]["timestamp"]) / 1000
+            base = self._slot(address, metric)
+
+            count = stats[base + COUNT]
+            if count:
+                # Checks use the statistics from before this reading
+                elapsed = timestamp - stats[base + LAST_TS]
+                change = value - stats[base + LAST_VALUE]
+                if elapsed > 0:
+                    rate = change / elapsed * 60
+                    stats[base + RATE] = rate
+                    if abs(rate) > max_rate:
+                        anomalies.append(_anomaly(
+                            "jump", reading, metric, value,
+                            previous=stats[base + LAST_VALUE], rate_per_minute=round(rate, 3)
+                        ))
+
+                if count >= self.min_samples:
+                    stddev = math.sqrt(stats[base + M2] / (count - 1))
+                    ewma = stats[base + EWMA]
+                    if stddev > 0 and abs(value - ewma) > self.spike_sigma * stddev:
+                        anomalies.append(_anomaly(
+                            "spike", reading, metric, value,
+                            ewma=round(ewma, 3), stddev=round(stddev, 3)
+                        ))
+
+                if change:
+                    stats[base + UNCHANGED_SINCE] = timestamp
+                    stats[base + STUCK_REPORTED] = 0
+                elif (
+                    stuck_after is not None and not stats[base + STUCK_REPORTED]
+                    and timestamp - stats[base + UNCHANGED_SINCE] >= stuck_after
+                ):
+                    stats[base + STUCK_REPORTED] = 1
+                    anomalies.append(_anomaly(
+                        "stuck", reading, metric, value,
+                        unchanged_seconds=int(timestamp - stats[base + UNCHANGED_SINCE])
+                    ))
+
+                stats[base + EWMA] += self.ewma_alpha * (value - stats[base + EWMA])
+            else:
+                stats[base + EWMA] = value
+                stats[base + UNCHANGED_SINCE] = timestamp
+
+            # Welford's update
+            count += 1
+            delta = value - stats[base + MEAN]
+            stats[base + MEAN] += delta / count
+            stats[base + M2] += delta * (value - stats[base + MEAN])
+            stats[base + COUNT] = count
+            stats[base + LAST_VALUE] = value
+            stats[base + LAST_TS] = timestamp
+
+        return anomalies
+
+    def summary(self, address: str) -> Dict[str, Dict[str, float]]:
+        """Return the current statistics of one sensor, per metric."""
+        result = {}
+        for metric in METRIC_LIMITS:
+            base = self._slots.get((address, metric))
+            if base is None:
+                continue
+            stats = self._values
+            count = stats[base + COUNT]
+            result[metric] = {
+                "count": int(count),
+                "mean": stats[base + MEAN],
+                "stddev": math.sqrt(stats[base + M2] / (count - 1)) if count > 1 else 0.0,
+                "ewma": stats[base + EWMA],
+                "rate_per_minute": stats[base + RATE],
+                "last": stats[base + LAST_VALUE],
+            }
+        return result
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Deadline tracking for sensors that stop reporting
+
+SensorTimeoutTracker keeps one deadline per online sensor in a min-heap.
+A reading only updates the sensor's last-seen time. When its heap entry
+comes due and the sensor was seen since, the entry is pushed back to the
+new deadline instead of being kept up to date on every reading. Checking
+for timeouts therefore pops only due entries, so the cost scales with
+expirations rather than fleet size. The active count is kept incrementally.
+
+Each sensor produces one offline event when it times out and one recovery
+event when it is seen again.
+"""
+
+import heapq
+from typing import Dict, List, Set, Tuple
+
+
+class SensorTimeoutTracker:
+    """Online/offline state of sensors from their last-seen times."""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+
+        # Address -> last seen (time.monotonic() seconds)
+        self.last_seen: Dict[str, float] = {}
+        self._deadlines: List[Tuple[float, str]] = []
+        self._offline: Set[str] = set()
+
+    @property
+    def active_count(self) -> int:
+        """Number of sensors seen within the timeout."""
+        return len(self.last_seen) - len(self._offline)
+
+    def seen(self, address: str, now: float) -> bool:
+        """Record a reading; returns True if the sensor was offline and has recovered."""
+        known = address in self.last_seen
+        self.last_seen[address] = now
+
+        if not known:
+            heapq.heappush(self._deadlines, (now + self.timeout, address))
+            return False
+        if address in self._offline:
+            self._offline.discard(address)
+            heapq.heappush(self._deadlines, (now + self.timeout, address))
+            return True
+        return False
+
+    def expire(self, now: float) -> List[Tuple[str, float]]:
+        """Return (address, last seen) of sensors that went offline since the last call."""
+        expired = []
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _deadline, address = heapq.heappop(self._deadlines)
+            deadline = self.last_seen[address] + self.timeout
+            if deadline > now:
+                # Seen since the entry was pushed; check again at the new deadline
+                heapq.heappush(self._deadlines, (deadline, address))
+            else:
+                self._offline.add(address)
+                expired.append((address, self.last_seen[address]))
+        return expired
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Latest sensor state in shared memory for local consumers
+
+SharedStateWriter keeps the latest reading of every sensor in a fixed-layout
+table in multiprocessing.shared_memory. The scanner daemon and the monitor
+can maintain it. Local processes such as a display or a rules engine attach
+a SharedStateReader and read any sensor's current state straight from the
+mapping. They make no socket or MQTT round trip and parse no JSON.
+
+Layout (little-endian):
+
+    header   64 bytes   magic, layout version, capacity, devices in use,
+                        writer PID (0 once the writer has closed)
+    index    capacity x 36 bytes   address of each slot, ASCII, NUL-padded
+    slots    capacity x 64 bytes   one packed reading per device
+
+A slot holds the flat state schema of state_codec (ts, rssi, lb, t, h, bv,
+mc, mv, mg, p, r), so a reader gets the same dict as decode_state(). Each
+slot is one 64-byte cache line, so updates to one sensor never touch
+another sensor's line. Slots are assigned in order and never move. A
+reader caches the address -> slot map and rereads the index only when the
+device count grows.
+
+Each slot starts with a seqlock sequence number. The writer makes it odd,
+writes the slot, then makes it even. A reader retries while the number is
+odd, or if it changed during the read, so it never returns a half-written
+reading. Readers can also poll sequence() and unpack a slot only when it
+has changed.
+"""
+
+import logging
+import os
+import struct
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional
+
+from state_codec import flatten_reading
+
+DEFAULT_NAME = "teltonika_eye"
+
+MAGIC = b"TELTEYE\0"
+LAYOUT_VERSION = 1
+
+# magic, layout version, capacity, devices in use, writer PID
+HEADER = struct.Struct("<8sIIII")
+HEADER_SIZE = 64
+# Fits a MAC address and the CoreBluetooth UUIDs bleak reports on macOS
+ADDRESS = struct.Struct("36s")
+SEQUENCE = struct.Struct("<Q")
+# ts, t, h, bv, mc, p, r, rssi, flags, present
+BODY = struct.Struct("<qHBHHbhhBB")
+SLOT_SIZE = 64
+# Reads of a slot that stays mid-update this long give up (a writer died mid-write)
+MAX_READ_RETRIES = 10000
+
+# Flag bits, and presence bits for the optional fields
+LOW_BATTERY, MOVING, MAGNET = 1, 2, 4
+HAS_T, HAS_H, HAS_BV, HAS_MOVEMENT, HAS_MAGNET, HAS_ANGLE = 1, 2, 4, 8, 16, 32
+
+# Header fields
+_COUNT_OFFSET = 16
+_PID_OFFSET = 20
+_FIELD = struct.Struct("<I")
+
+
+def _layout(capacity: int):
+    """Return the index offset, slots offset and total size for a capacity."""
+    slots_offset = HEADER_SIZE + capacity * ADDRESS.size
+    slots_offset += -slots_offset % SLOT_SIZE
+    return HEADER_SIZE, slots_offset, slots_offset + capacity * SLOT_SIZE
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing segment without handing it to the resource tracker.
+
+    Before Python 3.13 the tracker unlinks every segment a process attached
+    to when that process exits, which would remove it from under the writer.
+    Registration is skipped rather than undone, because undoing it would
+    also drop the writer's own registration in a process that has both.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _pid_running(pid: int) -> bool:
+    """Return True if a process with this PID exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedStateWriter:
+    """Maintains the shared-memory latest-state table. One writer per table."""
+
+    def __init__(self, name: str = DEFAULT_NAME, capacity: int = 256):
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+
+        # Address -> slot number
+        self._slots: Dict[str, int] = {}
+        # Addresses not stored because the table was full; logged once each
+        self._overflow = set()
+
+        try:
+            self._segment = shared_memory.SharedMemory(
+                name=name, create=True, size=_layout(capacity)[2]
+            )
+            self._buf = self._segment.buf
+            HEADER.pack_into(self._buf, 0, MAGIC, LAYOUT_VERSION, capacity, 0, os.getpid())
+            self.capacity = capacity
+        except FileExistsError:
+            self._adopt(name)
+
+        self._index_offset, self._slots_offset, _size = _layout(self.capacity)
+        # Our own copy of each slot's sequence number, so updates never read it back
+        self._sequences = [
+            SEQUENCE.unpack_from(self._buf, self._slots_offset + slot * SLOT_SIZE)[0] & ~1
+            for slot in range(len(self._slots))
+        ]
+
+    def _adopt(self, name: str):
+        """Take over a table left by a writer that is no longer running.
+
+        Its slots are kept, so readers attached to it carry on.
+        """
+        # Tracked like a created segment, since close() unlinks it
+        self._segment = shared_memory.SharedMemory(name=name)
+        self._buf = self._segment.buf
+        magic, version, capacity, count, pid = HEADER.unpack_from(self._buf, 0)
+        error = None
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            error = f"Shared memory {name} exists but is not a sensor state table"
+        elif pid and pid != os.getpid() and _pid_running(pid):
+            error = f"Shared memory {name} is already maintained by PID {pid}"
+        if error:
+            self._buf = None
+            self._segment.close()
+            # Not ours; keep the tracker from unlinking it when we exit
+            resource_tracker.unregister(self._segment._name, "shared_memory")
+            raise RuntimeError(error)
+
+        self.capacity = capacity
+        index_offset = _layout(capacity)[0]
+        for slot in range(count):
+            address = ADDRESS.unpack_from(self._buf, index_offset + slot * ADDRESS.size)[0]
+            self._slots[address.rstrip(b"\0").decode("ascii")] = slot
+        _FIELD.pack_into(self._buf, _PID_OFFSET, os.getpid())
+        self.logger.info(f"Reusing shared memory {name} with {count} devices")
+
+    def update(self, reading: Dict[str, Any]):
+        """Store a sensor's latest reading."""
+        address = reading["device"]["address"]
+        slot = self._slots.get(address)
+        new = slot is None
+        if new:
+            slot = self._allocate(address)
+            if slot is None:
+                return
+
+        state = flatten_reading(reading)
+        flags = present = 0
+        if state["lb"]:
+            flags |= LOW_BATTERY
+        if "t" in state:
+            present |= HAS_T
+        if "h" in state:
+            present |= HAS_H
+        if "bv" in state:
+            present |= HAS_BV
+        if "mc" in state:
+            present |= HAS_MOVEMENT
+            if state["mv"]:
+                flags |= MOVING
+        if "mg" in state:
+            present |= HAS_MAGNET
+            if state["mg"]:
+                flags |= MAGNET
+        if "p" in state:
+            present |= HAS_ANGLE
+
+        offset = self._slots_offset + slot * SLOT_SIZE
+        sequence = self._sequences[slot] + 1
+        # Odd while the slot is being written
+        SEQUENCE.pack_into(self._buf, offset, sequence)
+        BODY.pack_into(
+            self._buf, offset + SEQUENCE.size,
+            state["ts"], state.get("t", 0), state.get("h", 0), state.get("bv", 0),
+            state.get("mc", 0), state.get("p", 0), state.get("r", 0), state["rssi"],
+            flags, present
+        )
+        SEQUENCE.pack_into(self._buf, offset, sequence + 1)
+        self._sequences[slot] = sequence + 1
+
+        if new:
+            # Readers pick up a new slot once the count includes it
+            _FIELD.pack_into(self._buf, _COUNT_OFFSET, slot + 1)
+
+    def _allocate(self, address: str) -> Optional[int]:
+        """Assign the next free slot to a device and record it in the index."""
+        slot = len(self._slots)
+        if slot >= self.capacity:
+            if address not in self._overflow:
+                self._overflow.add(address)
+                self.logger.warning(f"Shared state table {self.name} is full; {address} is not stored")
+            return None
+
+        ADDRESS.pack_into(self._buf, self._index_offset + slot * ADDRESS.size, address.encode("ascii"))
+        self._slots[address] = slot
+        self._sequences.append(0)
+        return slot
+
+    def close(self):
+        """Mark the table as no longer maintained and remove it."""
+        _FIELD.pack_into(self._buf, _PID_OFFSET, 0)
+        self._buf = None
+        self._segment.close()
+        try:
+            self._segment.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedStateReader:
+    """Reads sensor state from a table maintained by a SharedStateWriter."""
+
+    def __init__(self, name: str = DEFAULT_NAME):
+        self.name = name
+        self._segment = _attach(name)
+        self._buf = self._segment.buf
+
+        magic, version, capacity, _count, _pid = HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            self._segment.close()
+            raise RuntimeError(f"Shared memory {name} is not a sensor state table")
+        self._index_offset, self._slots_offset, _size = _layout(capacity)
+
+        # Address -> slot number, extended as the writer adds devices
+        self._slots: Dict[str, int] = {}
+
+    @property
+    def writer_running(self) -> bool:
+        """False once the writer has closed the table; reattach after it restarts."""
+        return _FIELD.unpack_from(self._buf, _PID_OFFSET)[0] != 0
+
+    def addresses(self) -> List[str]:
+        """Return the addresses of all devices in the table."""
+        self._refresh()
+        return list(self._slots)
+
+    def sequence(self, address: str) -> Optional[int]:
+        """Return a number that changes whenever the device's state changes."""
+        slot = self._slot(address)
+        if slot is None:
+            return None
+        return SEQUENCE.unpack_from(self._buf, self._slots_offset + slot * SLOT_SIZE)[0]
+
+    def get(self, address: str) -> Optional[Dict[str, Any]]:
+        """Return a device's latest state in the flat schema.
+
+        Returns None for an unknown device, or if its slot stays mid-update.
+        """
+        slot = self._slot(address)
+        if slot is None:
+            return None
+
+        offset = self._slots_offset + slot * SLOT_SIZE
+        buf = self._buf
+        for _attempt in range(MAX_READ_RETRIES):
+            before = SEQUENCE.unpack_from(buf, offset)[0]
+            if before & 1:
+                continue
+            values = BODY.unpack_from(buf, offset + SEQUENCE.size)
+            if SEQUENCE.unpack_from(buf, offset)[0] == before:
+                break
+        else:
+            return None
+
+        ts, t, h, bv, mc, p, r, rssi, flags, present = values
+        state = {"ts": ts, "rssi": rssi, "lb": bool(flags & LOW_BATTERY)}
+        if present & HAS_T:
+            state["t"] = t
+        if present & HAS_H:
+            state["h"] = h
+        if present & HAS_BV:
+            state["bv"] = bv
+        if present & HAS_MOVEMENT:
+            state["mc"] = mc
+            state["mv"] = bool(flags & MOVING)
+        if present & HAS_MAGNET:
+            state["mg"] = bool(flags & MAGNET)
+        if present & HAS_ANGLE:
+            state["p"] = p
+            state["r"] = r
+        return state
+
+    def close(self):
+        """Detach from the table."""
+        self._buf = None
+        self._segment.close()
+
+    def _slot(self, address: str) -> Optional[int]:
+        """Return a device's slot, rereading the index if it is not known yet."""
+        slot = self._slots.get(address)
+        if slot is None:
+            self._refresh()
+            slot = self._slots.get(address)
+        return slot
+
+    def _refresh(self):
+        """Read index entries added since the last refresh."""
+        count = _FIELD.unpack_from(self._buf, _COUNT_OFFSET)[0]
+        for slot in range(len(self._slots), count):
+            address = ADDRESS.unpack_from(self._buf, self._index_offset + slot * ADDRESS.size)[0]
+            self._slots[address.rstrip(b"\0").decode("ascii")] = slot
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Encoders and decoders for the per-device MQTT state document
+
+The bridge publishes each reading's full state document as JSON on
+teltonika_eye/<id>/state by default. For high-volume consumers it can instead
+publish a binary document, with the encoding given as a topic suffix:
+
+    teltonika_eye/<id>/state/msgpack   MessagePack of the flat schema below
+    teltonika_eye/<id>/state/raw       RSSI, timestamp and the raw advert bytes
+
+Flat schema (keys present only when the sensor reports them):
+
+    ts    reading time, milliseconds since the Unix epoch (UTC)
+    rssi  signal strength in dBm
+    lb    low battery flag
+    t     temperature in hundredths of °C
+    h     relative humidity in %
+    bv    battery voltage in mV
+    mc    movement count
+    mv    moving flag
+    mg    magnet detected flag
+    p     pitch in degrees
+    r     roll in degrees
+
+decode_state() turns any of the encodings back into the flat schema.
+"""
+
+import json
+import struct
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+try:
+    import msgpack
+except ImportError:  # optional, only needed for the msgpack encoding
+    msgpack = None
+
+from teltonika_eye_scanner import TeltonikaEYEParser
+
+STATE_ENCODINGS = ("json", "msgpack", "raw")
+
+# Raw encoding header: format version, timestamp in ms, RSSI; advert bytes follow
+RAW_HEADER = struct.Struct(">Bqb")
+RAW_FORMAT_VERSION = 1
+
+_parser = TeltonikaEYEParser()
+
+
+def timestamp_ms(timestamp: str) -> int:
+    """Convert a reading's ISO timestamp (UTC, trailing Z) to epoch milliseconds."""
+    parsed = datetime.fromisoformat(timestamp.rstrip("Z"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+def flatten_reading(device_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the flat state schema from a scanner reading."""
+    data = device_data["data"]
+    sensors = data["sensors"]
+    state = {
+        "ts": timestamp_ms(data["timestamp"]),
+        "rssi": device_data["device"]["rssi"],
+        "lb": data["battery"]["low"],
+    }
+
+    if "temperature" in sensors:
+        state["t"] = sensors["temperature"]["raw"]
+
+    if "humidity" in sensors:
+        state["h"] = sensors["humidity"]["value"]
+
+    if "battery_voltage" in sensors:
+        state["bv"] = sensors["battery_voltage"]["millivolts"]
+
+    if "movement" in sensors:
+        state["mc"] = sensors["movement"]["count"]
+        state["mv"] = sensors["movement"]["state"] == "moving"
+
+    if "magnetic" in sensors:
+        state["mg"] = sensors["magnetic"]["detected"]
+
+    if "angle" in sensors:
+        state["p"] = sensors["angle"]["pitch"]
+        state["r"] = sensors["angle"]["roll"]
+
+    return state
+
+
+def encode_state(
+    encoding: str,
+    device_data: Dict[str, Any],
+    raw_payload: Optional[bytes] = None
+) -> bytes:
+    """Encode a reading's state document.
+
+    raw_payload is the Teltonika manufacturer data of the advert and is
+    required for the raw encoding.
+    """
+    if encoding == "json":
+        return json.dumps(device_data).encode("utf-8")
+
+    if encoding == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("The msgpack encoding requires the msgpack package")
+        return msgpack.packb(flatten_reading(device_data))
+
+    if encoding == "raw":
+        if raw_payload is None:
+            raise ValueError("The raw encoding requires the advert payload")
+        return RAW_HEADER.pack(
+            RAW_FORMAT_VERSION,
+            timestamp_ms(device_data["data"]["timestamp"]),
+            max(-128, min(127, device_data["device"]["rssi"]))
+        ) + raw_payload
+
+    raise ValueError(f"Unknown state encoding: {encoding}")
+
+
+def decode_state(encoding: str, payload: bytes) -> Optional[Dict[str, Any]]:
+    """Decode a state document of any encoding into the flat schema.
+
+    The encoding is the suffix of the state topic, or "json" for the plain
+    state topic. Returns None for a raw payload that does not parse.
+    """
+    if encoding == "json":
+        return flatten_reading(json.loads(payload))
+
+    if encoding == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("The msgpack encoding requires the msgpack package")
+        return msgpack.unpackb(payload)
+
+    if encoding == "raw":
+        version, timestamp, rssi = RAW_HEADER.unpack_from(payload)
+        if version != RAW_FORMAT_VERSION:
+            raise ValueError(f"Unsupported raw state format version: {version}")
+        data = _parser.parse_manufacturer_data(
+            {TeltonikaEYEParser.TELTONIKA_COMPANY_ID: payload[RAW_HEADER.size:]}
+        )
+        if data is None:
+            return None
+        state = flatten_reading({"device": {"rssi": rssi}, "data": data})
+        state["ts"] = timestamp
+        return state
+
+    raise ValueError(f"Unknown state encoding: {encoding}")
+
+
+def state_encoding_from_topic(topic: str) -> str:
+    """Return the encoding of a state topic from its suffix."""
+    suffix = topic.rsplit("/", 1)[-1]
+    return suffix if suffix in STATE_ENCODINGS else "json"
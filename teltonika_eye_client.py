@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Client for the resident Teltonika EYE scanner daemon
+
+Reads sensor data from `teltonika_eye_scanner.py --daemon` over its Unix
+socket and prints it to stdout as JSON lines, the same as the one-shot
+scanner. It uses only the standard library and does not touch the Bluetooth
+adapter, so it starts quickly and any number of clients can run at once.
+
+    # Readings as they arrive for 5 seconds, like a 5-second scan
+    python3 teltonika_eye_client.py --duration 5
+
+    # Latest reading of each sensor seen in the last 60 seconds, at once
+    python3 teltonika_eye_client.py --latest --max-age 60
+
+    # Stream one sensor until interrupted
+    python3 teltonika_eye_client.py --follow --device 7C:D9:F4:00:11:22
+"""
+
+import json
+import socket
+import sys
+import time
+from typing import Iterator, List, Optional
+
+DEFAULT_SOCKET = "/tmp/teltonika-eye.sock"
+
+
+def read_lines(
+    socket_path: str = DEFAULT_SOCKET,
+    mode: str = "stream",
+    devices: Optional[List[str]] = None,
+    duration: Optional[float] = None,
+    max_age: float = 60.0
+) -> Iterator[bytes]:
+    """Yield JSONL readings from the daemon.
+
+    Args:
+        socket_path: Daemon socket path
+        mode: "stream" for readings as they arrive, "latest" for the latest
+            reading of each recently seen sensor
+        devices: Only readings from these addresses; all sensors if empty
+        duration: Stop streaming after this many seconds; None streams
+            until the daemon closes the connection
+        max_age: For "latest", ignore sensors not seen for this many seconds
+    """
+    request = {"mode": mode, "max_age": max_age}
+    if devices:
+        request["devices"] = devices
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(socket_path)
+        conn.sendall(json.dumps(request).encode("utf-8") + b"\n")
+
+        deadline = None if duration is None else time.monotonic() + duration
+        buffer = b""
+        while True:
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                conn.settimeout(remaining)
+            try:
+                chunk = conn.recv(65536)
+            except socket.timeout:
+                return
+            if not chunk:
+                return
+
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                yield line + b"\n"
+
+
+def main():
+    """Main function to run the client."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Read Teltonika EYE sensor data from the resident scanner daemon"
+    )
+    parser.add_argument(
+        "--socket",
+        default=DEFAULT_SOCKET,
+        help=f"Daemon socket path (default: {DEFAULT_SOCKET})"
+    )
+    parser.add_argument(
+        "--device",
+        action="append",
+        help="Only this sensor address (repeatable; default: all sensors)"
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--duration", "-d",
+        type=float,
+        default=10.0,
+        help="Print readings as they arrive for this many seconds (default: 10.0)"
+    )
+    mode.add_argument(
+        "--follow", "-f",
+        action="store_true",
+        help="Print readings as they arrive until interrupted"
+    )
+    mode.add_argument(
+        "--latest",
+        action="store_true",
+        help="Print the latest reading of each sensor and exit"
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=60.0,
+        help="With --latest, skip sensors not seen for this many seconds (default: 60)"
+    )
+
+    args = parser.parse_args()
+
+    if args.latest:
+        lines = read_lines(args.socket, "latest", args.device, max_age=args.max_age)
+    else:
+        lines = read_lines(args.socket, "stream", args.device, None if args.follow else args.duration)
+
+    try:
+        for line in lines:
+            sys.stdout.buffer.write(line)
+            sys.stdout.buffer.flush()
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"No scanner daemon on {args.socket}; start it with "
+              f"'python3 teltonika_eye_scanner.py --daemon --socket {args.socket}'", file=sys.stderr)
+        sys.exit(1)
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,7 @@ import struct
 import sys
 import time
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, List, Optional, Tuple, Any
 
 from bleak import BleakScanner
 from bleak.backends.device import BLEDevice
@@ -210,21 +210,36 @@ class TeltonikaEYEParser:
 class TeltonikaEYEScanner:
     """Bluetooth LE scanner for Teltonika EYE sensors."""
     
-    def __init__(self, scan_duration: float = 10.0, output_format: str = "json"):
+    def __init__(
+        self,
+        scan_duration: float = 10.0,
+        output_format: str = "json",
+        reading_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
         self.scan_duration = scan_duration
         self.output_format = output_format
+        self.reading_callback = reading_callback
         self.parser = TeltonikaEYEParser()
         self.logger = logging.getLogger(__name__)
         self.devices_found = {}
+        # Latest raw Teltonika manufacturer data per device address
+        self.raw_payloads: Dict[str, bytes] = {}
+        # Called with the parse time in seconds of each decoded advert (metrics)
+        self.decode_observer: Optional[Callable[[float], None]] = None
+        self._scanner: Optional[BleakScanner] = None
     
     async def scan_callback(self, device: BLEDevice, advertisement_data: AdvertisementData):
         """Callback function called for each discovered BLE device."""
         try:
             # Parse manufacturer data
             if advertisement_data.manufacturer_data:
+                decode_start = time.perf_counter()
                 parsed_data = self.parser.parse_manufacturer_data(advertisement_data.manufacturer_data)
                 
                 if parsed_data:
+                    if self.decode_observer:
+                        self.decode_observer(time.perf_counter() - decode_start)
+                    
                     # Add device information
                     device_info = {
                         "device": {
@@ -236,14 +251,27 @@ class TeltonikaEYEScanner:
                     }
                     
                     # Store/update device data
+                    first_sighting = device.address not in self.devices_found
                     self.devices_found[device.address] = device_info
+                    self.raw_payloads[device.address] = advertisement_data.manufacturer_data[
+                        TeltonikaEYEParser.TELTONIKA_COMPANY_ID
+                    ]
+                    
+                    # Hand the reading to a live consumer, if any
+                    if self.reading_callback:
+                        self.reading_callback(device_info)
                     
                     # Output immediately for real-time processing
                     if self.output_format == "json":
                         print(json.dumps(device_info, indent=None))
                         sys.stdout.flush()
                     
-                    self.logger.info(f"Found Teltonika EYE sensor: {device.address} ({device.name})")
+                    # Sensors advertise every few seconds; a resident scanner would
+                    # otherwise log several lines a second forever
+                    if first_sighting:
+                        self.logger.info(f"Found Teltonika EYE sensor: {device.address} ({device.name})")
+                    else:
+                        self.logger.debug(f"Reading from Teltonika EYE sensor: {device.address}")
         
         except Exception as e:
             self.logger.error(f"Error processing device {device.address}: {e}")
@@ -270,6 +298,24 @@ class TeltonikaEYEScanner:
         except Exception as e:
             self.logger.error(f"Error during BLE scan: {e}")
             return []
+    
+    async def start(self):
+        """Start scanning continuously until stop() is called.
+        
+        Readings are delivered through reading_callback as adverts arrive.
+        """
+        if self._scanner is not None:
+            return
+        self.logger.info("Starting continuous BLE scan...")
+        self._scanner = BleakScanner(detection_callback=self.scan_callback)
+        await self._scanner.start()
+    
+    async def stop(self):
+        """Stop a continuous scan started with start()."""
+        scanner, self._scanner = self._scanner, None
+        if scanner is not None:
+            await scanner.stop()
+            self.logger.info("Continuous BLE scan stopped.")
 
 
 async def main():
@@ -296,6 +342,20 @@ async def main():
         default="INFO",
         help="Set logging level (default: INFO)"
     )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Scan continuously and serve readings to teltonika_eye_client.py over a Unix socket"
+    )
+    parser.add_argument(
+        "--socket",
+        default="/tmp/teltonika-eye.sock",
+        help="Unix socket path for --daemon (default: /tmp/teltonika-eye.sock)"
+    )
+    parser.add_argument(
+        "--shm-name",
+        help="With --daemon, also keep each sensor's latest state in this shared-memory table"
+    )
     
     args = parser.parse_args()
     
@@ -307,6 +367,16 @@ async def main():
         stream=sys.stderr  # Log to stderr to keep stdout clean for JSON output
     )
     
+    if args.daemon:
+        from scanner_daemon import ScannerDaemon
+        
+        try:
+            await ScannerDaemon(args.socket, shm_name=args.shm_name).run()
+        except Exception as e:
+            logging.error(f"Scanner daemon failed: {e}")
+            sys.exit(1)
+        return
+    
     # Create and run scanner
     scanner = TeltonikaEYEScanner(scan_duration=args.duration)
     
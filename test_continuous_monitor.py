@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script for the monitor's handling of repeated readings.
+
+scan() returns the latest reading of every sensor seen since start, so a
+sensor that has gone quiet keeps handing back its last reading each cycle.
+"""
+
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from continuous_monitor import ContinuousMonitor
+
+
+def make_reading(address, timestamp, temperature=21.5):
+    """Build a scanner reading."""
+    return {
+        "device": {"address": address, "name": "EYE", "rssi": -60},
+        "data": {
+            "timestamp": timestamp,
+            "sensors": {"temperature": {"value": temperature, "unit": "°C", "raw": int(temperature * 100)}},
+            "battery": {"low": False},
+        },
+    }
+
+
+class LogCollector(logging.Handler):
+    """Collects log messages."""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def run_cycles(monitor, scans, pause=0.0):
+    """Run one scan cycle per entry of scans, each returning that list of readings.
+
+    Sleeps pause seconds after each cycle but the last, then checks timeouts.
+    """
+    async def cycles():
+        for index, devices in enumerate(scans):
+            async def scan(devices=devices):
+                return devices
+            monitor.scanner.scan = scan
+            await monitor._scan_cycle()
+            if pause and index < len(scans) - 1:
+                await asyncio.sleep(pause)
+            monitor._check_sensor_timeouts()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(cycles())
+        monitor.writer.close()
+
+
+def test_quiet_sensor_times_out_once():
+    """A sensor whose last reading keeps being returned goes offline once, then recovers once."""
+    monitor = ContinuousMonitor()
+    monitor.timeouts.timeout = 0.05
+    collector = LogCollector()
+    monitor.logger.addHandler(collector)
+    monitor.logger.setLevel(logging.INFO)
+
+    stale = make_reading("7C:D9:F4:00:00:01", "2025-06-01T12:00:00Z")
+    fresh = make_reading("7C:D9:F4:00:00:01", "2025-06-01T12:05:00Z")
+    run_cycles(monitor, [[stale]] * 5 + [[fresh]], pause=0.06)
+
+    timeouts = [m for m in collector.messages if m.startswith("Sensor timeout")]
+    recoveries = [m for m in collector.messages if m.startswith("Sensor back online")]
+    assert len(timeouts) == 1, timeouts
+    assert len(recoveries) == 1, recoveries
+    assert monitor.timeouts.active_count == 1
+    print("✅ A quiet sensor produces one offline and one recovery event")
+
+
+
+def test_repeated_reading_rolled_up_once():
+    """A reading returned by several scans counts once in its rollup windows."""
+    with tempfile.TemporaryDirectory() as tmp:
+        monitor = ContinuousMonitor(rollup_file=os.path.join(tmp, "rollups.jsonl"))
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        reading = make_reading("7C:D9:F4:00:00:01", (now - timedelta(seconds=2)).isoformat() + "Z", 20.0)
+        later = make_reading("7C:D9:F4:00:00:01", (now - timedelta(seconds=1)).isoformat() + "Z", 22.0)
+        run_cycles(monitor, [[reading]] * 5 + [[later]] * 3)
+
+        records = [r for r in monitor.rollup.flush() if r["metric"] == "temperature"]
+        for window in (60, 3600):
+            # The two readings may fall either side of a window boundary
+            in_window = [r for r in records if r["window"] == window]
+            assert sum(r["count"] for r in in_window) == 2, in_window
+            assert sum(r["total"] for r in in_window) == 42.0, in_window
+        assert not any(monitor.rollup.late_dropped.values())
+        print("✅ Repeated readings are rolled up once")
+
+
+
+def test_repeated_reading_not_in_statistics():
+    """Repeats of a quiet sensor's last reading do not narrow its statistics."""
+    monitor = ContinuousMonitor()
+    start = datetime(2025, 6, 1, 12)
+    address = "7C:D9:F4:00:00:01"
+
+    def reading(minute, temperature):
+        return make_reading(address, (start + timedelta(minutes=minute)).isoformat() + "Z", temperature)
+
+    # Readings alternate between 20 and 21 °C a minute apart, then the
+    # sensor goes quiet for many cycles and comes back at 20 °C
+    scans = [[reading(minute, 20.0 + minute % 2)] for minute in range(25)]
+    scans += [[reading(24, 21.0)]] * 200
+    scans += [[reading(30, 20.0)]]
+    run_cycles(monitor, scans)
+
+    summary = monitor.sensor_stats.summary(address)["temperature"]
+    assert summary["count"] == 26, summary
+    assert summary["stddev"] > 0.4, summary
+    assert monitor.stats["anomalies"] == 0
+    print("✅ Repeated readings are not added to sensor statistics")
+
+
+if __name__ == "__main__":
+    test_quiet_sensor_times_out_once()
+    test_repeated_reading_rolled_up_once()
+    test_repeated_reading_not_in_statistics()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Test script for multi-gateway ownership election, on its own and between two
+bridges connected to the local broker stand-in.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import aiomqtt
+
+from gateway_election import GatewayElection
+from homeassistant_mqtt import GATEWAY_TOPIC_PREFIX, HomeAssistantMQTT
+from local_broker import LocalBroker
+
+DEVICE = "7cd9f4001122"
+
+
+def exchange(*gateways: GatewayElection, now: float):
+    """Deliver every gateway's announcement to every other gateway."""
+    announcements = [(gateway.gateway_id, gateway.announcement(now)) for gateway in gateways]
+    for gateway in gateways:
+        for gateway_id, announcement in announcements:
+            gateway.handle_announcement(gateway_id, announcement, now)
+
+
+def test_election():
+    """Both gateways agree on the best-placed owner, with hysteresis and failover."""
+    print("\n" + "="*50)
+    print("Testing gateway election")
+    print("="*50)
+
+    hall = GatewayElection("hall", lease=10, hysteresis=5)
+    office = GatewayElection("office", lease=10, hysteresis=5)
+
+    hall.observe(DEVICE, -60, now=0)
+    office.observe(DEVICE, -80, now=0)
+    exchange(hall, office, now=0)
+    assert hall.owns(DEVICE, now=0) and not office.owns(DEVICE, now=0)
+    assert office.owner(DEVICE, now=0) == "hall"
+    print("✅ Strongest gateway owns the device")
+
+    # Office becomes slightly better: within the hysteresis margin, hall keeps it
+    for step in range(1, 20):
+        office.observe(DEVICE, -57, now=step / 10)
+    exchange(hall, office, now=2)
+    assert hall.owner(DEVICE, now=2) == office.owner(DEVICE, now=2) == "hall"
+    print("✅ Ownership kept within the hysteresis margin")
+
+    # Hall stops hearing the device: after a lease it is no longer announced
+    office.observe(DEVICE, -57, now=11)
+    exchange(hall, office, now=11)
+    assert office.owns(DEVICE, now=11) and not hall.owns(DEVICE, now=11)
+    print("✅ Failover when the owner stops hearing the device")
+
+    # A withdrawn gateway (empty announcement) is dropped immediately
+    hall.handle_announcement("office", None, now=12)
+    hall.observe(DEVICE, -70, now=12)
+    assert hall.owns(DEVICE, now=12)
+    print("✅ Withdrawn gateway releases its devices")
+
+
+def test_malformed_announcements():
+    """Malformed announcements are rejected and do not stop the bridge's receiver."""
+    print("\n" + "="*50)
+    print("Testing malformed announcements")
+    print("="*50)
+
+    hall = GatewayElection("hall", lease=10)
+    office = GatewayElection("office", lease=10)
+    office.observe(DEVICE, -60, now=0)
+    exchange(hall, office, now=0)
+
+    for announcement in ([1], "office", {"lease": "x"}, {"lease": -1}, {"devices": [1]},
+                         {"devices": {DEVICE: "loud"}}, {"owned": DEVICE}, {"owned": [1]}):
+        try:
+            hall.handle_announcement("office", announcement, now=1)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"Accepted {announcement!r}")
+    assert hall.owner(DEVICE, now=1) == "office"
+    print("✅ Malformed announcements rejected, previous one kept")
+
+    bridge = HomeAssistantMQTT(gateway_id="hall")
+    handled = []
+
+    def handler(message):
+        handled.append(message.payload)
+        bridge._on_gateway_announcement(message)
+        if message.payload == b"boom":
+            raise RuntimeError("handler failed")
+
+    bridge._subscriptions = {f"{GATEWAY_TOPIC_PREFIX}/+": handler}
+
+    async def messages():
+        for payload in (b"[1]", b'{"devices": [1]}', b"boom", b'{"devices": {"7cd9f4001122": -50}}'):
+            yield SimpleNamespace(topic=aiomqtt.Topic(f"{GATEWAY_TOPIC_PREFIX}/office"), payload=payload)
+
+    async def receive():
+        await bridge._receiver(SimpleNamespace(messages=messages()))
+
+    asyncio.run(receive())
+    assert len(handled) == 4
+    assert bridge.election.owner(DEVICE) == "office"
+    print("✅ The receiver keeps going after bad messages")
+
+
+async def _two_bridges():
+    """Run two bridges against the local broker and count state publishes."""
+    state_messages = []
+    broker = LocalBroker(
+        on_publish=lambda topic, payload, received_at: topic == f"teltonika_eye/{DEVICE}/state"
+        and state_messages.append(json.loads(payload))
+    )
+    port = await broker.start()
+
+    bridges = [
+        HomeAssistantMQTT(
+            mqtt_port=port, compact_state=True, streaming=True, coalesce_window=0,
+            gateway_id=gateway_id, gateway_lease=0.6
+        )
+        for gateway_id in ("hall", "office")
+    ]
+    tasks = [asyncio.create_task(bridge._mqtt_loop()) for bridge in bridges]
+    while any(bridge.mqtt_client is None for bridge in bridges):
+        await asyncio.sleep(0.01)
+
+    device = SimpleNamespace(address="7C:D9:F4:00:11:22", name="EYE")
+
+    async def advert(bridge: HomeAssistantMQTT, rssi: int, movement_count: int):
+        data = bytes.fromhex("01BF08B412") + movement_count.to_bytes(2, "big") + bytes.fromhex("0BFFC767")
+        await bridge.scanner.scan_callback(
+            device, SimpleNamespace(manufacturer_data={0x089A: data}, rssi=rssi)
+        )
+
+    try:
+        # Let both gateways hear the device and exchange announcements
+        for count in range(1, 4):
+            await advert(bridges[0], -60, count)
+            await advert(bridges[1], -80, count)
+            await asyncio.sleep(0.25)
+        await asyncio.sleep(0.3)
+
+        state_messages.clear()
+        for count in range(10, 15):
+            await advert(bridges[0], -60, count)
+            await advert(bridges[1], -80, count)
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(0.2)
+        elected = [message["movement_count"] for message in state_messages]
+
+        # Hall stops hearing the device; office takes over after a lease
+        state_messages.clear()
+        for count in range(20, 40):
+            await advert(bridges[1], -80, count)
+            await asyncio.sleep(0.1)
+        failover = [message["movement_count"] for message in state_messages]
+    finally:
+        for bridge in bridges:
+            bridge.running = False
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await broker.stop()
+
+    return elected, failover
+
+
+def test_two_bridges():
+    """Each reading is published once, and the other bridge takes over on loss."""
+    print("\n" + "="*50)
+    print("Testing two bridges on a local broker")
+    print("="*50)
+
+    elected, failover = asyncio.run(_two_bridges())
+
+    assert elected == [10, 11, 12, 13, 14], elected
+    print("✅ Each reading published once by the best gateway")
+
+    assert failover and failover[-1] == 39, failover
+    assert failover == list(range(failover[0], 40)), failover
+    print(f"✅ Office took over from reading {failover[0]}")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Multi-Gateway Election")
+
+    test_election()
+    test_malformed_announcements()
+    test_two_bridges()
+
+    print("\n🎉 All tests completed!")
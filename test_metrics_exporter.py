@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for the Prometheus metrics exporter.
+"""
+
+import asyncio
+
+from metrics_exporter import MetricsExporter
+
+
+def make_reading(address, timestamp, temperature, name="EYE"):
+    """Build a scanner reading."""
+    return {
+        "device": {"address": address, "name": name, "rssi": -58},
+        "data": {
+            "timestamp": timestamp,
+            "sensors": {"temperature": {"value": temperature, "unit": "°C"}},
+            "battery": {"low": False},
+        },
+    }
+
+
+def test_render_sensors_and_cache():
+    """Sensor lines use the reading's time, and unchanged sensors reuse the cached section."""
+    stats = {"scans": 3}
+    exporter = MetricsExporter()
+    exporter.counter("scan_cycles_total", "Completed scan cycles", lambda: stats["scans"])
+    histogram = exporter.histogram("scan_duration_seconds", "Duration of BLE scans", buckets=(1.0, 5.0))
+    histogram.observe(2.0)
+
+    exporter.update_sensor(make_reading("7C:D9:F4:00:00:01", "2025-06-01T12:00:00Z", 21.5, name='Hall "A"'))
+    exporter.update_sensor(make_reading("7C:D9:F4:00:00:02", "2025-06-01T12:00:05Z", 19.0))
+    text = exporter.render().decode()
+
+    labels = 'address="7C:D9:F4:00:00:01",name="Hall \\"A\\""'
+    assert f"teltonika_eye_sensor_temperature_celsius{{{labels}}} 21.5\n" in text
+    assert f"teltonika_eye_sensor_last_seen_timestamp_seconds{{{labels}}} 1748779200.000\n" in text
+    assert "teltonika_eye_sensor_humidity_percent{" not in text
+    assert "# TYPE teltonika_eye_scan_cycles_total counter\nteltonika_eye_scan_cycles_total 3\n" in text
+    assert 'teltonika_eye_scan_duration_seconds_bucket{le="1.0"} 0\n' in text
+    assert 'teltonika_eye_scan_duration_seconds_bucket{le="5.0"} 1\n' in text
+    assert "teltonika_eye_scan_duration_seconds_count 1\n" in text
+    print("✅ Sensor, counter and histogram samples render")
+
+    # scan() keeps returning a quiet sensor's last reading; it must not look fresh
+    block = exporter._sensor_block
+    exporter.update_sensor(make_reading("7C:D9:F4:00:00:01", "2025-06-01T12:00:00Z", 21.5, name='Hall "A"'))
+    stats["scans"] = 4
+    text = exporter.render().decode()
+    assert exporter._sensor_block is block
+    assert "teltonika_eye_scan_cycles_total 4\n" in text
+    print("✅ Repeated readings reuse the cached sensor section")
+
+    exporter.update_sensor(make_reading("7C:D9:F4:00:00:02", "2025-06-01T12:01:05Z", 19.25))
+    text = exporter.render().decode()
+    assert exporter._sensor_block is not block
+    assert 'teltonika_eye_sensor_temperature_celsius{address="7C:D9:F4:00:00:02",name="EYE"} 19.25\n' in text
+    assert (
+        'teltonika_eye_sensor_last_seen_timestamp_seconds{address="7C:D9:F4:00:00:02",name="EYE"} 1748779265.000\n'
+        in text
+    )
+    assert f"teltonika_eye_sensor_temperature_celsius{{{labels}}} 21.5\n" in text
+    print("✅ A new reading updates only its sensor")
+
+
+def test_http_endpoint():
+    """GET /metrics returns the metrics; other paths return 404."""
+    async def fetch(port, path):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        response = await reader.read()
+        writer.close()
+        return response
+
+    async def run():
+        exporter = MetricsExporter()
+        exporter.gauge("known_sensors", "Sensors seen since start", lambda: 2)
+        await exporter.start("127.0.0.1", 0)
+        port = exporter._server.sockets[0].getsockname()[1]
+        try:
+            ok = await fetch(port, "/metrics")
+            missing = await fetch(port, "/")
+        finally:
+            await exporter.stop()
+        return ok, missing
+
+    ok, missing = asyncio.run(run())
+    assert ok.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert ok.endswith(b"teltonika_eye_known_sensors 2\n")
+    assert missing.startswith(b"HTTP/1.1 404 Not Found\r\n")
+    print("✅ /metrics is served over HTTP")
+
+
+if __name__ == "__main__":
+    test_render_sensors_and_cache()
+    test_http_endpoint()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test script for the SQLite reading store.
+"""
+
+import os
+import tempfile
+
+from monitor_store import ReadingStore
+
+
+def make_reading(address, timestamp, temperature=21.5):
+    """Build a scanner reading."""
+    return {
+        "device": {"address": address, "name": "EYE", "rssi": -60},
+        "data": {
+            "timestamp": timestamp,
+            "sensors": {"temperature": {"value": temperature, "unit": "°C"}},
+            "battery": {"low": False},
+        },
+    }
+
+
+def test_rolled_back_batch_forgets_new_devices():
+    """A device registered in a batch that fails is registered again by the next batch."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ReadingStore(os.path.join(tmp, "readings.db"))
+        try:
+            broken = make_reading("7C:D9:F4:00:00:02", "2025-06-01T12:00:05Z")
+            del broken["data"]["battery"]
+            try:
+                store.submit([make_reading("7C:D9:F4:00:00:01", "2025-06-01T12:00:00Z"), broken]).result()
+            except KeyError:
+                pass
+            else:
+                raise AssertionError("Broken batch was written")
+
+            store.submit([make_reading("7C:D9:F4:00:00:01", "2025-06-01T12:01:00Z", 22.0)]).result()
+            rows = store.readings_between("7C:D9:F4:00:00:01", 0, 2**62)
+            assert [row["temperature"] for row in rows] == [22.0], [dict(row) for row in rows]
+        finally:
+            store.close()
+    print("✅ Devices from a rolled-back batch are registered again")
+
+
+if __name__ == "__main__":
+    test_rolled_back_batch_forgets_new_devices()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Test script for the disk-backed MQTT spool used by the bridge.
+"""
+
+import asyncio
+import tempfile
+from unittest import mock
+
+import aiomqtt
+
+import homeassistant_mqtt
+from homeassistant_mqtt import HomeAssistantMQTT
+from local_broker import LocalBroker
+from mqtt_spool import DiskSpool
+
+
+def test_ordered_replay():
+    """Messages come back in order across segments, and replayed segments are removed."""
+    print("\n" + "="*50)
+    print("Testing ordered replay")
+    print("="*50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        spool = DiskSpool(directory, segment_size_bytes=100)
+        for index in range(20):
+            spool.append("teltonika_eye/7cd9f4/state", str(index).encode(), qos=1)
+
+        replayed = []
+        while not spool.empty:
+            replayed.extend(int(payload) for _topic, payload, _qos, _retain in spool.read(3))
+            spool.commit()
+
+        assert replayed == list(range(20)), replayed
+        assert spool.size_bytes == 0
+        print("✅ Replayed 20 messages in order")
+
+
+def test_uncommitted_batch_is_replayed():
+    """A batch that was read but not committed is returned again."""
+    with tempfile.TemporaryDirectory() as directory:
+        spool = DiskSpool(directory)
+        spool.append("a", b"1")
+        spool.append("b", b"2", qos=1, retain=True)
+
+        first = spool.read(10)
+        assert spool.read(10) == first == [("a", b"1", 0, False), ("b", b"2", 1, True)]
+        spool.commit()
+        assert spool.empty
+        print("✅ Uncommitted batch replayed")
+
+
+def test_size_cap_and_restart():
+    """The oldest segment is dropped at the size cap, and the rest survives a restart."""
+    with tempfile.TemporaryDirectory() as directory:
+        spool = DiskSpool(directory, segment_size_bytes=100, max_size_bytes=300)
+        for index in range(40):
+            spool.append("t", str(index).encode())
+        spool.close()
+        assert spool.evicted_segments > 0
+
+        reopened = DiskSpool(directory)
+        replayed = []
+        while not reopened.empty:
+            replayed.extend(int(payload) for _topic, payload, _qos, _retain in reopened.read(100))
+            reopened.commit()
+        assert replayed == list(range(replayed[0], 40)), replayed
+        assert replayed[0] > 0
+        print(f"✅ Kept readings {replayed[0]}-39 after evicting {spool.evicted_segments} segments")
+
+
+
+def test_replay_position_survives_restart():
+    """Messages committed before a restart are not replayed again."""
+    with tempfile.TemporaryDirectory() as directory:
+        spool = DiskSpool(directory, segment_size_bytes=100)
+        for index in range(20):
+            spool.append("t", str(index).encode())
+        spool.read(5)
+        spool.commit()
+        spool.close()
+
+        reopened = DiskSpool(directory, segment_size_bytes=100)
+        replayed = []
+        while not reopened.empty:
+            replayed.extend(int(payload) for _topic, payload, _qos, _retain in reopened.read(3))
+            reopened.commit()
+        assert replayed == list(range(5, 20)), replayed
+        print("✅ Replay resumed after 5 committed messages")
+
+
+def test_failed_inflight_publishes_keep_order():
+    """Publishes that fail or are cut off in flight are spooled ahead of newer messages, in order."""
+    class FailingClient:
+        """Fails each publish after a per-topic delay; state/3 never completes."""
+
+        async def publish(self, topic, payload, qos=0, retain=False):
+            await asyncio.sleep({"state/0": 0.03, "state/1": 0.01, "state/2": 0.02}.get(topic, 10))
+            raise aiomqtt.MqttError("Connection lost")
+
+    async def run(bridge):
+        bridge.mqtt_client = FailingClient()
+        for index in range(5):
+            bridge._publish(f"state/{index}", str(index))
+        window = asyncio.Semaphore(10)
+        sends = [
+            asyncio.create_task(bridge._send(bridge.mqtt_client, bridge._outgoing.popleft(), window))
+            for _ in range(4)
+        ]
+        await asyncio.sleep(0.1)
+        # Disconnect: the publish still awaiting its ack is cut off
+        sends[3].cancel()
+        await asyncio.gather(*sends, return_exceptions=True)
+        bridge.mqtt_client = None
+        bridge._spool_outgoing()
+
+    with tempfile.TemporaryDirectory() as directory:
+        bridge = HomeAssistantMQTT(spool_dir=directory)
+        asyncio.run(run(bridge))
+        topics = [topic for topic, _payload, _qos, _retain in bridge.spool.read(10)]
+        assert topics == [f"state/{index}" for index in range(5)], topics
+        print("✅ Failed in-flight publishes spooled in their original order")
+
+
+def test_spool_error_reconnects():
+    """A spool error drops the connection and reconnects instead of ending the MQTT loop."""
+    async def run(bridge, broker, delivered):
+        port = await broker.start()
+        bridge.mqtt_port = port
+        read = bridge.spool.read
+        failures = []
+
+        def failing_read(count):
+            if not failures:
+                failures.append(count)
+                raise OSError("Disk read failed")
+            return read(count)
+
+        bridge.spool.read = failing_read
+        task = asyncio.create_task(bridge._mqtt_loop())
+        try:
+            for _ in range(200):
+                if delivered:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            bridge.running = False
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await broker.stop()
+        return failures
+
+    delivered = []
+    broker = LocalBroker(on_publish=lambda topic, payload, received_at: delivered.append(topic))
+    with tempfile.TemporaryDirectory() as directory:
+        bridge = HomeAssistantMQTT(spool_dir=directory)
+        bridge.spool.append("state/0", b"0")
+        with mock.patch.object(homeassistant_mqtt, "RECONNECT_MIN_DELAY", 0.01):
+            failures = asyncio.run(run(bridge, broker, delivered))
+        assert failures, "spool read was not attempted"
+        assert bridge.stats["reconnects"] == 1, bridge.stats
+        assert delivered == ["state/0"], delivered
+        print("✅ Spool error reconnects and the message is replayed")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing MQTT Disk Spool")
+
+    test_ordered_replay()
+    test_uncommitted_batch_is_replayed()
+    test_size_cap_and_restart()
+    test_replay_position_survives_restart()
+    test_failed_inflight_publishes_keep_order()
+    test_spool_error_reconnects()
+
+    print("\n🎉 All tests completed!")
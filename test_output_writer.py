@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script for the monitor's background output writer.
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from output_writer import OutputWriter
+
+
+class BlockedStdout(io.StringIO):
+    """A stdout whose writes wait until released, like a stalled pipe."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.release.wait()
+        return super().write(text)
+
+
+def test_failed_rotation_keeps_writing():
+    """A failed rotation is logged and readings keep going to the current file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, "readings.json")
+        with contextlib.redirect_stdout(io.StringIO()), \
+                mock.patch("output_writer.Path.rename", side_effect=OSError("read-only file system")):
+            writer = OutputWriter(output_file, max_size_bytes=10)
+            for index in range(3):
+                writer.submit([{"reading": index}])
+            writer.close()
+
+        with open(output_file) as handle:
+            assert len(handle.readlines()) == 3
+        print("✅ Readings are kept when rotation fails")
+
+
+def test_close_does_not_hang():
+    """close() gives up on a stuck writer instead of blocking on a full queue."""
+    stdout = BlockedStdout()
+    with contextlib.redirect_stdout(stdout):
+        writer = OutputWriter(max_queue=1)
+        writer.submit([{"reading": 1}])
+        time.sleep(0.1)
+        # The first batch is stuck on stdout; one more fills the queue
+        writer.submit([{"reading": 2}])
+        writer.submit([{"reading": 3}])
+        assert writer.dropped == 1
+
+        started = time.monotonic()
+        writer.close(timeout=0.2)
+        assert time.monotonic() - started < 1.0
+        stdout.release.set()
+    print("✅ close() returns when the writer is stuck")
+
+
+if __name__ == "__main__":
+    test_failed_rotation_keeps_writing()
+    test_close_does_not_hang()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script for querying monitor output with query_history.py.
+"""
+
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import query_history
+from segment_archive import archive_segment
+
+START = datetime(2025, 6, 1)
+
+
+def write_segment(path, day, readings=5000):
+    """Write one day of readings from four devices, every 15 seconds."""
+    lines = []
+    with open(path, "w") as handle:
+        for index in range(readings):
+            reading = {
+                "device": {"address": f"7C:D9:F4:00:00:{index % 4:02X}", "name": "EYE", "rssi": -60},
+                "data": {
+                    "timestamp": (START + timedelta(days=day, seconds=index * 15)).isoformat() + "Z",
+                    "sensors": {"temperature": {"value": 20 + index % 10}},
+                    "battery": {"low": False},
+                },
+            }
+            line = json.dumps(reading, separators=(",", ":")) + "\n"
+            handle.write(line)
+            lines.append(line.encode())
+    return lines
+
+
+def test_query_across_segments():
+    """Archived, plain and live segments give the same readings as a full scan."""
+    print("\n" + "="*50)
+    print("Testing time-range queries")
+    print("="*50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "readings.json")
+        lines = []
+        for day in range(4):
+            segment = f"{output_file}.202506{day + 1:02d}_235959"
+            lines += write_segment(segment, day)
+            if day < 2:
+                archive_segment(segment, block_bytes=16 * 1024)
+        lines += write_segment(output_file, 4)
+
+        start_ms = query_history.parse_time("2025-06-02T12:00:00")
+        end_ms = query_history.parse_time("2025-06-04T06:00")
+        devices = ["7C:D9:F4:00:00:02"]
+
+        expected = [
+            line for line in lines
+            if b"7C:D9:F4:00:00:02" in line and start_ms <= query_history.line_timestamp_ms(line) <= end_ms
+        ]
+        for workers in (1, 2):
+            result = list(query_history.query(output_file, start_ms, end_ms, devices, workers))
+            assert result == expected, (workers, len(result), len(expected))
+        print(f"✅ {len(expected)} readings match a full scan, in order")
+
+        # The first archive ends before the range and is never opened
+        segments = query_history.find_segments(output_file, start_ms, end_ms, devices)
+        assert not any("20250601" in segment for segment in segments), segments
+        assert not list(query_history.query(output_file, start_ms, end_ms, ["7C:D9:F4:00:00:09"]))
+        print("✅ Segments outside the range are skipped")
+
+
+if __name__ == "__main__":
+    test_query_across_segments()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script for the resident scanner daemon and its client.
+
+The daemon's scanner is not started; readings are fed to it directly.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import tempfile
+
+from scanner_daemon import ScannerDaemon
+from teltonika_eye_client import read_lines
+
+
+def make_reading(address, temperature):
+    """Build a scanner reading."""
+    return {
+        "device": {"address": address, "name": "EYE", "rssi": -60},
+        "data": {
+            "timestamp": "2025-06-01T12:00:00Z",
+            "sensors": {"temperature": {"value": temperature, "unit": "°C"}},
+            "battery": {"low": False},
+        },
+    }
+
+
+def test_stream_latest_and_filter():
+    """Stream clients get the readings they asked for; latest returns each sensor's last reading."""
+    async def run(socket_path):
+        # A socket file left by a daemon that died
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(socket_path)
+        stale.close()
+
+        daemon = ScannerDaemon(socket_path)
+        serving = asyncio.Event()
+
+        async def start_scan():
+            # Called once the daemon is listening on the socket
+            serving.set()
+
+        async def stop_scan():
+            pass
+        daemon.scanner.start = start_scan
+        daemon.scanner.stop = stop_scan
+
+        def feed(reading):
+            daemon.scanner.devices_found[reading["device"]["address"]] = reading
+            daemon._on_reading(reading)
+
+        def stream(devices=None):
+            return [json.loads(line) for line in read_lines(socket_path, "stream", devices, duration=1.0)]
+
+        server = asyncio.create_task(daemon.run())
+        try:
+            await asyncio.wait_for(serving.wait(), 5)
+            everything = asyncio.create_task(asyncio.to_thread(stream))
+            filtered = asyncio.create_task(asyncio.to_thread(stream, ["7c:d9:f4:00:00:02"]))
+            while len(daemon._subscribers) < 2:
+                await asyncio.sleep(0.01)
+
+            for temperature in (20.0, 21.0):
+                feed(make_reading("7C:D9:F4:00:00:01", temperature))
+                feed(make_reading("7C:D9:F4:00:00:02", temperature + 5))
+            everything, filtered = await everything, await filtered
+
+            latest = await asyncio.to_thread(lambda: [json.loads(line) for line in read_lines(socket_path, "latest")])
+        finally:
+            daemon.stop()
+            await server
+        return everything, filtered, latest
+
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, "daemon.sock")
+        everything, filtered, latest = asyncio.run(run(socket_path))
+        assert not os.path.exists(socket_path)
+    print("✅ A stale socket is replaced and removed on shutdown")
+
+    def summary(readings):
+        return [(r["device"]["address"], r["data"]["sensors"]["temperature"]["value"]) for r in readings]
+
+    assert summary(everything) == [
+        ("7C:D9:F4:00:00:01", 20.0), ("7C:D9:F4:00:00:02", 25.0),
+        ("7C:D9:F4:00:00:01", 21.0), ("7C:D9:F4:00:00:02", 26.0),
+    ], everything
+    print("✅ Stream delivers every reading in order")
+
+    assert summary(filtered) == [("7C:D9:F4:00:00:02", 25.0), ("7C:D9:F4:00:00:02", 26.0)], filtered
+    print("✅ Stream device filter ignores address case")
+
+    assert sorted(summary(latest)) == [("7C:D9:F4:00:00:01", 21.0), ("7C:D9:F4:00:00:02", 26.0)], latest
+    print("✅ Latest returns each sensor's last reading")
+
+
+if __name__ == "__main__":
+    test_stream_latest_and_filter()
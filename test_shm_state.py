@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared-memory latest-state table.
+"""
+
+import os
+
+from shm_state import SharedStateReader, SharedStateWriter
+from state_codec import flatten_reading
+
+
+def make_reading(address, temperature_raw, **sensors):
+    """Build a scanner reading with a temperature and any extra sensors."""
+    return {
+        "device": {"address": address, "name": "EYE", "rssi": -61},
+        "data": {
+            "timestamp": "2025-06-01T12:00:00Z",
+            "sensors": {"temperature": {"value": temperature_raw / 100, "raw": temperature_raw}, **sensors},
+            "battery": {"low": False},
+        },
+    }
+
+
+def test_shared_state_round_trip():
+    """Readers see each sensor's latest state in the flat state schema."""
+    name = f"teltonika_eye_test_{os.getpid()}"
+    writer = SharedStateWriter(name, capacity=2)
+    reader = SharedStateReader(name)
+    try:
+        first = make_reading("7C:D9:F4:00:00:01", 2150)
+        second = make_reading(
+            "7C:D9:F4:00:00:02", 1875,
+            humidity={"value": 48},
+            movement={"count": 12, "state": "moving"},
+            magnetic={"detected": True},
+            angle={"pitch": -12, "roll": 170},
+        )
+        writer.update(first)
+        writer.update(second)
+        assert reader.addresses() == ["7C:D9:F4:00:00:01", "7C:D9:F4:00:00:02"]
+        assert reader.get("7C:D9:F4:00:00:01") == flatten_reading(first)
+        assert reader.get("7C:D9:F4:00:00:02") == flatten_reading(second)
+        print("✅ Readings round-trip through shared memory")
+
+        sequence = reader.sequence("7C:D9:F4:00:00:01")
+        assert sequence % 2 == 0
+        writer.update(make_reading("7C:D9:F4:00:00:01", 2200))
+        assert reader.sequence("7C:D9:F4:00:00:01") == sequence + 2
+        assert reader.get("7C:D9:F4:00:00:01")["t"] == 2200
+        print("✅ Updates bump the slot's sequence number")
+
+        writer.update(make_reading("7C:D9:F4:00:00:03", 2000))
+        assert reader.get("7C:D9:F4:00:00:03") is None
+        print("✅ Devices beyond the capacity are not stored")
+
+        assert reader.writer_running
+    finally:
+        reader.close()
+        writer.close()
+
+
+if __name__ == "__main__":
+    test_shared_state_round_trip()